@@ -0,0 +1,53 @@
+"""Dispatcher benchmark: requests per second through the asyncio message bus.
+
+Run from the repository root:
+
+    python benchmarks/bench_dispatcher.py [--requests 100000] [--inline]
+
+Half the messages are weather risk assessments and half logistics request
+listings, each agent in its own lane. By default handlers run in batches on
+the thread pool; --inline runs them on the event loop.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.sar_project.agents.dispatcher import Dispatcher
+from src.sar_project.agents.logistics_simulation import LogisticsSimulation
+from src.sar_project.agents.weather_service import WeatherService
+
+
+async def run(requests, blocking):
+    dispatcher = Dispatcher(max_queue=4096)
+    dispatcher.register_agent(WeatherService(), blocking=blocking)
+    dispatcher.register_agent(LogisticsSimulation(), blocking=blocking)
+    async with dispatcher:
+        start = time.perf_counter()
+        futures = []
+        for i in range(requests):
+            message = {"assess_risk": True, "location": "sector_" + str(i % 50)} if i % 2 else {"get_requests": True}
+            futures.append(await dispatcher.submit(message))
+        await asyncio.gather(*futures)
+        elapsed = time.perf_counter() - start
+    return elapsed, dispatcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--inline", action="store_true")
+    args = parser.parse_args()
+    elapsed, stats = asyncio.run(run(args.requests, not args.inline))
+    print("{:.0f} requests/s".format(args.requests / elapsed))
+    print("{:<16}{:>8}{:>8}{:>10}{:>10}{:>12}".format("type", "count", "errors", "p50 ms", "p99 ms", "wait ms"))
+    for request_type, row in stats.items():
+        print("{:<16}{:>8}{:>8}{:>10.2f}{:>10.2f}{:>12.2f}".format(
+            request_type, row["count"], row["errors"], row["p50_ms"] or 0, row["p99_ms"] or 0, row["mean_wait_ms"] or 0))
+
+
+if __name__ == "__main__":
+    main()
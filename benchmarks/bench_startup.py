@@ -0,0 +1,47 @@
+"""Startup benchmark: time a fresh interpreter importing each entry point.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs 5]
+
+Every import happens in its own subprocess so nothing is cached between
+runs. The LLM-free simulation core should import in a fraction of the time
+the full agent (autogen and friends) takes.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = {
+    "graph": "src.sar_project.agents.logistics_graph",
+    "simulation": "src.sar_project.agents.logistics_simulation",
+    "agent": "src.sar_project.agents.logisitics_agent",
+}
+
+HEAVY = ("autogen", "google.generativeai", "dotenv", "openai")
+
+
+def time_import(module):
+    #wall time of a new interpreter importing module, and which heavy packages came with it
+    code = "import sys, {0}; print(' '.join(m for m in {1!r} if m in sys.modules))".format(module, HEAVY)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, out.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    baseline = statistics.median(time_import("sys")[0] for _ in range(args.runs))
+    print("{:<12}{:>10}  {}".format("target", "ms", "heavy imports"))
+    print("{:<12}{:>10.1f}".format("python", baseline * 1000))
+    for name, module in TARGETS.items():
+        runs = [time_import(module) for _ in range(args.runs)]
+        print("{:<12}{:>10.1f}  {}".format(name, statistics.median(t for t, _ in runs) * 1000, " ".join(runs[0][1]) or "-"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-from autogen import AssistantAgent
+from autogen import Agent, AssistantAgent, ConversableAgent
 from abc import ABC, abstractmethod
+from ..config.settings import get_settings
+from .llm_client import AutogenModelClient, CachedModelClient, llm_request
+
 
 class SARBaseAgent(AssistantAgent):
     def __init__(self, name, role, system_message, knowledge_base=None):
@@ -16,16 +19,34 @@ class SARBaseAgent(AssistantAgent):
         self.role = role
         self.kb = knowledge_base
         self.mission_status = "standby"
+        self.llm_client = None # ModelClient answering LLM replies instead of autogen, see set_llm_client
+        replies = [entry["reply_func"] for entry in self._reply_func_list]
+        self.register_reply([Agent, None], SARBaseAgent.generate_client_reply,
+                            position=replies.index(ConversableAgent.generate_oai_reply))
+
+    def set_llm_client(self, client=None, cache=None):
+        """Answer LLM replies through client (autogen's own call by default), from cache first when given"""
+        if client is None:
+            client = AutogenModelClient(self.llm_config)
+        self.llm_client = client if cache is None else CachedModelClient(client, cache)
+        return self.llm_client
+
+    def generate_client_reply(self, messages=None, sender=None, config=None):
+        """Reply function ahead of generate_oai_reply that sends the conversation to llm_client"""
+        llm_config = self.llm_config if config is None else config
+        if self.llm_client is None or llm_config is False:
+            return False, None
+        if messages is None:
+            messages = self._oai_messages[sender]
+        return True, self.llm_client.complete(llm_request(self._oai_system_message + messages, llm_config))
 
     def get_config_list(self): 
         """Load configuration from environment variables"""
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
+        settings = get_settings()
         return [{
             "model": "gpt-4",
-            "api_key": os.getenv("GOOGLE_API_KEY"),
-            "deployment_name": os.getenv("DEPLOYMENT_NAME")
+            "api_key": settings.GOOGLE_API_KEY,
+            "deployment_name": settings.DEPLOYMENT_NAME
         }]
 
 @abstractmethod
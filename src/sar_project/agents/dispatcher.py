@@ -0,0 +1,185 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from .headless import request_type_of
+
+
+def run_batch(calls):
+    #runs (handler, message) pairs in a pool worker, one executor round trip for the whole batch
+    results = []
+    for handler, message in calls:
+        try:
+            results.append((True, handler(message)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Route():
+    #handler for one request type, with its counters and recent latencies in seconds
+    def __init__(self, request_type, handler, lane, window):
+        self.request_type = request_type
+        self.handler = handler
+        self.lane = lane
+        self.count = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window) # submit to result
+        self.waits = deque(maxlen=window) # submit to a consumer picking the message up
+
+
+class Lane():
+    #bounded queue of (route, message, future, submitted) and the consumers draining it
+    def __init__(self, name, max_queue, blocking, consumers):
+        self.name = name
+        self.max_queue = max_queue
+        self.blocking = blocking
+        self.consumers = consumers
+        self.queue = None # created in start() so it belongs to the running loop
+        self.tasks = []
+
+
+class Dispatcher():
+    """Routes request messages to registered handlers through bounded asyncio queues.
+
+    A message is a dict like the ones process_request takes; its request type
+    is the first of its keys with a registered handler. Each handler belongs
+    to a lane with its own queue and consumers, so a slow lane (a weather
+    lookup) never holds up another (logistics planning). submit() waits while
+    the lane's queue is full, which is the backpressure on producers, and
+    returns a future of the handler's result. Blocking lanes drain up to
+    max_batch queued messages at a time and run them in one executor call,
+    on a thread pool by default; process pools only suit handlers that pickle.
+    Per request type counts, errors and latency percentiles are in stats().
+    """
+
+    def __init__(self, max_queue=1024, max_batch=64, executor=None, workers=4, window=4096):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.executor = executor
+        self.workers = workers
+        self.own_executor = executor is None
+        self.window = window
+        self.routes = {} # request type -> Route
+        self.lanes = {} # lane name -> Lane
+        self.running = False
+
+    def register(self, request_type, handler, lane=None, blocking=True, consumers=1):
+        """Handle request_type with handler(message), in lane (its own lane by default)"""
+        if request_type in self.routes:
+            raise ValueError("A handler for " + str(request_type) + " is already registered")
+        lane = request_type if lane is None else lane
+        if lane not in self.lanes:
+            if self.running:
+                raise RuntimeError("Lanes can only be added before the dispatcher starts")
+            self.lanes[lane] = Lane(lane, self.max_queue, blocking, consumers)
+        self.routes[request_type] = Route(request_type, handler, self.lanes[lane], self.window)
+
+    def register_agent(self, agent, request_types=None, blocking=True, consumers=1):
+        """Register an agent's HANDLERS table in one lane named after the agent, so its handlers run one at a time"""
+        for request_type in agent.HANDLERS if request_types is None else request_types:
+            self.register(request_type, agent.handler(request_type), agent.name, blocking, consumers)
+
+    def request_type(self, message):
+        """The first registered request type present in message, None if there is none"""
+        return request_type_of(message, self.routes)
+
+    async def start(self):
+        if self.running:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        for lane in self.lanes.values():
+            lane.queue = asyncio.Queue(lane.max_queue)
+            lane.tasks = [asyncio.create_task(self._consume(lane)) for _ in range(lane.consumers)]
+        self.running = True
+
+    async def close(self):
+        """Finish every queued message, then stop the consumers"""
+        if not self.running:
+            return
+        for lane in self.lanes.values():
+            await lane.queue.join()
+            for task in lane.tasks:
+                task.cancel()
+            await asyncio.gather(*lane.tasks, return_exceptions=True)
+        self.running = False
+        if self.own_executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def submit(self, message):
+        """Queue message, waiting while its lane is full, and return a future of its result"""
+        if not self.running:
+            await self.start()
+        request_type = self.request_type(message)
+        if request_type is None:
+            raise ValueError("Unknown request type")
+        route = self.routes[request_type]
+        future = asyncio.get_running_loop().create_future()
+        await route.lane.queue.put((route, message, future, time.perf_counter()))
+        return future
+
+    async def request(self, message):
+        """Result of message, raising what its handler raised"""
+        return await (await self.submit(message))
+
+    async def _consume(self, lane):
+        loop = asyncio.get_running_loop()
+        queue = lane.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            started = time.perf_counter()
+            calls = [(route.handler, message) for route, message, _, _ in batch]
+            try:
+                if lane.blocking:
+                    results = await loop.run_in_executor(self.executor, run_batch, calls)
+                else:
+                    results = run_batch(calls)
+            except Exception as e: # the executor itself failed, e.g. an unpicklable handler
+                results = [(False, e)] * len(batch)
+            finished = time.perf_counter()
+            for (route, _, future, submitted), (ok, value) in zip(batch, results):
+                route.count += 1
+                route.waits.append(started - submitted)
+                route.latencies.append(finished - submitted)
+                if not ok:
+                    route.errors += 1
+                if not future.done():
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                queue.task_done()
+
+    def stats(self):
+        """{request type: count, errors, queued and recent latency percentiles in milliseconds}"""
+        stats = {}
+        for request_type, route in self.routes.items():
+            latencies = list(route.latencies)
+            waits = list(route.waits)
+            stats[request_type] = {
+                "count": route.count,
+                "errors": route.errors,
+                "queued": route.lane.queue.qsize() if route.lane.queue is not None else 0,
+                "p50_ms": None if not latencies else percentile(latencies, 0.5) * 1000,
+                "p99_ms": None if not latencies else percentile(latencies, 0.99) * 1000,
+                "mean_wait_ms": None if not waits else sum(waits) / len(waits) * 1000,
+            }
+        return stats
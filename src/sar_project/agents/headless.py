@@ -0,0 +1,75 @@
+from functools import partial
+
+
+def call_handler(method, keys, message):
+    return method(*[message[key] for key in keys])
+
+
+def request_type_of(message, table):
+    #the first request type of table (a HANDLERS table or Dispatcher.routes) present in message, None if there
+    #is none. Table order decides, so an agent and a dispatcher registered from it agree on mixed messages
+    for request_type in table:
+        if request_type in message:
+            return request_type
+    return None
+
+
+class HeadlessAgent():
+    #The deterministic part of a SAR agent: name, role, knowledge base and status, without building the
+    #autogen AssistantAgent. attach_llm turns the object into the full agent in place when chat is needed
+    HANDLERS = {} # request type -> (method name, message keys passed to it in order), checked in this order
+
+    def __init__(self, name, role, knowledge_base=None):
+        self._name = name # same attribute autogen keeps the name in, so name reads the same once attached
+        self.role = role
+        self.kb = knowledge_base
+        self.mission_status = "standby"
+
+    @property
+    def name(self):
+        return self._name
+
+    @staticmethod
+    def _agent_class():
+        #the SARBaseAgent subclass attach_llm upgrades to, imported lazily by the subclasses
+        raise NotImplementedError
+
+    def attach_llm(self):
+        """Build the conversational agent around this object's current state and return it (self)"""
+        agent_class = self._agent_class()
+        if isinstance(self, agent_class):
+            return self
+        from .base_agent import SARBaseAgent
+        state = dict(self.__dict__)
+        self.__class__ = agent_class
+        SARBaseAgent.__init__(self, self._name, self.role, agent_class.SYSTEM_MESSAGE, self.kb)
+        self.__dict__.update(state) # keep the simulation state and status, not the defaults __init__ set
+        return self
+
+    def request_type(self, message):
+        """The first HANDLERS request type present in message, None if there is none"""
+        return request_type_of(message, self.HANDLERS)
+
+    def handler(self, request_type):
+        """Callable answering a message of request_type, raising instead of returning an error dict"""
+        method, keys = self.HANDLERS[request_type]
+        return partial(call_handler, getattr(self, method), keys)
+
+    def process_request(self, message):
+        """Process a request through the HANDLERS table"""
+        try:
+            request_type = self.request_type(message)
+            if request_type is None:
+                return {"error": "Unknown request type"}
+            return self.handler(request_type)(message)
+        except Exception as e:
+            return {"error": str(e)}
+
+    def update_status(self, status):
+        """Update the agent's status"""
+        self.status = status
+        return {"status": "updated", "new_status": status}
+
+    def get_status(self):
+        """Get the agent's current status"""
+        return getattr(self, "status", "unknown")
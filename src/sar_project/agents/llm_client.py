@@ -0,0 +1,307 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import urllib.request
+
+MESSAGE_FIELDS = ("role", "content", "name", "function_call")
+
+
+def llm_request(messages, llm_config):
+    """The part of a chat completion call that decides its answer: model, messages, temperature and seed"""
+    model = llm_config.get("model")
+    if model is None and llm_config.get("config_list"):
+        model = llm_config["config_list"][0].get("model")
+    return {
+        "model": model,
+        "messages": [{field: message[field] for field in MESSAGE_FIELDS if field in message} for message in messages],
+        "temperature": llm_config.get("temperature"),
+        "seed": llm_config.get("seed"),
+    }
+
+
+def request_key(request):
+    """Content address of a request, the sha256 of its canonical JSON"""
+    text = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk LLM responses addressed by request_key, evicting least recently used past max_bytes.
+
+    Each response is one JSON file under path/<key[:2]>/, written to a
+    temporary file and renamed so readers never see half of one. Use order
+    survives restarts through file modification times, which a hit refreshes.
+    Several processes may share a directory; each keeps its own size
+    accounting, so the bound is per process.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index = OrderedDict() # key -> file size, least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+        files = []
+        for folder in os.listdir(self.path):
+            directory = os.path.join(self.path, folder)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(directory, name))
+                    files.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(files):
+            self.index[key] = size
+            self.size += size
+
+    def __len__(self):
+        return len(self.index)
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key):
+        """The cached response for key, or None"""
+        with self.lock:
+            if key not in self.index:
+                self.misses += 1
+                return None
+            try:
+                with open(self._file(key)) as f:
+                    value = json.load(f)["response"]
+                os.utime(self._file(key))
+            except (OSError, ValueError, KeyError):
+                #removed or damaged behind our back
+                self.size -= self.index.pop(key)
+                self.misses += 1
+                return None
+            self.index.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a JSON serialisable response under key"""
+        data = json.dumps({"response": value}).encode("utf-8")
+        directory = os.path.dirname(self._file(key))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._file(key))
+        with self.lock:
+            self.size += len(data) - self.index.pop(key, 0)
+            self.index[key] = len(data)
+            while self.size > self.max_bytes and len(self.index) > 1:
+                old, size = self.index.popitem(last=False)
+                self.size -= size
+                try:
+                    os.remove(self._file(old))
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self.lock:
+            for key in self.index:
+                try:
+                    os.remove(self._file(key))
+                except OSError:
+                    pass
+            self.index.clear()
+            self.size = 0
+
+
+class ModelClient:
+    """Answers llm_request dicts, subclasses call a model"""
+
+    supports_batch = False # True when complete_batch sends several requests in one upstream call
+
+    def complete(self, request):
+        """Reply (str, or dict for a function call) to one request"""
+        raise NotImplementedError
+
+    def complete_batch(self, requests):
+        """Replies to several requests, in order"""
+        return [self.complete(request) for request in requests]
+
+
+class AutogenModelClient(ModelClient):
+    """The upstream autogen itself would call, through oai.ChatCompletion with an agent's llm_config"""
+
+    def __init__(self, llm_config):
+        self.llm_config = {key: value for key, value in llm_config.items() if key not in ("model", "temperature", "seed")}
+
+    def complete(self, request):
+        from autogen import oai
+        config = dict(self.llm_config, temperature=request["temperature"], seed=request["seed"])
+        if request["model"] is not None:
+            config["model"] = request["model"]
+        response = oai.ChatCompletion.create(messages=request["messages"], **config)
+        return oai.ChatCompletion.extract_text_or_function_call(response)[0]
+
+
+class HTTPModelClient(ModelClient):
+    """OpenAI compatible chat completions endpoint, e.g. a local model server.
+
+    With batch_path set, complete_batch posts {"requests": [...]} there and
+    expects {"responses": [...]} of chat completion bodies back, one upstream
+    call for the whole batch.
+    """
+
+    def __init__(self, base_url, api_key=None, timeout=600, batch_path=None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.batch_path = batch_path
+        self.supports_batch = batch_path is not None
+
+    def _post(self, path, body):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = "Bearer " + self.api_key
+        request = urllib.request.Request(self.base_url + path, json.dumps(body).encode("utf-8"), headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    @staticmethod
+    def _reply(body):
+        message = body["choices"][0]["message"]
+        return message.get("content") if message.get("function_call") is None else message["function_call"]
+
+    def complete(self, request):
+        body = {key: value for key, value in request.items() if value is not None}
+        return self._reply(self._post("/chat/completions", body))
+
+    def complete_batch(self, requests):
+        if not self.supports_batch:
+            return ModelClient.complete_batch(self, requests)
+        bodies = [{key: value for key, value in request.items() if value is not None} for request in requests]
+        return [self._reply(body) for body in self._post(self.batch_path, {"requests": bodies})["responses"]]
+
+
+class CachedModelClient(ModelClient):
+    """Serves requests from a ResponseCache and only sends the misses to client"""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+        self.supports_batch = client.supports_batch
+
+    def complete(self, request):
+        return self.complete_batch([request])[0]
+
+    def complete_batch(self, requests):
+        keys = [request_key(request) for request in requests]
+        replies = [self.cache.get(key) for key in keys]
+        missing = [i for i, reply in enumerate(replies) if reply is None]
+        if missing:
+            fetched = self.client.complete_batch([requests[i] for i in missing])
+            for i, reply in zip(missing, fetched):
+                self.cache.put(keys[i], reply)
+                replies[i] = reply
+        return replies
+
+
+class BatchingClient(ModelClient):
+    """Groups requests from many threads (and agents) into fewer upstream calls.
+
+    Requests arriving within max_wait seconds of each other are collected,
+    up to max_batch, and identical ones are merged so each is asked once.
+    A client that supports_batch gets the whole group in one call, any other
+    gets one call per distinct request. At most max_concurrency upstream
+    calls are in flight at once, the rest wait their turn.
+    """
+
+    def __init__(self, client, max_batch=16, max_wait=0.01, max_concurrency=4):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self.queue = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.lock = threading.Lock()
+        self.collector = None
+        self.closed = False
+        self.upstream_calls = 0
+        self.requests = 0
+
+    def submit(self, request):
+        """Future of the reply to request, raises RuntimeError once the client is closed"""
+        future = Future()
+        with self.lock: #queued under the lock so nothing lands behind the stop marker close() puts
+            if self.closed:
+                raise RuntimeError("BatchingClient is closed")
+            self.requests += 1
+            if self.collector is None:
+                self.collector = threading.Thread(target=self._collect, daemon=True)
+                self.collector.start()
+            self.queue.put((request, future))
+        return future
+
+    def complete(self, request):
+        return self.submit(request).result()
+
+    def complete_batch(self, requests):
+        return [future.result() for future in [self.submit(request) for request in requests]]
+
+    def _collect(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None) #finish this batch, stop on the next loop
+                    break
+                batch.append(item)
+            groups = {} # request_key -> (request, [futures])
+            for request, future in batch:
+                groups.setdefault(request_key(request), (request, []))[1].append(future)
+            groups = list(groups.values())
+            if self.client.supports_batch:
+                self.pool.submit(self._send, groups)
+            else:
+                for group in groups:
+                    self.pool.submit(self._send, [group])
+
+    def _send(self, groups):
+        with self.lock:
+            self.upstream_calls += 1
+        try:
+            replies = self.client.complete_batch([request for request, _ in groups])
+        except BaseException as e:
+            for _, futures in groups:
+                for future in futures:
+                    future.set_exception(e)
+            return
+        for (_, futures), reply in zip(groups, replies):
+            for future in futures:
+                future.set_result(reply)
+
+    def close(self):
+        """Stop collecting and wait for calls in flight, later requests raise RuntimeError"""
+        with self.lock:
+            self.closed = True
+            collector, self.collector = self.collector, None
+            if collector is not None:
+                self.queue.put(None)
+        if collector is not None:
+            collector.join()
+        self.pool.shutdown(wait=True)
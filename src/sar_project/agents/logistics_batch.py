@@ -0,0 +1,167 @@
+from array import array
+import math
+import numpy as np
+from .logistics_routing import CSRAdjacency, INF, dijkstra, path_to
+
+
+class Scenario():
+    """A what-if delta applied on top of a base LogisticsGraph.
+
+    edge_weights maps (node, other) to a new weight for an existing edge
+    (INF closes the road), removed_nodes are dropped from routing and
+    extra_requires is {mission: {good: amt}} added on top of Mission.requires.
+    """
+
+    def __init__(self, name=None, edge_weights=None, removed_nodes=None, extra_requires=None):
+        self.name = name
+        self.edge_weights = edge_weights or {}
+        self.removed_nodes = set(removed_nodes or ())
+        self.extra_requires = extra_requires or {}
+
+
+class BatchResult():
+    """Per-scenario metrics from a BatchSimulation run.
+
+    requests lists the (mission, good) pair behind every column. Arrays are
+    indexed [scenario, request] or [scenario, tick]; latency is the route
+    length in ticks and -1 where the scenario leaves the mission unreachable.
+    """
+
+    def __init__(self, scenarios, requests, latency, delivered, first_delivery, unmet_demand):
+        self.scenarios = scenarios
+        self.requests = requests
+        self.latency = latency
+        self.delivered = delivered
+        self.first_delivery = first_delivery
+        self.unmet_demand = unmet_demand
+
+    def mean_latency(self):
+        """Average route latency of the reachable requests in each scenario"""
+        reachable = self.latency >= 0
+        total = np.where(reachable, self.latency, 0).sum(axis=1)
+        count = reachable.sum(axis=1)
+        return np.divide(total, count, out=np.full(len(self.scenarios), np.nan), where=count > 0)
+
+    def total_unmet(self):
+        """Demand still undelivered at the end of the run, per scenario"""
+        return self.unmet_demand[:, -1]
+
+
+class BatchSimulation():
+    """Runs many Scenarios over one LogisticsGraph in lockstep with NumPy.
+
+    Mirrors LogisticsAgent.run_time_tick with the default shortest path
+    allocation: every tick each open request ships a batch from its nearest
+    supplier along the shortest route, and the batch lands after the sum of
+    its (whole tick) legs. Like that allocation, suppliers never run out and
+    hub stock is not modelled; the per scenario state is only remaining
+    demand, deliveries and the arrivals in flight. Routing is done once per
+    distinct topology, not once per scenario or per tick.
+    """
+
+    def __init__(self, graph, scenarios, batch_size=10):
+        self.graph = graph
+        self.scenarios = list(scenarios)
+        self.batch_size = batch_size
+
+    def _requests(self):
+        requests = {}
+        for mission in self.graph.get_missions():
+            for good in mission.get_required_goods():
+                requests[(mission, good)] = None
+        for scenario in self.scenarios:
+            for mission in scenario.extra_requires:
+                for good in scenario.extra_requires[mission]:
+                    requests[(mission, good)] = None
+        return list(requests)
+
+    def _demand(self, requests):
+        demand = np.zeros((len(self.scenarios), len(requests)))
+        for r, (mission, good) in enumerate(requests):
+            demand[:, r] = mission.get_required_goods().get(good, 0)
+        for s, scenario in enumerate(self.scenarios):
+            for r, (mission, good) in enumerate(requests):
+                demand[s, r] += scenario.extra_requires.get(mission, {}).get(good, 0)
+                if mission in scenario.removed_nodes:
+                    demand[s, r] = 0
+        return demand
+
+    def _scenario_adjacency(self, base, scenario):
+        if not scenario.edge_weights and not scenario.removed_nodes:
+            return base
+        graph = self.graph
+        weights = np.frombuffer(base.weights, dtype=np.float64).copy()
+        for (node, other), weight in scenario.edge_weights.items():
+            k = base.find(graph.get_node_id(node), graph.get_node_id(other))
+            if k < 0:
+                raise ValueError("scenario " + str(scenario.name) + " overrides a missing edge " + node.get_name() + " -> " + other.get_name())
+            weights[k] = weight
+        if scenario.removed_nodes:
+            offsets = np.frombuffer(base.offsets, dtype=np.int64)
+            targets = np.frombuffer(base.targets, dtype=np.int64)
+            removed = np.array([graph.get_node_id(node) for node in scenario.removed_nodes], dtype=np.int64)
+            weights[np.isin(targets, removed)] = INF
+            for i in removed:
+                weights[offsets[i]:offsets[i + 1]] = INF
+        return CSRAdjacency(base.offsets, base.targets, array("d", weights.tobytes()))
+
+    def _latencies(self, requests):
+        #route latency per (scenario, request), one dijkstra per good per distinct topology
+        graph = self.graph
+        base = graph.get_adjacency()
+        latency = np.full((len(self.scenarios), len(requests)), -1, dtype=np.int64)
+        by_topology = {}
+        for s, scenario in enumerate(self.scenarios):
+            key = (frozenset(scenario.edge_weights.items()), frozenset(scenario.removed_nodes))
+            by_topology.setdefault(key, []).append(s)
+        for members in by_topology.values():
+            scenario = self.scenarios[members[0]]
+            adjacency = self._scenario_adjacency(base, scenario)
+            trees = {}
+            for r, (mission, good) in enumerate(requests):
+                if good not in trees:
+                    sources = [graph.get_node_id(supplier) for supplier in graph.suppliers_of(good)
+                               if supplier not in scenario.removed_nodes]
+                    trees[good] = dijkstra(adjacency, sources)
+                dist, prev = trees[good]
+                target = graph.get_node_id(mission)
+                if dist[target] == INF:
+                    continue
+                path = path_to(prev, target)
+                ticks = 0
+                for i, j in zip(path, path[1:]):
+                    ticks += math.ceil(adjacency.weights[adjacency.find(i, j)])
+                latency[members, r] = ticks
+        return latency
+
+    def _land(self, arrived, delivered, first_delivery, tick):
+        if arrived.any():
+            delivered += arrived
+            first_delivery[(first_delivery < 0) & (arrived > 0)] = tick
+            arrived[:] = 0
+
+    def run(self, ticks):
+        """Advance every scenario ticks steps, returns a BatchResult"""
+        requests = self._requests()
+        n_scenarios, n_requests = len(self.scenarios), len(requests)
+        latency = self._latencies(requests)
+        demand = self._demand(requests)
+        remaining = demand.copy()
+        reachable = latency >= 0
+        horizon = int(latency.max(initial=0)) + 1
+        in_flight = np.zeros((horizon, n_scenarios, n_requests)) # ring buffer of arrivals by tick
+        delivered = np.zeros((n_scenarios, n_requests))
+        first_delivery = np.full((n_scenarios, n_requests), -1, dtype=np.int64)
+        unmet_demand = np.zeros((n_scenarios, ticks))
+        slot_offsets = np.where(reachable, latency, 0)
+        scenario_index, request_index = np.indices((n_scenarios, n_requests))
+        for tick in range(ticks):
+            slot = tick % horizon
+            self._land(in_flight[slot], delivered, first_delivery, tick)
+            shipping = np.where(reachable & (remaining > 0), float(self.batch_size), 0.0)
+            remaining = np.maximum(remaining - shipping, 0)
+            #every (scenario, request) cell ships at most once per tick so plain fancy indexing can't collide
+            in_flight[(tick + slot_offsets) % horizon, scenario_index, request_index] += shipping
+            self._land(in_flight[slot], delivered, first_delivery, tick) #zero length routes land straight away
+            unmet_demand[:, tick] = np.maximum(demand - delivered, 0).sum(axis=1) #over delivering one good doesn't cover another
+        return BatchResult(self.scenarios, requests, latency, delivered, first_delivery, unmet_demand)
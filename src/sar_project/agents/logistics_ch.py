@@ -0,0 +1,256 @@
+from array import array
+import hashlib
+import heapq
+import json
+import struct
+from .logistics_routing import INF
+
+MAGIC = b"SARCH1\n"
+
+
+def fingerprint(adjacency):
+    """Digest of the live edges of a CSRAdjacency, used to tell if an index still matches a graph"""
+    digest = hashlib.sha1()
+    digest.update(struct.pack("<q", len(adjacency)))
+    for i in range(len(adjacency)):
+        for j, weight in adjacency.neighbours(i):
+            digest.update(struct.pack("<qqd", i, j, weight))
+    return digest.hexdigest()
+
+
+class ContractionHierarchy():
+    """Contraction hierarchy over a CSRAdjacency for fast point to point queries.
+
+    build() contracts nodes in edge-difference order, adding a shortcut
+    whenever a bounded witness search can't find a path that avoids the
+    contracted node. Queries are two upward dijkstras (forward from the
+    sources, backward from the target) meeting at the top, and shortcuts are
+    unpacked back into original node ids. The index only knows the
+    topology it was built from; callers check is_current() before trusting it.
+    """
+
+    def __init__(self, n=0):
+        self.n = n
+        self.rank = array("q")
+        self.up = [] # node -> [(higher ranked node, weight)] for the forward search
+        self.down = [] # node -> [(higher ranked node, weight)] over reversed edges for the backward search
+        self.middle = {} # (u, w) -> contracted node a shortcut skips, absent for original edges
+        self.fingerprint = None
+        self.graph_key = None # (graph_id, topology_version) the index was last checked against
+
+    @classmethod
+    def build(cls, adjacency, witness_limit=60):
+        """Contract every node of adjacency, returns the finished hierarchy"""
+        n = len(adjacency)
+        ch = cls(n)
+        out = [dict() for _ in range(n)]
+        inn = [dict() for _ in range(n)]
+        for i in range(n):
+            for j, weight in adjacency.neighbours(i):
+                if i != j and weight < out[i].get(j, INF):
+                    out[i][j] = weight
+                    inn[j][i] = weight
+        edges = {(i, j): out[i][j] for i in range(n) for j in out[i]}
+        contracted = [False] * n
+        depth = [0] * n # contracted neighbours, spreads contraction evenly
+
+        def shortcuts(v):
+            needed = []
+            for u, w_in in inn[v].items():
+                if contracted[u]:
+                    continue
+                targets = {w: w_in + w_out for w, w_out in out[v].items() if not contracted[w] and w != u}
+                if not targets:
+                    continue
+                witness = ch._witness(out, contracted, u, v, max(targets.values()), witness_limit)
+                for w, via in targets.items():
+                    if witness.get(w, INF) > via:
+                        needed.append((u, w, via))
+            return needed
+
+        def priority(v):
+            degree = sum(1 for u in inn[v] if not contracted[u]) + sum(1 for w in out[v] if not contracted[w])
+            return len(shortcuts(v)) - degree + depth[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = [0] * n
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v)) #lazy update, something else is cheaper now
+                continue
+            for u, w, via in shortcuts(v):
+                if via < out[u].get(w, INF):
+                    out[u][w] = via
+                    inn[w][u] = via
+                    edges[(u, w)] = via
+                    ch.middle[(u, w)] = v
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for neighbour in list(inn[v]) + list(out[v]):
+                depth[neighbour] = max(depth[neighbour], depth[v] + 1)
+        ch.rank = array("q", rank)
+        ch._index(edges)
+        ch.fingerprint = fingerprint(adjacency)
+        return ch
+
+    def _witness(self, out, contracted, source, skip, limit, settle_limit):
+        #bounded dijkstra from source that never passes through skip
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        while heap and settled < settle_limit:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            settled += 1
+            for w, weight in out[u].items():
+                if w == skip or contracted[w]:
+                    continue
+                newDist = d + weight
+                if newDist < dist.get(w, INF):
+                    dist[w] = newDist
+                    heapq.heappush(heap, (newDist, w))
+        return dist
+
+    def _index(self, edges):
+        self.up = [[] for _ in range(self.n)]
+        self.down = [[] for _ in range(self.n)]
+        for (u, w), weight in edges.items():
+            if self.rank[w] > self.rank[u]:
+                self.up[u].append((w, weight))
+            else:
+                self.down[w].append((u, weight))
+
+    def _upward(self, graph, seeds):
+        dist = {}
+        prev = {}
+        heap = []
+        for seed in seeds:
+            dist[seed] = 0.0
+            prev[seed] = -1
+            heap.append((0.0, seed))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for w, weight in graph[u]:
+                newDist = d + weight
+                if newDist < dist.get(w, INF):
+                    dist[w] = newDist
+                    prev[w] = u
+                    heapq.heappush(heap, (newDist, w))
+        return dist, prev
+
+    def backward(self, target):
+        """Backward upward search space of target, reusable across queries to it"""
+        return self._upward(self.down, [target])
+
+    def query(self, sources, target, backward=None):
+        """(distance, node id path) from the closest of the sources to target, (INF, None) if unreachable"""
+        forward_dist, forward_prev = self._upward(self.up, sources)
+        backward_dist, backward_prev = backward or self.backward(target)
+        best = INF
+        meet = -1
+        for node, d in forward_dist.items():
+            total = d + backward_dist.get(node, INF)
+            if total < best:
+                best = total
+                meet = node
+        if meet == -1:
+            return INF, None
+        path = []
+        node = meet
+        while node != -1:
+            path.append(node)
+            node = forward_prev[node]
+        path.reverse()
+        node = backward_prev[meet]
+        while node != -1:
+            path.append(node)
+            node = backward_prev[node]
+        return best, self._unpack(path)
+
+    def _unpack(self, path):
+        full = [path[0]]
+        stack = []
+        for u, w in zip(path, path[1:]):
+            stack.append((u, w))
+            while stack:
+                a, b = stack.pop()
+                v = self.middle.get((a, b))
+                if v is None:
+                    full.append(b)
+                else:
+                    stack.append((v, b))
+                    stack.append((a, v))
+        return full
+
+    def is_current(self, graph):
+        return self.graph_key == (graph.graph_id, graph.topology_version)
+
+    def attach(self, graph):
+        """Mark the index current for graph if it was built from the same edges, returns whether it matched"""
+        if self.fingerprint is not None and self.fingerprint == fingerprint(graph.get_adjacency()):
+            self.graph_key = (graph.graph_id, graph.topology_version)
+            return True
+        self.graph_key = None
+        return False
+
+    def save(self, path):
+        """Write the hierarchy as a small JSON header followed by flat little endian arrays"""
+        sources, targets, middles, weights = array("q"), array("q"), array("q"), array("d")
+        for u in range(self.n):
+            for w, weight in self.up[u]:
+                sources.append(u)
+                targets.append(w)
+                weights.append(weight)
+                middles.append(self.middle.get((u, w), -1))
+        for w in range(self.n):
+            for u, weight in self.down[w]:
+                sources.append(u)
+                targets.append(w)
+                weights.append(weight)
+                middles.append(self.middle.get((u, w), -1))
+        header = json.dumps({"n": self.n, "edges": len(sources), "fingerprint": self.fingerprint}).encode()
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<q", len(header)))
+            f.write(header)
+            for column in (self.rank, sources, targets, middles, weights):
+                f.write(column.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a hierarchy written by save(), attach() it to a graph before querying"""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(str(path) + " is not a contraction hierarchy file")
+            size, = struct.unpack("<q", f.read(8))
+            header = json.loads(f.read(size))
+            n, count = header["n"], header["edges"]
+            columns = []
+            for typecode, length in (("q", n), ("q", count), ("q", count), ("q", count), ("d", count)):
+                column = array(typecode)
+                column.frombytes(f.read(length * column.itemsize))
+                columns.append(column)
+        rank, sources, targets, middles, weights = columns
+        ch = cls(n)
+        ch.rank = rank
+        ch.fingerprint = header["fingerprint"]
+        edges = {}
+        for u, w, v, weight in zip(sources, targets, middles, weights):
+            edges[(u, w)] = weight
+            if v != -1:
+                ch.middle[(u, w)] = v
+        ch._index(edges)
+        return ch
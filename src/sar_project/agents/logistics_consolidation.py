@@ -0,0 +1,37 @@
+def consolidate(dispatches, capacity):
+    """Pack (good, qty, path) dispatches into vehicle loads.
+
+    Dispatches leaving the same node over the same first edge can share a
+    vehicle. Each load is a list of (good, qty, path) parcels of at most
+    capacity units in total, a dispatch larger than the room left is split
+    over several vehicles. Parcels with the same path are packed next to
+    each other so vehicles stay together as far as possible before they
+    split up at a hub. Returns the loads in dispatch order of their first edge.
+    """
+    if capacity <= 0:
+        raise ValueError("vehicle capacity must be positive")
+    corridors = {} # (source, first hop) -> {(good, path nodes): [good, qty, path]}
+    for good, qty, path in dispatches:
+        if qty <= 0:
+            continue
+        parcels = corridors.setdefault((path[0], path[1]), {})
+        key = (good, tuple(map(id, path)))
+        if key in parcels:
+            parcels[key][1] += qty
+        else:
+            parcels[key] = [good, qty, path]
+    loads = []
+    for parcels in corridors.values():
+        load, room = [], capacity
+        for good, qty, path in sorted(parcels.values(), key=lambda parcel: [node.get_name() for node in parcel[2]]):
+            while qty > 0:
+                take = min(qty, room)
+                load.append((good, take, path))
+                qty -= take
+                room -= take
+                if room == 0:
+                    loads.append(load)
+                    load, room = [], capacity
+        if load:
+            loads.append(load)
+    return loads
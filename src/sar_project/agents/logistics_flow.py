@@ -0,0 +1,163 @@
+import heapq
+from .logistics_routing import INF
+
+EPS = 1e-9
+
+
+class MinCostFlow():
+    """Successive shortest path min cost flow with Johnson potentials.
+
+    Edges are stored in flat lists; edge e and its residual twin e ^ 1 are
+    added together, so the flow on a forward edge is the capacity left on
+    its twin.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.edges = [[] for _ in range(n)] # node -> edge ids leaving it
+        self.to = []
+        self.cap = []
+        self.cost = []
+
+    def add_edge(self, u, v, cap, cost):
+        """Add u -> v and return its edge id"""
+        e = len(self.to)
+        self.edges[u].append(e)
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+        self.edges[v].append(e + 1)
+        self.to.append(u)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return e
+
+    def flow(self, e):
+        return self.cap[e ^ 1]
+
+    def solve(self, s, t, max_flow=INF):
+        """Push up to max_flow from s to t at minimum cost, returns (flow, cost)"""
+        n, to, cap, cost, edges = self.n, self.to, self.cap, self.cost, self.edges
+        potential = [0.0] * n # costs start non negative so zero potentials are valid
+        flow = 0
+        total_cost = 0.0
+        while flow < max_flow:
+            dist = [INF] * n
+            prev_edge = [-1] * n
+            dist[s] = 0.0
+            heap = [(0.0, s)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for e in edges[u]:
+                    if cap[e] <= 0:
+                        continue
+                    v = to[e]
+                    newDist = d + cost[e] + potential[u] - potential[v]
+                    if newDist < dist[v] - EPS:
+                        dist[v] = newDist
+                        prev_edge[v] = e
+                        heapq.heappush(heap, (newDist, v))
+            if dist[t] == INF:
+                break
+            for v in range(n):
+                if dist[v] < INF:
+                    potential[v] += dist[v]
+            push = max_flow - flow
+            v = t
+            while v != s:
+                e = prev_edge[v]
+                push = min(push, cap[e])
+                v = to[e ^ 1]
+            v = t
+            while v != s:
+                e = prev_edge[v]
+                cap[e] -= push
+                cap[e ^ 1] += push
+                total_cost += push * cost[e]
+                v = to[e ^ 1]
+            flow += push
+        return flow, total_cost
+
+    def decompose(self, s, t):
+        """Split the current flow into (qty, [node, ...]) paths from s to t"""
+        left = {}
+        for u in range(self.n):
+            for e in self.edges[u]:
+                if e % 2 == 0 and self.flow(e) > 0:
+                    left[e] = self.flow(e)
+        out = [[e for e in self.edges[u] if e in left] for u in range(self.n)]
+        paths = []
+        while True:
+            walk = [s]
+            used = []
+            seen = {s: 0}
+            u = s
+            while u != t:
+                live = [e for e in out[u] if left.get(e, 0) > 0]
+                if not live:
+                    break
+                e = live[0]
+                u = self.to[e]
+                if u in seen: #zero cost cycle, cancel it and carry on from where it closed
+                    start = seen[u]
+                    cycle = used[start:] + [e]
+                    qty = min(left[c] for c in cycle)
+                    for c in cycle:
+                        left[c] -= qty
+                    for node in walk[start + 1:]:
+                        del seen[node]
+                    del walk[start + 1:]
+                    del used[start:]
+                    continue
+                seen[u] = len(walk)
+                walk.append(u)
+                used.append(e)
+            if u != t:
+                return paths
+            qty = min(left[e] for e in used)
+            for e in used:
+                left[e] -= qty
+            paths.append((qty, walk))
+
+
+def plan_min_cost_flow(graph):
+    """Dispatch plan of (good, qty, path) covering Mission.requires from stock.
+
+    Suppliers can ship any amount, hubs only what Hub.has holds. Goods don't
+    share any capacity so each good is one independent min cost flow over the
+    graph's CSR edges, which gives the same plan as a single multi-commodity
+    solve. Paths run from a supplier or hub to the mission and never ship
+    more stock than exists or more than a mission asked for.
+    """
+    adjacency = graph.get_adjacency()
+    n = len(adjacency)
+    source, sink = n, n + 1
+    demand = {}
+    for mission in graph.get_missions():
+        for good, amt in mission.get_required_goods().items():
+            if amt > 0:
+                demand.setdefault(good, []).append((mission, amt))
+    plan = []
+    for good in demand:
+        total = sum(amt for _, amt in demand[good])
+        flow = MinCostFlow(n + 2)
+        stocked = False
+        for supplier in graph.suppliers_of(good):
+            flow.add_edge(source, graph.get_node_id(supplier), total, 0)
+            stocked = True
+        for hub in graph.hubs_with(good):
+            flow.add_edge(source, graph.get_node_id(hub), hub.get_goods()[good], 0)
+            stocked = True
+        if not stocked:
+            continue
+        for i in range(n):
+            for j, weight in adjacency.neighbours(i):
+                flow.add_edge(i, j, total, weight)
+        for mission, amt in demand[good]:
+            flow.add_edge(graph.get_node_id(mission), sink, amt, 0)
+        flow.solve(source, sink, total)
+        for qty, walk in flow.decompose(source, sink):
+            plan.append((good, qty, [graph.get_node(i) for i in walk[1:-1]]))
+    return plan
@@ -0,0 +1,795 @@
+from .logistics_io import number, read_chunks
+from .logistics_routing import CSRAdjacency, INF, Landmarks, bounded_dijkstra, dijkstra, repair_tree
+from collections import OrderedDict
+import heapq
+import itertools
+
+GRAPH_IDS = itertools.count() # LogisticsGraph.graph_id, never handed out twice in a process
+
+
+class Node():
+    def __init__(self, name, coords=None):
+        self.name = name
+        self.coords = coords # optional (x, y) or (lat, lon), only used to guide A*
+        self._connections = {} # connected to, weight
+        self._lazy_row = None # (rows, id) while the connections are still only in a restored snapshot, see Snapshot.restore
+        self._graphs = [] # graphs holding this node, told about edge changes so their indexes stay current
+
+    @property
+    def connections(self):
+        if self._lazy_row is not None:
+            rows, i = self._lazy_row
+            self._lazy_row = None
+            self._connections = rows.row(i)
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections):
+        self._lazy_row = None
+        self._connections = connections
+
+    def get_name(self):
+        return self.name
+
+    def get_coords(self):
+        return self.coords
+
+    def set_coords(self, coords):
+        self.coords = coords
+    
+    def get_connections(self):
+        return self.connections
+    
+    def update_connections(self, to_connect, weight):
+        old_weight = self.connections.get(to_connect, INF)
+        self.connections[to_connect] = weight
+        for graph in self._graphs:
+            graph._edge_changed(self, to_connect, old_weight)
+
+    def remove_connection(self, to_disconnect):
+        old_weight = self.connections.pop(to_disconnect)
+        for graph in self._graphs:
+            graph._edge_changed(self, to_disconnect, old_weight)
+
+
+class Supplier(Node):
+    def __init__(self, name, coords=None):
+        super().__init__(name, coords)
+        self.provides = []
+    
+    def get_provided_goods(self):
+        return self.provides
+
+    def add_provided_good(self, good): #goods are strings?
+        self.provides.append(good)
+        for graph in self._graphs:
+            graph._goods_changed(self, good)
+
+    def remove_provided_good(self, good):
+        self.provides.remove(good)
+        for graph in self._graphs:
+            graph._goods_changed(self, good)
+
+    def ship_good(self, good, amt): #Stub used for consistency
+        return amt
+
+class Mission(Node):
+    def __init__(self, name, coords=None):
+        super().__init__(name, coords)
+        self.requires = {} #key: good and value: amt
+        self.has = {}
+        self.consuptionRate = {} # maybe calculate consumption rate over steps
+
+    def get_curr_store(self):
+        return self.has
+
+    def add_required_good(self, good, amt): #goods are strings?
+        self.requires[good] = amt
+    
+    def remove_required_good(self, good): #just in case
+        del self.requires[good]
+
+    def get_required_goods(self):
+        return self.requires
+
+    def recieve_good(self, good, amount):
+        if good in self.has:
+            self.has[good] = self.has[good] + amount
+        else:
+            self.has[good] = amount
+
+    def recieve_good_transit(self, good, amount):
+        if good in self.requires:
+            currAmount = self.requires[good] - amount
+            if currAmount < 0:
+                del self.requires[good]
+            else:
+                self.requires[good] = currAmount
+            
+
+class Hub(Node):
+    def __init__(self, name, coords=None):
+        super().__init__(name, coords)
+        self.has = {}
+
+    def get_goods(self):
+        return self.has
+
+    def recieve_good(self, good, amount):
+        if good in self.has:
+            self.has[good] = self.has[good] + amount
+        else:
+            self.has[good] = amount
+        for graph in self._graphs:
+            graph._stock_changed(self, good)
+
+    def ship_good(self, good, amt):
+        amt = min(amt, self.has[good])
+        self.has[good] = self.has[good] - amt
+        for graph in self._graphs:
+            graph._stock_changed(self, good)
+        return amt
+        
+
+def shared_route(routes, leg):
+    #the longest start the routes have in common, they must agree up to route[leg] at least
+    route = routes[0]
+    shared = len(route)
+    for other in routes[1:]:
+        k = leg + 1
+        while k < shared and k < len(other) and other[k] is route[k]:
+            k += 1
+        shared = k
+    return route[:shared]
+
+
+class Shipment():
+    #One leg of a delivery in transit. Still reads and compares like the old (good, source, destination, qty, route,
+    #departure_time) tuple, while two shipments are only equal when they are the same vehicle.
+    #A consolidated shipment is one vehicle carrying several (good, qty, route) parcels: good is None,
+    #qty the total load and route the stretch all its parcels share, where it splits up
+    __slots__ = ("id", "good", "source", "destination", "qty", "route", "departure_time", "leg", "order", "parcels")
+
+    def __init__(self, shipment_id, good, source, destination, qty, route, departure_time, leg, parcels=None):
+        self.id = shipment_id
+        self.good = good
+        self.source = source
+        self.destination = destination
+        self.qty = qty
+        self.route = route
+        self.departure_time = departure_time
+        self.leg = leg # index of destination in route
+        self.order = None # arrival heap entry currently scheduled for this leg
+        self.parcels = parcels # None for a single good shipment, else [(good, qty, full route), ...]
+
+    def goods(self):
+        #{good: qty} on board
+        if self.parcels is None:
+            return {self.good: self.qty}
+        goods = {}
+        for good, qty, _ in self.parcels:
+            goods[good] = goods.get(good, 0) + qty
+        return goods
+
+    def as_tuple(self):
+        return (self.good, self.source, self.destination, self.qty, self.route, self.departure_time)
+
+    def get_final_destination(self):
+        return self.route[-1]
+
+    def final_destinations(self):
+        #where the goods on board end up, the end of every parcel's route for a consolidated shipment
+        if self.parcels is None:
+            return [self.route[-1]]
+        return list(dict.fromkeys(route[-1] for _, _, route in self.parcels))
+
+    def full_routes(self):
+        #the whole route of everything on board, the shipment's own or one per parcel
+        if self.parcels is None:
+            return [self.route]
+        return [route for _, _, route in self.parcels]
+
+    def __getitem__(self, index):
+        return self.as_tuple()[index]
+
+    def __len__(self):
+        return 6
+
+    def __iter__(self):
+        return iter(self.as_tuple())
+
+    def __eq__(self, other):
+        if isinstance(other, Shipment):
+            return self is other
+        if isinstance(other, tuple):
+            return self.as_tuple() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.id) #identity based, like equality between shipments
+
+    def __repr__(self):
+        return "Shipment" + repr((self.id,) + self.as_tuple())
+
+
+class TransitStore():
+    #Shipments by id (in dispatch order) with secondary indexes on final destination, good and current leg
+    def __init__(self):
+        self.by_id = {}
+        self.by_destination = {} # final destination node of any goods on board -> {id: shipment}
+        self.by_good = {} # good -> {id: shipment}
+        self.by_leg = {} # (source, destination) of the current leg -> {id: shipment}
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(list(self.by_id.values()))
+
+    def new_id(self):
+        shipment_id = self.next_id
+        self.next_id += 1
+        return shipment_id
+
+    def get(self, shipment_id):
+        return self.by_id.get(shipment_id)
+
+    def add(self, shipment):
+        self.by_id[shipment.id] = shipment
+        for destination in shipment.final_destinations():
+            self.by_destination.setdefault(destination, {})[shipment.id] = shipment
+        for good in shipment.goods():
+            self.by_good.setdefault(good, {})[shipment.id] = shipment
+        self.by_leg.setdefault((shipment.source, shipment.destination), {})[shipment.id] = shipment
+
+    def remove(self, shipment):
+        del self.by_id[shipment.id]
+        keys = [(self.by_leg, (shipment.source, shipment.destination))] + [(self.by_destination, node) for node in shipment.final_destinations()]
+        for index, key in keys + [(self.by_good, good) for good in shipment.goods()]:
+            self._unindex(index, key, shipment)
+
+    def _unindex(self, index, key, shipment):
+        bucket = index[key]
+        del bucket[shipment.id]
+        if not bucket:
+            del index[key]
+
+    def move_to_end(self, shipment, old_leg): #keeps the old append-on-every-leg ordering
+        #shipment has gone on from the (source, destination) old_leg to its current leg
+        del self.by_id[shipment.id]
+        self.by_id[shipment.id] = shipment
+        self._unindex(self.by_leg, old_leg, shipment)
+        self.by_leg.setdefault((shipment.source, shipment.destination), {})[shipment.id] = shipment
+
+    def find(self, transit):
+        #shipment matching a legacy transit tuple, or None. Looked up by its current leg, which every shipment is indexed under
+        transit = tuple(transit)
+        for shipment in self.by_leg.get((transit[1], transit[2]), {}).values():
+            if shipment.as_tuple() == transit:
+                return shipment
+        return None
+
+    def to(self, node):
+        return list(self.by_destination.get(node, {}).values())
+
+    def on_leg(self, source, destination):
+        return list(self.by_leg.get((source, destination), {}).values())
+
+    def of(self, good):
+        return list(self.by_good.get(good, {}).values())
+
+
+class LogisticsGraph():
+    def __init__(self):
+        self.suppliers = []
+        self.hubs = []
+        self.missions = []
+        self.goods_in_transit = TransitStore()
+        self.nodes = None # suppliers + hubs + missions, cached until the next add/remove
+        self.node_ids = {} # node -> stable integer id used by the CSR adjacency
+        self.nodes_by_id = [] # id -> node, None once the node is removed (ids are never reused)
+        self.csr = None # CSRAdjacency over node ids, rebuilt lazily after structural changes
+        self.graph_id = next(GRAPH_IDS) # unlike id(self) never reused, so (graph_id, topology_version) can't match a dead graph
+        self.version = 0 # bumped on every node, edge or supplier goods change
+        self.topology_version = 0 # the version at the last node or edge change
+        self.path_trees = OrderedDict() # sorted source ids -> (topology_version, dist, prev), least recently used first
+        self.max_path_trees = 256 # every cached tree is repaired on each edge change, so keep only the ones in use
+        self.landmarks = None # (topology_version, Landmarks) from build_landmarks
+        self.changed_routes = {} # tree key -> node ids whose distance moved since pop_stale_routes
+        self.suboptimal_shipments = {} # id -> shipment flagged since pop_suboptimal_shipments
+        self.suppliers_by_good = {} # good -> {supplier: None} of suppliers providing it
+        self.hubs_by_good = {} # good -> {hub: None} of hubs holding stock of it
+        self.arrivals = [] # heap of (arrival_time, order, shipment) for every scheduled leg
+        self.arrival_order = itertools.count() # tiebreak so the heap never compares shipments
+        self.base_weights = {} # (node, other) -> weight before set_edge_penalties scaled it
+
+    def get_nodes(self): #shared cached list, don't mutate it
+        if self.nodes is None:
+            self.nodes = self.suppliers + self.hubs + self.missions
+        return self.nodes
+
+    def get_node_id(self, node):
+        return self.node_ids[node]
+
+    def get_node(self, node_id):
+        return self.nodes_by_id[node_id]
+
+    def get_shortest_path_tree(self, sources):
+        #Cached (dist, prev) arrays by node id from the closest of the sources, only recomputed once the topology moves on
+        return self.get_shortest_path_trees([sources])[0]
+
+    def get_shortest_path_trees(self, source_sets, router=None):
+        #get_shortest_path_tree for several source sets, stale ones go through the ParallelRouter when given
+        keys = [tuple(sorted(self.node_ids[source] for source in sources)) for sources in source_sets]
+        missing = [key for key in dict.fromkeys(keys) if self._stale_tree(key)]
+        if missing:
+            adjacency = self.get_adjacency()
+            if router is not None and len(missing) > 1:
+                trees = router.trees(adjacency, (self.graph_id, self.topology_version), missing)
+            else:
+                trees = [dijkstra(adjacency, key) for key in missing]
+            for key, (dist, prev) in zip(missing, trees):
+                self.path_trees[key] = (self.topology_version, dist, prev)
+        for key in keys:
+            self.path_trees.move_to_end(key)
+        result = [self.path_trees[key][1:] for key in keys]
+        while len(self.path_trees) > self.max_path_trees:
+            self.path_trees.popitem(last=False)
+        return result
+
+    def _stale_tree(self, key):
+        cached = self.path_trees.get(key)
+        return cached is None or cached[0] != self.topology_version
+
+    def _topology_changed(self):
+        self.version += 1
+        self.topology_version = self.version
+
+    def _drop_stale_trees(self, version):
+        #trees older than version would only be recomputed, don't keep them around
+        for key in [key for key, tree in self.path_trees.items() if tree[0] != version]:
+            del self.path_trees[key]
+
+    def _goods_changed(self, supplier, good):
+        #goods only decide which sources a tree starts from, so the cached trees themselves stay valid
+        self.version += 1
+        if good in supplier.get_provided_goods():
+            self.suppliers_by_good.setdefault(good, {})[supplier] = None
+        else:
+            self._unindex(self.suppliers_by_good, good, supplier)
+
+    def _stock_changed(self, hub, good):
+        if hub.get_goods().get(good, 0) > 0:
+            self.hubs_by_good.setdefault(good, {})[hub] = None
+        else:
+            self._unindex(self.hubs_by_good, good, hub)
+
+    def _unindex(self, index, good, node):
+        holders = index.get(good)
+        if holders is not None and node in holders:
+            del holders[node]
+            if not holders:
+                del index[good]
+
+    def suppliers_of(self, good):
+        #suppliers providing good in graph order, from the inverted index instead of scanning every supplier
+        return sorted(self.suppliers_by_good.get(good, ()), key=self.node_ids.__getitem__)
+
+    def hubs_with(self, good):
+        #hubs currently holding some stock of good
+        return list(self.hubs_by_good.get(good, ()))
+
+    def sources_of(self, good):
+        return self.suppliers_of(good) + self.hubs_with(good)
+
+    def get_coords(self):
+        #node coordinates by id, None where a node has none
+        return [None if node is None else node.get_coords() for node in self.nodes_by_id]
+
+    def build_landmarks(self, count=8):
+        #ALT landmarks for A*, dropped as soon as the topology changes since a cheaper edge would make them overestimate
+        self.landmarks = (self.topology_version, Landmarks.build(self.get_adjacency(), count))
+        return self.landmarks[1]
+
+    def get_landmarks(self):
+        if self.landmarks is not None and self.landmarks[0] == self.topology_version:
+            return self.landmarks[1]
+        return None
+
+    def get_adjacency(self):
+        #Integer-indexed CSR view of every node's connections, only edges between nodes in this graph count
+        if self.csr is None:
+            node_ids = self.node_ids
+            rows = []
+            for node in self.nodes_by_id:
+                if node is None:
+                    rows.append(())
+                else:
+                    connections = node.get_connections()
+                    rows.append([(node_ids[other], connections[other]) for other in connections if other in node_ids])
+            self.csr = CSRAdjacency.from_rows(rows)
+        return self.csr
+
+    def _add_node(self, node, node_list):
+        node_list.append(node)
+        self.nodes = None
+        if node not in self.node_ids:
+            self.node_ids[node] = len(self.nodes_by_id)
+            self.nodes_by_id.append(node)
+            node._graphs.append(self)
+            self.csr = None #new row and possibly new edges into it
+            self._topology_changed()
+            self._drop_stale_trees(self.topology_version)
+            self._index_goods(node)
+
+    def _index_goods(self, node):
+        if isinstance(node, Supplier):
+            for good in node.get_provided_goods():
+                self.suppliers_by_good.setdefault(good, {})[node] = None
+        elif isinstance(node, Hub):
+            for good in node.get_goods():
+                self._stock_changed(node, good)
+
+    def _remove_node(self, node, node_list):
+        node_list.remove(node)
+        self.nodes = None
+        if node not in node_list: #only drop the id once every copy is gone
+            self.nodes_by_id[self.node_ids.pop(node)] = None
+            node._graphs.remove(self)
+            self.csr = None
+            self._topology_changed()
+            self._drop_stale_trees(self.topology_version)
+            if isinstance(node, Supplier):
+                for good in node.get_provided_goods():
+                    self._unindex(self.suppliers_by_good, good, node)
+            elif isinstance(node, Hub):
+                for good in node.get_goods():
+                    self._unindex(self.hubs_by_good, good, node)
+
+    def _edge_changed(self, node, other, old_weight, keep_base=False):
+        #weight changes and removals are patched in place, a brand new edge needs a rebuild
+        if not keep_base:
+            self.base_weights.pop((node, other), None) #somebody else set the weight, it is the new base
+        if other not in self.node_ids:
+            return #edges leaving the graph are invisible to routing
+        weight = node.get_connections().get(other, INF) #removed edges stay as infinite tombstones
+        if weight == old_weight:
+            return #rewritten with the same weight, every tree is still right
+        self._reschedule_leg(node, other)
+        previous = self.topology_version
+        self._topology_changed()
+        i = self.node_ids[node]
+        j = self.node_ids[other]
+        if self.csr is not None and not self.csr.set_weight(i, j, weight):
+            self.csr = None
+        self._drop_stale_trees(previous)
+        current = list(self.path_trees)
+        if not (current or len(self.goods_in_transit)):
+            return #nothing to repair, don't force a CSR rebuild while a graph is being built
+        adjacency = self.get_adjacency()
+        for key in current: #repair only the parts of each tree hanging off the edge, then mark it current again
+            _, dist, prev = self.path_trees[key]
+            changed = repair_tree(adjacency, dist, prev, i, j, old_weight, weight)
+            self.path_trees[key] = (self.topology_version, dist, prev)
+            if changed:
+                self.changed_routes.setdefault(key, set()).update(changed)
+        self._flag_shipments(adjacency, node, other, old_weight, weight)
+
+    def _reschedule_leg(self, node, other):
+        #shipments on the node -> other leg right now arrive by its new weight, the same way a scan tick checks them
+        for shipment in self.goods_in_transit.on_leg(node, other):
+            self._schedule(shipment)
+
+    def _flag_shipments(self, adjacency, node, other, old_weight, weight):
+        #in flight shipments whose route after their current leg is no longer the shortest. A consolidated
+        #vehicle is checked along every parcel's route, past where it splits up too
+        if weight > old_weight:
+            for shipment in self.goods_in_transit:
+                for route in shipment.full_routes():
+                    if any(route[k] is node and route[k+1] is other for k in range(shipment.leg, len(route)-1)):
+                        self.suboptimal_shipments[shipment.id] = shipment
+                        break
+            return
+        #only a route with more than weight still to go can gain from the edge, and never by more than that,
+        #so both searches stop at the longest such remainder
+        candidates = []
+        for shipment, route in self._routes_in_transit():
+            remaining = self._remaining_cost(shipment, route)
+            if remaining > weight:
+                candidates.append((shipment, route[-1], remaining))
+        if not candidates:
+            return
+        limit = max(remaining for _, _, remaining in candidates) - weight
+        to_node = bounded_dijkstra(adjacency, self.node_ids[node], limit, reverse=True)
+        from_other = bounded_dijkstra(adjacency, self.node_ids[other], limit)
+        for shipment, final, remaining in candidates:
+            before = to_node.get(self.node_ids[shipment.destination], INF)
+            after = from_other.get(self.node_ids[final], INF)
+            if before + weight + after < remaining:
+                self.suboptimal_shipments[shipment.id] = shipment
+
+    def _routes_in_transit(self):
+        #(shipment, full route) for every route still in the graph that a shortcut could improve
+        for shipment in self.goods_in_transit:
+            if shipment.destination not in self.node_ids:
+                continue
+            for route in shipment.full_routes():
+                if route[-1] in self.node_ids:
+                    yield shipment, route
+
+    def _remaining_cost(self, shipment, route=None):
+        #cost of the shipment's route (or one of its parcels' routes) from the end of its current leg, at today's weights
+        remaining = 0
+        route = shipment.route if route is None else route
+        for k in range(shipment.leg, len(route)-1):
+            remaining += route[k].get_connections().get(route[k+1], INF)
+        return remaining
+
+    def _edges_changed(self, changes, keep_base=False):
+        #Bulk _edge_changed for (node, other, old_weight) edges whose new weight is already written: the CSR is
+        #patched, the version bumped, trees refreshed and shipments flagged once for the whole batch
+        node_ids = self.node_ids
+        if not keep_base:
+            for node, other, _ in changes:
+                self.base_weights.pop((node, other), None)
+        changes = [(node, other, old_weight, node.get_connections().get(other, INF)) for node, other, old_weight in changes
+                   if node in node_ids and other in node_ids]
+        if len(changes) == 1: #repairing beats recomputing for a single edge
+            node, other, old_weight, _ = changes[0]
+            return self._edge_changed(node, other, old_weight, True)
+        if not changes:
+            return
+        previous = self.topology_version
+        self._topology_changed()
+        for node, other, _, weight in changes:
+            self._reschedule_leg(node, other)
+            if self.csr is not None and not self.csr.set_weight(node_ids[node], node_ids[other], weight):
+                self.csr = None
+        self._drop_stale_trees(previous)
+        if not (self.path_trees or len(self.goods_in_transit)):
+            return
+        adjacency = self.get_adjacency()
+        for key in list(self.path_trees): #one fresh dijkstra per tree instead of one repair per edge
+            old_dist = self.path_trees[key][1]
+            dist, prev = dijkstra(adjacency, key)
+            self.path_trees[key] = (self.topology_version, dist, prev)
+            changed = [i for i in range(len(dist)) if dist[i] != old_dist[i]]
+            if changed:
+                self.changed_routes.setdefault(key, set()).update(changed)
+        self._flag_all_shipments(adjacency, changes)
+
+    def _flag_all_shipments(self, adjacency, changes):
+        #_flag_shipments for a batch of changed edges: routes over a dearer edge are flagged outright, and if any edge
+        #got cheaper every other shipment is checked against one search back from each final destination
+        dearer = {(node, other) for node, other, old_weight, weight in changes if weight > old_weight}
+        for shipment in self.goods_in_transit:
+            if any((route[k], route[k+1]) in dearer for route in shipment.full_routes() for k in range(shipment.leg, len(route)-1)):
+                self.suboptimal_shipments[shipment.id] = shipment
+        if len(dearer) == len(changes):
+            return
+        candidates = {} # final destination -> [(shipment, remaining)]
+        for shipment, route in self._routes_in_transit():
+            if shipment.id not in self.suboptimal_shipments:
+                candidates.setdefault(route[-1], []).append((shipment, self._remaining_cost(shipment, route)))
+        for final, shipments in candidates.items():
+            to_final = bounded_dijkstra(adjacency, self.node_ids[final], max(remaining for _, remaining in shipments), reverse=True)
+            for shipment, remaining in shipments:
+                if to_final.get(self.node_ids[shipment.destination], INF) < remaining:
+                    self.suboptimal_shipments[shipment.id] = shipment
+
+    def set_edge_penalties(self, multipliers):
+        #Scale every edge by the larger multiplier of its two ends ({node: factor}, missing nodes are 1).
+        #Always scales from the unpenalised weight, so calling it again replaces the old penalties instead of compounding.
+        #Weights are written directly and every graph holding a touched node is told once at the end, like load_edges
+        changes = []
+        for node in list(self.node_ids):
+            connections = node.get_connections()
+            for other, weight in list(connections.items()):
+                if other not in self.node_ids:
+                    continue
+                key = (node, other)
+                base = self.base_weights.get(key, weight)
+                factor = max(multipliers.get(node, 1), multipliers.get(other, 1))
+                if factor == 1:
+                    self.base_weights.pop(key, None)
+                else:
+                    self.base_weights[key] = base
+                if weight != base * factor:
+                    connections[other] = base * factor
+                    changes.append((node, other, weight))
+        for graph in {graph: None for node, _, _ in changes for graph in node._graphs}:
+            graph._edges_changed(changes, keep_base=graph is self)
+
+    def clear_edge_penalties(self):
+        self.set_edge_penalties({})
+
+    def pop_suboptimal_shipments(self):
+        #shipments flagged by edge changes since the last call that are still in transit
+        flagged = [shipment for shipment in self.suboptimal_shipments.values() if self.goods_in_transit.get(shipment.id) is shipment]
+        self.suboptimal_shipments = {}
+        return flagged
+
+    def pop_stale_routes(self):
+        #(mission, good) requests whose shortest route changed since the last call
+        changed = self.changed_routes
+        self.changed_routes = {}
+        stale = []
+        for mission in self.missions:
+            for good in mission.get_required_goods():
+                key = tuple(sorted(self.node_ids[supplier] for supplier in self.suppliers_of(good)))
+                if self.node_ids[mission] in changed.get(key, ()):
+                    stale.append((mission, good))
+        return stale
+
+    @classmethod
+    def from_edge_list(cls, edges, nodes=None, bidirectional=False, chunk_size=65536):
+        #a new graph from a node file (see load_nodes) and an edge file (see load_edges). Without a node file
+        #every name in the edge file becomes a hub, with one a name it doesn't list is an error
+        graph = cls()
+        if nodes is not None:
+            graph.load_nodes(nodes, chunk_size)
+        graph.load_edges(edges, bidirectional, chunk_size, create_missing=nodes is None)
+        return graph
+
+    def load_nodes(self, source, chunk_size=65536):
+        #Bulk add from a kind,name[,x,y] CSV or (kind, name[, x, y]) rows, kind is supplier, hub or mission
+        adders = {"supplier": (Supplier, self.add_supplier), "hub": (Hub, self.add_hub), "mission": (Mission, self.add_mission)}
+        count = 0
+        for chunk in read_chunks(source, ("kind", "name", "x", "y"), chunk_size):
+            for row in chunk:
+                if row[0] not in adders:
+                    raise ValueError("Unknown node kind " + str(row[0]) + " for " + str(row[1]))
+                cls, add = adders[row[0]]
+                coords = None
+                if len(row) > 3 and row[2] != "" and row[3] != "":
+                    coords = (float(row[2]), float(row[3]))
+                add(cls(row[1], coords))
+            count += len(chunk)
+        return count
+
+    def load_edges(self, source, bidirectional=False, chunk_size=65536, create_missing=False):
+        #Bulk update_connections from a source,target,weight CSV or (source, target, weight) rows of node names.
+        #Connections are written directly and every graph holding a touched node is told once at the end, so
+        #nothing is repaired or flagged per edge. A later row for the same edge replaces the earlier weight, so a
+        #reload can raise weights or close roads (inf). Names no node has are an error, or new hubs with create_missing.
+        names = {node.get_name(): node for node in self.nodes_by_id if node is not None}
+
+        def endpoint(name):
+            node = names.get(name)
+            if node is None:
+                if not create_missing:
+                    raise ValueError("Unknown node " + str(name) + " in edge list")
+                node = names[name] = Hub(name)
+                self.add_hub(node)
+            return node
+
+        written = {} # (node, other) -> weight before the load, for every edge given a different one
+        count = 0
+        for chunk in read_chunks(source, ("source", "target", "weight"), chunk_size):
+            for a, b, weight in chunk:
+                node, other = endpoint(a), endpoint(b)
+                if type(weight) is str:
+                    weight = number(weight)
+                for edge in [(node, other), (other, node)] if bidirectional else [(node, other)]:
+                    old_weight = edge[0].connections.get(edge[1], INF)
+                    if weight != old_weight:
+                        written.setdefault(edge, old_weight)
+                        edge[0].connections[edge[1]] = weight
+            count += len(chunk)
+        changes = [(node, other, old_weight) for (node, other), old_weight in written.items()]
+        for graph in {graph: None for node, _, _ in changes for graph in node._graphs}:
+            graph._edges_changed(changes)
+        return count
+
+    def add_supplier(self, supplier):
+        self._add_node(supplier, self.suppliers)
+
+    def remove_supplier(self, supplier):
+        self._remove_node(supplier, self.suppliers)
+
+    def get_suppliers(self):
+        return self.suppliers
+
+    def add_hub(self, hub):
+        self._add_node(hub, self.hubs)
+
+    def remove_hub(self, hub):
+        self._remove_node(hub, self.hubs)
+
+    def get_hubs(self):
+        return self.hubs
+
+    def add_mission(self, mission):
+        self._add_node(mission, self.missions)
+
+    def remove_mission(self, mission):
+        self._remove_node(mission, self.missions)
+
+    def get_missions(self):
+        return self.missions
+    
+    def get_good_transit(self):
+        return list(self.goods_in_transit)
+
+    def get_shipment(self, shipment_id):
+        return self.goods_in_transit.get(shipment_id)
+
+    def in_transit_to(self, node):
+        #shipments carrying goods whose route ends at node, consolidated vehicles included before they split up
+        return self.goods_in_transit.to(node)
+
+    def in_transit_of(self, good):
+        return self.goods_in_transit.of(good)
+
+    def add_good_transit(self, good, source, destination, qty, route, departure_time, leg=None):
+        if leg is None:
+            leg = route.index(destination)
+        shipment = Shipment(self.goods_in_transit.new_id(), good, source, destination, qty, route, departure_time, leg)
+        self.goods_in_transit.add(shipment)
+        self._schedule(shipment)
+        return shipment
+
+    def add_consolidated_transit(self, parcels, departure_time, leg=1):
+        #one vehicle for (good, qty, route) parcels whose routes agree up to route[leg] at least,
+        #it runs as far as they all agree. A single parcel is just an ordinary shipment
+        if len(parcels) == 1:
+            good, qty, route = parcels[0]
+            return self.add_good_transit(good, route[leg-1], route[leg], qty, route, departure_time, leg)
+        route = shared_route([route for _, _, route in parcels], leg)
+        shipment = Shipment(self.goods_in_transit.new_id(), None, route[leg-1], route[leg], sum(qty for _, qty, _ in parcels),
+                            route, departure_time, leg, list(parcels))
+        self.goods_in_transit.add(shipment)
+        self._schedule(shipment)
+        return shipment
+
+    def advance_good_transit(self, shipment, departure_time):
+        #send a shipment that reached a stop on to the next stop of its route
+        old_leg = (shipment.source, shipment.destination)
+        shipment.leg += 1
+        shipment.source = shipment.destination
+        shipment.destination = shipment.route[shipment.leg]
+        shipment.departure_time = departure_time
+        self.goods_in_transit.move_to_end(shipment, old_leg)
+        self._schedule(shipment)
+        return shipment
+
+    def remove_good_transit(self, transit):
+        if not isinstance(transit, Shipment):
+            transit = self.goods_in_transit.find(transit)
+            if transit is None:
+                raise ValueError("transit not in goods_in_transit")
+        self.goods_in_transit.remove(transit)
+        transit.order = None
+
+    def _schedule(self, shipment):
+        #arrival by the leg's current weight, rescheduled whenever that weight changes; a leg over a missing edge never arrives
+        arrival = shipment.departure_time + shipment.source.get_connections().get(shipment.destination, INF)
+        shipment.order = next(self.arrival_order)
+        heapq.heappush(self.arrivals, (arrival, shipment.order, shipment))
+        if len(self.arrivals) > 2 * len(self.goods_in_transit) + 64:
+            #nobody pops the heap when ticking by scan, so drop dead entries before it piles up
+            self.arrivals = [entry for entry in self.arrivals if entry[2].order == entry[1]]
+            heapq.heapify(self.arrivals)
+
+    def next_arrival(self):
+        #earliest arrival time still scheduled, or None when nothing is moving
+        while self.arrivals and self.arrivals[0][2].order != self.arrivals[0][1]:
+            heapq.heappop(self.arrivals) #leg was removed or rescheduled after it was pushed
+        if self.arrivals:
+            return self.arrivals[0][0]
+        return None
+
+    def pop_arrivals(self, time):
+        #every shipment whose current leg has arrived by time, in arrival order
+        arrived = []
+        while self.arrivals and self.arrivals[0][0] <= time:
+            _, order, shipment = heapq.heappop(self.arrivals)
+            if shipment.order == order:
+                shipment.order = None
+                arrived.append(shipment)
+        return arrived
@@ -0,0 +1,289 @@
+from array import array
+import csv
+import itertools
+import json
+import mmap
+import operator
+import os
+import struct
+import numpy as np
+from .logistics_routing import CSRAdjacency
+
+MAGIC = b"SARSNAP1\n"
+STOCKS = ("has", "requires", "consuptionRate") # stock_kind -> the node dict it fills
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _column(values):
+    #whole number columns stay ints so quantities and weights come back with the type they went in with
+    if all(type(value) is int for value in values):
+        return array("q", values)
+    return array("d", values)
+
+
+def read_chunks(source, columns, chunk_size=65536):
+    """Yield lists of up to chunk_size row tuples in the order of columns.
+
+    source is a CSV path with a header row or any iterable of rows already in
+    column order (csv readers, DB cursors, record batches turned into tuples).
+    CSV columns are picked by header name without building a dict per row;
+    trailing columns the header doesn't have come back as "".
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        rows = iter(source)
+        for chunk in iter(lambda: list(itertools.islice(rows, chunk_size)), []):
+            yield chunk
+        return
+    with open(source, newline="") as f:
+        reader = csv.reader(f)
+        index = {name.strip(): k for k, name in enumerate(next(reader, ()))}
+        present = list(itertools.takewhile(lambda name: name in index, columns))
+        if not present or any(name in index for name in columns[len(present):]):
+            raise ValueError(str(source) + " needs the columns " + ", ".join(columns[:len(present) + 1]))
+        pad = ("",) * (len(columns) - len(present))
+        if len(present) == 1:
+            k = index[present[0]]
+            pick = lambda row: (row[k],)
+        else:
+            pick = operator.itemgetter(*(index[name] for name in present))
+        for chunk in iter(lambda: list(itertools.islice(reader, chunk_size)), []):
+            yield [pick(row) + pad for row in chunk if row]
+
+
+def number(text):
+    #CSV field to int when it is one, else float
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def save_snapshot(graph, time, path):
+    """Write a LogisticsGraph and the simulation time to path.
+
+    The file is MAGIC, a length prefixed JSON header (node table, goods
+    catalogue, column directory) and then flat 8 byte aligned little endian
+    columns: CSR edges, supplier goods, a (node, kind, good, qty) stock table,
+    the unpenalised weights of penalised edges and the transit table with its
+    routes. Only edges between nodes of the graph are kept, like get_adjacency.
+    """
+    from .logistics_graph import Hub, Mission, Supplier
+    node_ids = graph.node_ids
+    goods = {}
+    nodes = []
+    edge_offsets, edge_targets, edge_weights = array("q", [0]), array("q"), []
+    provide_nodes, provide_goods = array("q"), array("q")
+    stock_nodes, stock_kinds, stock_goods, stock_qty = array("q"), array("q"), array("q"), []
+    for i, node in enumerate(graph.nodes_by_id):
+        if node is not None:
+            if isinstance(node, Supplier):
+                kind = "supplier"
+                for good in node.get_provided_goods():
+                    provide_nodes.append(i)
+                    provide_goods.append(goods.setdefault(good, len(goods)))
+            elif isinstance(node, Hub):
+                kind = "hub"
+            elif isinstance(node, Mission):
+                kind = "mission"
+            else:
+                kind = "node"
+            nodes.append([kind, node.get_name(), node.get_coords()])
+            for k, stock in enumerate(STOCKS):
+                for good, qty in getattr(node, stock, {}).items():
+                    stock_nodes.append(i)
+                    stock_kinds.append(k)
+                    stock_goods.append(goods.setdefault(good, len(goods)))
+                    stock_qty.append(qty)
+            connections = node.get_connections()
+            for other in connections:
+                if other in node_ids:
+                    edge_targets.append(node_ids[other])
+                    edge_weights.append(connections[other])
+        else:
+            nodes.append(None)
+        edge_offsets.append(len(edge_targets))
+    base_sources, base_targets, base_weights = array("q"), array("q"), []
+    for (node, other), weight in graph.base_weights.items():
+        if node in node_ids and other in node_ids:
+            base_sources.append(node_ids[node])
+            base_targets.append(node_ids[other])
+            base_weights.append(weight)
+    ship_ids, ship_goods, ship_sources, ship_legs, route_offsets, route_nodes = array("q"), array("q"), array("q"), array("q"), array("q", [0]), array("q")
+    ship_qty, ship_departures = [], []
+    parcel_offsets, parcel_goods, parcel_route_offsets, parcel_route_nodes = array("q", [0]), array("q"), array("q", [0]), array("q")
+    parcel_qty = []
+    for shipment in graph.goods_in_transit: #dispatch order, which is also the order their legs were scheduled in
+        if shipment.source not in node_ids or any(node not in node_ids for node in shipment.route):
+            raise ValueError("shipment " + str(shipment.id) + " is routed through a node that is no longer in the graph")
+        ship_ids.append(shipment.id)
+        ship_goods.append(goods.setdefault(shipment.good, len(goods)))
+        ship_sources.append(node_ids[shipment.source])
+        ship_legs.append(shipment.leg)
+        ship_qty.append(shipment.qty)
+        ship_departures.append(shipment.departure_time)
+        route_nodes.extend(node_ids[node] for node in shipment.route)
+        route_offsets.append(len(route_nodes))
+        for good, qty, route in shipment.parcels or ():
+            if any(node not in node_ids for node in route):
+                raise ValueError("shipment " + str(shipment.id) + " is routed through a node that is no longer in the graph")
+            parcel_goods.append(goods.setdefault(good, len(goods)))
+            parcel_qty.append(qty)
+            parcel_route_nodes.extend(node_ids[node] for node in route)
+            parcel_route_offsets.append(len(parcel_route_nodes))
+        parcel_offsets.append(len(parcel_goods))
+    columns = {
+        "edge_offsets": edge_offsets, "edge_targets": edge_targets, "edge_weights": _column(edge_weights),
+        "suppliers": array("q", (node_ids[node] for node in graph.suppliers)),
+        "hubs": array("q", (node_ids[node] for node in graph.hubs)),
+        "missions": array("q", (node_ids[node] for node in graph.missions)),
+        "provide_nodes": provide_nodes, "provide_goods": provide_goods,
+        "stock_nodes": stock_nodes, "stock_kinds": stock_kinds, "stock_goods": stock_goods, "stock_qty": _column(stock_qty),
+        "base_sources": base_sources, "base_targets": base_targets, "base_weights": _column(base_weights),
+        "ship_ids": ship_ids, "ship_goods": ship_goods, "ship_sources": ship_sources, "ship_legs": ship_legs,
+        "ship_qty": _column(ship_qty), "ship_departures": _column(ship_departures),
+        "route_offsets": route_offsets, "route_nodes": route_nodes,
+        "parcel_offsets": parcel_offsets, "parcel_goods": parcel_goods, "parcel_qty": _column(parcel_qty),
+        "parcel_route_offsets": parcel_route_offsets, "parcel_route_nodes": parcel_route_nodes,
+    }
+    directory = {}
+    offset = 0
+    for name, column in columns.items():
+        directory[name] = [column.typecode, len(column), offset]
+        offset += len(column) * column.itemsize
+    header = json.dumps({
+        "time": time, "nodes": nodes, "goods": list(goods),
+        "next_shipment_id": graph.goods_in_transit.next_id, "columns": directory,
+    }).encode()
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        for column in columns.values():
+            f.write(column.tobytes())
+
+
+class _LazyRows():
+    #the connections of a restored graph's nodes, turned into a node's dict the first time it is read
+    def __init__(self, nodes, offsets, targets, weights):
+        self.nodes = nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    def row(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        nodes = self.nodes
+        return dict(zip([nodes[j] for j in self.targets[start:end]], self.weights[start:end].tolist()))
+
+
+class Snapshot():
+    """A snapshot file memory mapped read only.
+
+    restore() builds a fresh, independent LogisticsGraph each time it is
+    called, so one open Snapshot can fork any number of simulations without
+    reading or parsing the file again.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(str(path) + " is not a logistics snapshot")
+        size, = struct.unpack_from("<q", self.map, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self.map[start:start + size])
+        self.data = _align(start + size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    def column(self, name):
+        """Read only memoryview of a column over the mapped bytes, nothing is copied.
+        Release it (or use it in a with block) before closing the snapshot."""
+        typecode, count, offset = self.header["columns"][name]
+        start = self.data + offset
+        return memoryview(self.map)[start:start + count * array(typecode).itemsize].cast(typecode)
+
+    def _array(self, name, typecode=None):
+        #a column copied into an array the restored graph can own and patch, converted to typecode when given
+        with self.column(name) as view:
+            if typecode is None or typecode == view.format:
+                column = array(view.format)
+                with view.cast("B") as raw:
+                    column.frombytes(raw)
+            else:
+                column = array(typecode)
+                column.frombytes(np.array(view, dtype=typecode).tobytes())
+        return column
+
+    def restore(self):
+        """(LogisticsGraph, time) rebuilt from the snapshot"""
+        from .logistics_graph import Hub, LogisticsGraph, Mission, Node, Shipment, Supplier
+        classes = {"supplier": Supplier, "hub": Hub, "mission": Mission, "node": Node}
+        header = self.header
+        goods = header["goods"]
+        #the CSR is built straight from the edge columns and each node's connections dict only when it is first read
+        offsets = self._array("edge_offsets")
+        targets = self._array("edge_targets")
+        nodes = []
+        lazy = _LazyRows(nodes, offsets, targets, self._array("edge_weights"))
+        for i, row in enumerate(header["nodes"]):
+            if row is None:
+                nodes.append(None)
+            else:
+                kind, name, coords = row
+                node = classes[kind](name, None if coords is None else tuple(coords))
+                node._lazy_row = (lazy, i)
+                nodes.append(node)
+        graph = LogisticsGraph()
+        #nodes are filled in directly and wired to the graph once at the end, no per edge notifications
+        for i, good in zip(self._array("provide_nodes"), self._array("provide_goods")):
+            nodes[i].provides.append(goods[good])
+        for i, kind, good, qty in zip(self._array("stock_nodes"), self._array("stock_kinds"), self._array("stock_goods"), self._array("stock_qty").tolist()):
+            getattr(nodes[i], STOCKS[kind])[goods[good]] = qty
+        graph.nodes_by_id = nodes
+        graph.node_ids = {node: i for i, node in enumerate(nodes) if node is not None}
+        graph.suppliers = [nodes[i] for i in self._array("suppliers")]
+        graph.hubs = [nodes[i] for i in self._array("hubs")]
+        graph.missions = [nodes[i] for i in self._array("missions")]
+        for node in graph.node_ids:
+            node._graphs.append(graph)
+            graph._index_goods(node)
+        graph.csr = CSRAdjacency(offsets, targets, self._array("edge_weights", "d")) #its own float copy, room for INF tombstones
+        graph._topology_changed()
+        if "base_weights" in header["columns"]: #so the next set_edge_penalties still scales from the unpenalised weight
+            graph.base_weights = {(nodes[i], nodes[j]): weight for i, j, weight in
+                                  zip(self._array("base_sources"), self._array("base_targets"), self._array("base_weights").tolist())}
+        store = graph.goods_in_transit
+        route_offsets = self._array("route_offsets")
+        route_nodes = [nodes[j] for j in self._array("route_nodes")]
+        rows = zip(self._array("ship_ids"), self._array("ship_goods"), self._array("ship_sources"), self._array("ship_legs"),
+                   self._array("ship_qty").tolist(), self._array("ship_departures").tolist())
+        parcels = [None] * len(self._array("ship_ids"))
+        if "parcel_offsets" in header["columns"]: #snapshots from before consolidated shipments have none
+            parcel_offsets = self._array("parcel_offsets")
+            parcel_route_offsets = self._array("parcel_route_offsets")
+            parcel_route_nodes = [nodes[j] for j in self._array("parcel_route_nodes")]
+            parcel_rows = list(zip(self._array("parcel_goods"), self._array("parcel_qty").tolist()))
+            for k in range(len(parcels)):
+                if parcel_offsets[k] < parcel_offsets[k + 1]:
+                    parcels[k] = [(goods[good], qty, parcel_route_nodes[parcel_route_offsets[p]:parcel_route_offsets[p + 1]])
+                                  for p, (good, qty) in enumerate(parcel_rows[parcel_offsets[k]:parcel_offsets[k + 1]], parcel_offsets[k])]
+        for k, (shipment_id, good, source, leg, qty, departure) in enumerate(rows):
+            route = route_nodes[route_offsets[k]:route_offsets[k + 1]]
+            shipment = Shipment(shipment_id, goods[good], nodes[source], route[leg], qty, route, departure, leg, parcels[k])
+            store.add(shipment)
+            graph._schedule(shipment)
+        store.next_id = header["next_shipment_id"]
+        return graph, header["time"]
@@ -0,0 +1,431 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import heapq
+import math
+
+INF = float("inf")
+EARTH_RADIUS_KM = 6371.0
+
+
+class CSRAdjacency():
+    """Compressed sparse row adjacency: the edges leaving node id i are
+    targets[offsets[i]:offsets[i+1]] with the matching weights."""
+
+    def __init__(self, offsets, targets, weights):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.reverse = None # (offsets, sources, edge positions) by target, built on first use
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from one iterable of (target_id, weight) pairs per node id"""
+        offsets = array("q", [0])
+        targets = array("q")
+        weights = array("d")
+        for row in rows:
+            for target, weight in row:
+                targets.append(target)
+                weights.append(weight)
+            offsets.append(len(targets))
+        return cls(offsets, targets, weights)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def neighbours(self, i):
+        """Yield (target_id, weight) for every live edge leaving node id i"""
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            if self.weights[k] != INF:
+                yield self.targets[k], self.weights[k]
+
+    def incoming(self, j):
+        """Yield (source_id, weight) for every live edge into node id j"""
+        offsets, sources, edges = self._reverse()
+        for k in range(offsets[j], offsets[j + 1]):
+            weight = self.weights[edges[k]]
+            if weight != INF:
+                yield sources[k], weight
+
+    def transpose(self):
+        """A new CSRAdjacency with every edge flipped, weights copied as of now"""
+        offsets, sources, edges = self._reverse()
+        return CSRAdjacency(offsets, sources, array("d", (self.weights[k] for k in edges)))
+
+    def _reverse(self):
+        #counting sort of the edges by target, positions point back into weights so in place patches show through
+        if self.reverse is None:
+            n = len(self)
+            counts = array("q", [0]) * (n + 1)
+            for j in self.targets:
+                counts[j + 1] += 1
+            for j in range(n):
+                counts[j + 1] += counts[j]
+            fill = array("q", counts)
+            sources = array("q", [0]) * len(self.targets)
+            edges = array("q", [0]) * len(self.targets)
+            for i in range(n):
+                for k in range(self.offsets[i], self.offsets[i + 1]):
+                    slot = fill[self.targets[k]]
+                    sources[slot] = i
+                    edges[slot] = k
+                    fill[self.targets[k]] = slot + 1
+            self.reverse = (counts, sources, edges)
+        return self.reverse
+
+    def find(self, i, j):
+        """Position of edge i -> j in targets/weights, or -1 if there is none"""
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            if self.targets[k] == j:
+                return k
+        return -1
+
+    def set_weight(self, i, j, weight):
+        """Patch an existing edge in place, returns False if the edge has no slot"""
+        k = self.find(i, j)
+        if k < 0:
+            return False
+        self.weights[k] = weight
+        return True
+
+
+def dijkstra(adjacency, sources):
+    """Multi-source binary-heap dijkstra over a CSRAdjacency.
+
+    Returns (dist, prev) arrays indexed by node id. Unreached nodes have an
+    infinite distance and every source or unreached node has prev -1.
+    """
+    n = len(adjacency)
+    offsets, targets, weights = adjacency.offsets, adjacency.targets, adjacency.weights
+    dist = array("d", [INF]) * n
+    prev = array("q", [-1]) * n
+    heap = []
+    for source in sources:
+        dist[source] = 0.0
+        heap.append((0.0, source))
+    heapq.heapify(heap)
+    while heap:
+        d, i = heapq.heappop(heap)
+        if d > dist[i]:
+            continue #stale entry, already settled through a shorter route
+        for k in range(offsets[i], offsets[i + 1]):
+            j = targets[k]
+            newDist = d + weights[k]
+            if newDist < dist[j]:
+                dist[j] = newDist
+                prev[j] = i
+                heapq.heappush(heap, (newDist, j))
+    return dist, prev
+
+
+def bounded_dijkstra(adjacency, source, limit, reverse=False):
+    """Dijkstra from source that stops at distance limit.
+
+    With reverse the search runs over incoming edges, giving distances to
+    source instead. Returns {node id: distance} for just the nodes within
+    limit, so a search near a small change never touches the whole graph.
+    """
+    if reverse:
+        offsets, targets, edges = adjacency._reverse()
+    else:
+        offsets, targets, edges = adjacency.offsets, adjacency.targets, None
+    weights = adjacency.weights
+    dist = {source: 0.0}
+    settled = {}
+    heap = [(0.0, source)]
+    while heap:
+        d, i = heapq.heappop(heap)
+        if i in settled:
+            continue
+        settled[i] = d
+        for k in range(offsets[i], offsets[i + 1]):
+            j = targets[k]
+            newDist = d + weights[k if edges is None else edges[k]]
+            if newDist <= limit and newDist < dist.get(j, INF):
+                dist[j] = newDist
+                heapq.heappush(heap, (newDist, j))
+    return settled
+
+
+def repair_tree(adjacency, dist, prev, u, v, old_weight, new_weight):
+    """Patch a dijkstra (dist, prev) in place after edge u -> v changed weight.
+
+    Missing edges count as INF on either side. A cheaper edge only pushes
+    improvements out from v; a dearer tree edge resets the subtree hanging
+    off v, reseeds it from the rest of the tree and settles it again. The
+    adjacency must already hold the new weight. Returns the ids whose
+    distance changed.
+    """
+    heap = []
+    changed = set()
+    old = {} # distances of the reset subtree before the change
+    if new_weight < old_weight:
+        if dist[u] + new_weight < dist[v]:
+            dist[v] = dist[u] + new_weight
+            prev[v] = u
+            heap.append((dist[v], v))
+    elif new_weight > old_weight and prev[v] == u:
+        subtree = [v]
+        old[v] = dist[v]
+        index = 0
+        while index < len(subtree):
+            a = subtree[index]
+            index += 1
+            for b, _ in adjacency.neighbours(a):
+                if prev[b] == a and b not in old:
+                    old[b] = dist[b]
+                    subtree.append(b)
+        for a in subtree:
+            dist[a] = INF
+            prev[a] = -1
+        for a in subtree:
+            for b, weight in adjacency.incoming(a):
+                if b not in old and dist[b] + weight < dist[a]:
+                    dist[a] = dist[b] + weight
+                    prev[a] = b
+            if dist[a] < INF:
+                heap.append((dist[a], a))
+        heapq.heapify(heap)
+    while heap:
+        d, a = heapq.heappop(heap)
+        if d > dist[a]:
+            continue
+        if not old:
+            changed.add(a)
+        for b, weight in adjacency.neighbours(a):
+            newDist = d + weight
+            if newDist < dist[b]:
+                dist[b] = newDist
+                prev[b] = a
+                heapq.heappush(heap, (newDist, b))
+    changed.update(a for a in old if dist[a] != old[a])
+    return changed
+
+
+def astar(adjacency, sources, target, heuristic):
+    """Multi-source A* from the closest of the sources to target.
+
+    heuristic(i) must never overestimate the distance from node id i to
+    target (INF prunes nodes that can't reach it). Returns (distance, path
+    ids or None, number of nodes settled).
+    """
+    offsets, targets, weights = adjacency.offsets, adjacency.targets, adjacency.weights
+    dist = {}
+    prev = {}
+    heap = []
+    for source in sources:
+        dist[source] = 0.0
+        prev[source] = -1
+        heap.append((heuristic(source), 0.0, source))
+    heapq.heapify(heap)
+    settled = 0
+    while heap:
+        _, d, i = heapq.heappop(heap)
+        if d > dist[i]:
+            continue
+        if i == target:
+            path = []
+            while i != -1:
+                path.append(i)
+                i = prev[i]
+            path.reverse()
+            return d, path, settled
+        settled += 1
+        for k in range(offsets[i], offsets[i + 1]):
+            j = targets[k]
+            newDist = d + weights[k]
+            if newDist < dist.get(j, INF):
+                estimate = heuristic(j)
+                if estimate == INF:
+                    continue
+                dist[j] = newDist
+                prev[j] = i
+                heapq.heappush(heap, (newDist + estimate, newDist, j))
+    return INF, None, settled
+
+
+def geo_heuristic(coords, target, metric="euclidean", scale=1.0):
+    """Straight line lower bound to target from per node id coordinates.
+
+    metric is "euclidean" for planar (x, y) or "haversine" for (lat, lon) in
+    degrees, giving kilometres. It stays admissible as long as no edge weight
+    is below scale times the distance it covers. Nodes without coordinates
+    get 0.
+    """
+    goal = coords[target]
+    if goal is None:
+        return lambda i: 0.0
+    if metric == "euclidean":
+        gx, gy = goal
+        def heuristic(i):
+            c = coords[i]
+            if c is None:
+                return 0.0
+            return scale * math.hypot(c[0] - gx, c[1] - gy)
+    elif metric == "haversine":
+        goal_lat, goal_lon = math.radians(goal[0]), math.radians(goal[1])
+        cos_goal = math.cos(goal_lat)
+        def heuristic(i):
+            c = coords[i]
+            if c is None:
+                return 0.0
+            lat, lon = math.radians(c[0]), math.radians(c[1])
+            a = math.sin((goal_lat - lat) / 2) ** 2 + cos_goal * math.cos(lat) * math.sin((goal_lon - lon) / 2) ** 2
+            return scale * 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+    else:
+        raise ValueError("Unknown metric " + str(metric))
+    return heuristic
+
+
+class Landmarks():
+    """ALT landmark distances: shortest distances from and to a few far apart nodes.
+
+    By the triangle inequality d(L, t) - d(L, x) and d(x, L) - d(t, L) both
+    bound d(x, t) from below for every landmark L.
+    """
+
+    def __init__(self, landmarks, from_landmark, to_landmark):
+        self.landmarks = landmarks
+        self.from_landmark = from_landmark # per landmark, dist array from it
+        self.to_landmark = to_landmark # per landmark, dist array to it
+
+    @classmethod
+    def build(cls, adjacency, count, start=0):
+        """Pick count landmarks farthest-first from start and run dijkstra both ways from each"""
+        reverse = adjacency.transpose()
+        landmarks, from_landmark, to_landmark = [], [], []
+        closest = [INF] * len(adjacency) # distance to the nearest landmark so far
+        candidate = start
+        while len(landmarks) < min(count, len(adjacency)):
+            landmarks.append(candidate)
+            from_landmark.append(dijkstra(adjacency, [candidate])[0])
+            to_landmark.append(dijkstra(reverse, [candidate])[0])
+            far = -1.0
+            for i, d in enumerate(from_landmark[-1]):
+                closest[i] = min(closest[i], d)
+                if closest[i] != INF and closest[i] > far:
+                    far = closest[i]
+                    candidate = i
+            if far <= 0:
+                break #every reachable node is already a landmark
+        return cls(landmarks, from_landmark, to_landmark)
+
+    def heuristic(self, target):
+        pairs = [(f, t, f[target], t[target]) for f, t in zip(self.from_landmark, self.to_landmark)]
+        def heuristic(i):
+            best = 0.0
+            for from_l, to_l, from_goal, to_goal in pairs:
+                from_i, to_i = from_l[i], to_l[i]
+                if from_goal == INF and from_i != INF:
+                    return INF #the landmark reaches i but not the target, so i can't either
+                if to_i == INF and to_goal != INF:
+                    return INF #the target reaches the landmark but i doesn't, so i can't reach the target
+                if from_goal != INF and from_goal - from_i > best:
+                    best = from_goal - from_i
+                if to_i != INF and to_i - to_goal > best:
+                    best = to_i - to_goal
+            return best
+        return heuristic
+
+
+def max_heuristic(*heuristics):
+    """Pointwise max of admissible heuristics, still admissible"""
+    if len(heuristics) == 1:
+        return heuristics[0]
+    return lambda i: max(h(i) for h in heuristics)
+
+
+def path_to(prev, target):
+    """Walk a predecessor array back from target, returns node ids source first"""
+    path = []
+    while target != -1:
+        path.append(target)
+        target = prev[target]
+    path.reverse()
+    return path
+
+
+_worker_snapshot = None # (shared memory block, CSRAdjacency over views of it) each pool worker routes over
+
+
+def _attach(name):
+    #open a block the parent owns without registering it with this process's resource tracker
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError: #before Python 3.13
+        block = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _worker_tree(task):
+    global _worker_snapshot
+    name, n, m, sources = task
+    if _worker_snapshot is None or _worker_snapshot[0].name != name or len(_worker_snapshot[1]) != n:
+        if _worker_snapshot is not None:
+            block, adjacency = _worker_snapshot
+            for view in (adjacency.offsets, adjacency.targets, adjacency.weights):
+                view.release()
+            block.close()
+        block = _attach(name)
+        view = block.buf
+        adjacency = CSRAdjacency(view[:(n + 1) * 8].cast("q"), view[(n + 1) * 8:(n + 1 + m) * 8].cast("q"),
+                                 view[(n + 1 + m) * 8:(n + 1 + 2 * m) * 8].cast("d"))
+        _worker_snapshot = (block, adjacency)
+    return dijkstra(_worker_snapshot[1], sources)
+
+
+class ParallelRouter():
+    """Process pool that computes shortest path trees over a shared CSR snapshot.
+
+    The pool starts once and lives until close(). The CSR goes into a shared
+    memory block that workers map on first use: a new snapshot key (graph and
+    topology version) of the same shape is copied over the block in place,
+    which the workers see without doing anything, and only a change of shape
+    swaps in a new block. Tasks themselves carry just the source ids.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = None
+        self.block = None
+        self.shape = None # (node count, edge slots) of the CSR in block
+        self.key = None
+
+    def _share(self, adjacency):
+        n, m = len(adjacency), len(adjacency.targets)
+        if self.shape != (n, m):
+            old = self.block
+            self.block = shared_memory.SharedMemory(create=True, size=max(8, (n + 1 + 2 * m) * 8))
+            self.shape = (n, m)
+            if old is not None:
+                old.close()
+                old.unlink() #workers still mapping it let go when they attach the new one
+        view = self.block.buf
+        view[:(n + 1) * 8] = memoryview(adjacency.offsets).cast("B")
+        view[(n + 1) * 8:(n + 1 + m) * 8] = memoryview(adjacency.targets).cast("B")
+        view[(n + 1 + m) * 8:(n + 1 + 2 * m) * 8] = memoryview(adjacency.weights).cast("B")
+
+    def trees(self, adjacency, key, source_sets):
+        """(dist, prev) for every source id tuple, in order"""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        if self.key != key:
+            self._share(adjacency)
+            self.key = key
+        n, m = self.shape
+        tasks = [(self.block.name, n, m, sources) for sources in source_sets]
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        return list(self.pool.map(_worker_tree, tasks, chunksize=chunksize))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+            self.shape = None
+        self.key = None
@@ -0,0 +1,387 @@
+from .logistics_ch import ContractionHierarchy
+from .logistics_consolidation import consolidate
+from .logistics_flow import plan_min_cost_flow
+from .logistics_graph import LogisticsGraph, shared_route
+from .logistics_io import Snapshot, save_snapshot
+from .logistics_routing import INF, ParallelRouter, astar, dijkstra, geo_heuristic, max_heuristic, path_to
+from .headless import HeadlessAgent
+import math
+
+
+class LogisticsSimulation(HeadlessAgent):
+    #Graph, routing and the tick-by-tick dispatch simulation, with no LLM or SDK imports so worker
+    #processes and scripts can use it without paying for them. LogisticsAgent adds the agent on top
+    HANDLERS = {
+        "get_requests": ("get_requests", ()),
+        "get_deliveries": ("get_deliveries", ()),
+        "get_throughput": ("throughput", ()),
+    }
+
+    def __init__(self, name="logistics_specialist", event_driven=False, knowledge_base=None):
+        HeadlessAgent.__init__(self, name, "Logistics Specialist", knowledge_base)
+        self.graph = LogisticsGraph()
+        self.time = 0
+        self.routing_method = "dijkstra" # calculate_deliveries method used by run_time_tick, "heap" reuses cached trees
+        self.routing_workers = None # worker processes run_time_tick routes with, None keeps it in process
+        self.router = None # ParallelRouter kept alive across ticks
+        self.astar_metric = "euclidean" # "haversine" when node coords are (lat, lon) degrees and weights are km
+        self.astar_scale = 1.0 # weight per unit of distance, A* is only exact if no edge beats it
+        self.settled_nodes = 0 # nodes the last astar calculate_deliveries settled
+        self.contraction_hierarchy = None # ContractionHierarchy for method="ch", built on first use
+        self.allocation = "shortest_path" # how run_time_tick dispatches, "min_cost_flow" plans from actual stock
+        self.event_driven = event_driven # pop due legs off the graph's arrival heap instead of scanning every transit
+        self.aftershock_time = 10 # tick at which every van in transit is lost, None to turn it off
+        self.vehicle_capacity = None # units a vehicle carries, set to pack a tick's dispatches into shared vehicles
+        self.hours_per_tick = 1.0 # simulated hours one tick stands for
+        self.delivered = {} # tick -> units that reached the end of their route
+
+    @staticmethod
+    def _agent_class():
+        from .logisitics_agent import LogisticsAgent
+        return LogisticsAgent
+
+    def _generate_recommendations(self, risks):
+        """Generate safety recommendations based on risks"""
+        recommendations = []
+        for risk in risks:
+            if risk == "high_wind":
+                recommendations.append("Secure loose equipment")
+            elif risk == "low_visibility":
+                recommendations.append("Use additional lighting")
+        return recommendations
+
+    def get_graph(self):
+        return self.graph
+        
+    def update_graph(self, new_request):
+        return -1
+
+    def get_requests(self):
+        requests = []
+        for mission in self.graph.get_missions():
+            requests.append((mission.get_name(), mission.get_required_goods()))
+        return requests
+    
+    def get_deliveries(self):
+        return self.calculate_deliveries(self.routing_method)
+
+    def calculate_deliveries(self, method = "dijkstra", workers = None):
+        #workers > 1 fans the heap method's trees out over a process pool that is kept between calls
+        if workers is not None and method != "heap":
+            raise ValueError("workers only apply to the heap method, not " + str(method))
+        paths = {}
+        if method == "dijkstra":
+            for mission in self.graph.get_missions():
+                paths[mission] = {}
+                reqs = mission.get_required_goods()
+                for req in reqs:
+                    paths[mission][req] = []
+                    for supplier in self.graph.suppliers_of(req): #graph order decides between equally good suppliers
+                        nodes = {node:None for node in self.graph.get_nodes()}
+                        visited_nodes = {node:100000 for node in self.graph.get_nodes()}
+                        unvisited_nodes = {node:100000 for node in self.graph.get_nodes()}
+                        unvisited_nodes[supplier] = 0
+                        visited_nodes[supplier] = 0
+                        currNode = supplier
+                        while currNode != mission:
+                            visited_nodes[currNode] = unvisited_nodes[currNode]
+                            del unvisited_nodes[currNode]
+                            connections = currNode.get_connections()
+                            for node in connections:
+                                if node in unvisited_nodes:
+                                    dist = visited_nodes[currNode] + connections[node]
+                                    if dist < unvisited_nodes[node]:
+                                        nodes[node] = currNode
+                                        unvisited_nodes[node] = dist
+                            min_dist = 100000000
+                            for node in unvisited_nodes:
+                                if unvisited_nodes[node] < min_dist:
+                                    min_dist = unvisited_nodes[node]
+                                    currNode = node
+                            if min_dist >= 100000:
+                                return "Unable to find path for mission " + mission.get_name()
+                        path = []
+                        while currNode != None:
+                            path.append(currNode)
+                            currNode = nodes[currNode]
+                        path.reverse()
+                        paths[mission][req] = path
+            return paths            
+        elif method == "heap":
+            return self._heap_deliveries(self._get_router(workers))
+        elif method == "astar":
+            return self._astar_deliveries()
+        elif method == "ch":
+            return self._ch_deliveries()
+        return -1
+
+    def _heap_deliveries(self, router=None):
+        #One multi-source dijkstra per good, seeded from every supplier of that good at once
+        sources = {}
+        for mission in self.graph.get_missions():
+            for req in mission.get_required_goods():
+                if req not in sources:
+                    sources[req] = self.graph.suppliers_of(req)
+        routable = [req for req in sources if sources[req]]
+        trees = dict(zip(routable, self.graph.get_shortest_path_trees([sources[req] for req in routable], router)))
+        paths = {}
+        for mission in self.graph.get_missions():
+            paths[mission] = {}
+            for req in mission.get_required_goods():
+                if req not in trees: #nobody supplies it, same as the plain dijkstra
+                    paths[mission][req] = []
+                    continue
+                dist, prev = trees[req]
+                target = self.graph.get_node_id(mission)
+                if dist[target] == INF:
+                    return "Unable to find path for mission " + mission.get_name()
+                paths[mission][req] = [self.graph.get_node(i) for i in path_to(prev, target)]
+        return paths
+
+    def _astar_deliveries(self):
+        #Point to point A* per (mission, good), guided by node coordinates and the graph's landmarks when it has them
+        graph = self.graph
+        adjacency = graph.get_adjacency()
+        coords = graph.get_coords()
+        landmarks = graph.get_landmarks()
+        paths = {}
+        self.settled_nodes = 0
+        for mission in graph.get_missions():
+            paths[mission] = {}
+            target = graph.get_node_id(mission)
+            heuristics = [geo_heuristic(coords, target, self.astar_metric, self.astar_scale)]
+            if landmarks is not None:
+                heuristics.append(landmarks.heuristic(target))
+            heuristic = max_heuristic(*heuristics)
+            for req in mission.get_required_goods():
+                sources = graph.suppliers_of(req)
+                if not sources: #nobody supplies it, same as the plain dijkstra
+                    paths[mission][req] = []
+                    continue
+                _, path, settled = astar(adjacency, [graph.get_node_id(s) for s in sources], target, heuristic)
+                self.settled_nodes += settled
+                if path is None:
+                    return "Unable to find path for mission " + mission.get_name()
+                paths[mission][req] = [graph.get_node(i) for i in path]
+        return paths
+
+    def build_contraction_hierarchy(self):
+        #one off preprocessing for method="ch", rebuild it after edits since a stale index is never used
+        self.contraction_hierarchy = ContractionHierarchy.build(self.graph.get_adjacency())
+        self.contraction_hierarchy.attach(self.graph)
+        return self.contraction_hierarchy
+
+    def save_contraction_hierarchy(self, path):
+        self.contraction_hierarchy.save(path)
+
+    def load_contraction_hierarchy(self, path):
+        #returns whether the saved index matches the current graph, a mismatched one is kept but never used
+        self.contraction_hierarchy = ContractionHierarchy.load(path)
+        return self.contraction_hierarchy.attach(self.graph)
+
+    def _ch_deliveries(self):
+        #Contraction hierarchy queries, falls back to the heap dijkstra whenever the index is stale
+        graph = self.graph
+        ch = self.contraction_hierarchy
+        if ch is None:
+            ch = self.build_contraction_hierarchy()
+        if not ch.is_current(graph):
+            return self._heap_deliveries()
+        paths = {}
+        for mission in graph.get_missions():
+            paths[mission] = {}
+            target = graph.get_node_id(mission)
+            backward = None
+            for req in mission.get_required_goods():
+                sources = graph.suppliers_of(req)
+                if not sources: #nobody supplies it, same as the plain dijkstra
+                    paths[mission][req] = []
+                    continue
+                if backward is None:
+                    backward = ch.backward(target) #shared by every good this mission wants
+                _, path = ch.query([graph.get_node_id(s) for s in sources], target, backward)
+                if path is None:
+                    return "Unable to find path for mission " + mission.get_name()
+                paths[mission][req] = [graph.get_node(i) for i in path]
+        return paths
+
+    def _get_router(self, workers):
+        if workers is None or workers <= 1:
+            return None
+        if self.router is None or self.router.workers != workers:
+            self.close_router()
+            self.router = ParallelRouter(workers)
+        return self.router
+
+    def save_snapshot(self, path):
+        #graph, stocks, goods in transit and time as a columnar binary file, see logistics_io
+        save_snapshot(self.graph, self.time, path)
+
+    def load_snapshot(self, snapshot):
+        #replace the graph and time from a path or an open Snapshot, one Snapshot can seed any number of agents
+        if isinstance(snapshot, Snapshot):
+            self.graph, self.time = snapshot.restore()
+        else:
+            with Snapshot(snapshot) as opened:
+                self.graph, self.time = opened.restore()
+        return self.graph
+
+    def close_router(self):
+        #shut the routing process pool down, it is restarted on the next parallel call
+        if self.router is not None:
+            self.router.close()
+            self.router = None
+
+    def plan_allocation(self):
+        #(good, qty, path) dispatches from one min cost flow per good over supplier and hub stock, ready for make_delivery
+        return plan_min_cost_flow(self.graph)
+
+    def make_delivery(self, good, qty, path):
+        qty = path[0].ship_good(good, qty) #If this crashes you shipped from an unacceptable location (mission)
+        return self.graph.add_good_transit(good, path[0], path[1], qty, path, self.time, 1)
+    
+    def run_time_tick(self):
+        #shipments read like (good, source, destination, qty, route, departure_time)
+        trees = {} # destination id -> tree, shared by the shipments rerouted this tick
+        for shipment in self.graph.pop_suboptimal_shipments():
+            self.reroute(shipment, trees)
+        if self.event_driven:
+            self._process_arrivals()
+        else:
+            for transit in list(self.graph.get_good_transit()): #copy, removing while iterating skipped shipments
+                if self.time == self.aftershock_time:
+                    self._lose_transit(transit)
+                elif (transit.departure_time + transit.source.get_connections()[transit.destination]) <= self.time: #good has traveled the distance
+                    self._arrive(transit)
+
+        if self.vehicle_capacity is not None:
+            self._dispatch_consolidated()
+        elif self.allocation == "min_cost_flow":
+            for good, qty, path in self.plan_allocation():
+                self.make_delivery(good, qty, path)
+                path[-1].recieve_good_transit(good, qty)
+        else:
+            paths = self.calculate_deliveries(self.routing_method, self.routing_workers)
+            for mission in paths:
+                for req in paths[mission]:
+                    currPath = paths[mission][req]
+                    self.graph.add_good_transit(req, currPath[0], currPath[1], 10, currPath, self.time, 1)
+                    mission.recieve_good_transit(req, 10) #Just assuming stuff can ship in batches of 10 now
+        self.time = self.time + 1
+        return self.time
+
+    def _dispatch_consolidated(self):
+        #same dispatches as the one van per (mission, good) ticks, packed into vehicles sharing their first edges
+        dispatches = []
+        if self.allocation == "min_cost_flow":
+            for good, qty, path in self.plan_allocation():
+                dispatches.append((good, path[0].ship_good(good, qty), path))
+        else:
+            paths = self.calculate_deliveries(self.routing_method, self.routing_workers)
+            for mission in paths:
+                for req in paths[mission]:
+                    dispatches.append((req, 10, paths[mission][req]))
+        for good, qty, path in dispatches:
+            path[-1].recieve_good_transit(good, qty)
+        for load in consolidate(dispatches, self.vehicle_capacity):
+            self.graph.add_consolidated_transit(load, self.time, 1)
+
+    def throughput(self, since=0):
+        #units delivered per simulated hour over the ticks from since until now
+        hours = (self.time - since) * self.hours_per_tick
+        if hours <= 0:
+            return 0.0
+        return sum(qty for tick, qty in self.delivered.items() if tick >= since) / hours
+
+    def advance_to(self, time):
+        #Runs ticks up to time. Event driven agents skip straight over ticks where nothing is due and nothing is requested
+        while self.time < time:
+            if self.event_driven and not self._has_open_requests():
+                wake = [time]
+                next_arrival = self.graph.next_arrival()
+                if next_arrival is not None and next_arrival != INF: #a leg over a closed road never arrives
+                    wake.append(math.ceil(next_arrival))
+                if self.aftershock_time is not None and self.aftershock_time >= self.time:
+                    wake.append(self.aftershock_time)
+                self.time = max(self.time, min(wake))
+                if self.time >= time:
+                    break
+            self.run_time_tick()
+        return self.time
+
+    def reroute(self, shipment, trees=None):
+        #Swap everything after the shipment's current leg for today's shortest route to the same place. A consolidated
+        #vehicle re-plans every parcel from its stop, keeping the old plan for any it can't reach, and then runs
+        #as far as the parcel routes agree.
+        #The tree from its stop is one-off, kept in trees when given instead of the graph's cache, which repairs every tree it holds on each edge change
+        node_ids = self.graph.node_ids
+        if shipment.destination not in node_ids:
+            return False
+        start = node_ids[shipment.destination]
+        tree = None if trees is None else trees.get(start)
+        if tree is None:
+            tree = dijkstra(self.graph.get_adjacency(), [start])
+            if trees is not None:
+                trees[start] = tree
+        dist, prev = tree
+        done = shipment.route[:shipment.leg]
+        routes = []
+        for route in shipment.full_routes():
+            final = node_ids.get(route[-1])
+            if final is None or dist[final] == INF:
+                routes.append(route)
+            else:
+                routes.append(done + [self.graph.get_node(i) for i in path_to(prev, final)])
+        if all(new is old for new, old in zip(routes, shipment.full_routes())):
+            return False
+        if shipment.parcels is None:
+            shipment.route = routes[0]
+        else:
+            shipment.parcels = [(good, qty, route) for (good, qty, _), route in zip(shipment.parcels, routes)]
+            shipment.route = shared_route(routes, shipment.leg)
+        return True
+
+    def _has_open_requests(self):
+        for mission in self.graph.get_missions():
+            if mission.get_required_goods():
+                return True
+        return False
+
+    def _process_arrivals(self):
+        if self.time == self.aftershock_time:
+            for transit in list(self.graph.get_good_transit()):
+                self._lose_transit(transit)
+        arrived = self.graph.pop_arrivals(self.time)
+        while arrived: #zero weight legs can arrive within the same tick
+            for transit in arrived:
+                self._arrive(transit)
+            arrived = self.graph.pop_arrivals(self.time)
+
+    def _arrive(self, shipment):
+        if shipment.leg < len(shipment.route)-1: #You still have steps in the path to go
+            self.graph.advance_good_transit(shipment, self.time)
+        else:
+            self.graph.remove_good_transit(shipment)
+            if shipment.parcels is None:
+                shipment.destination.recieve_good(shipment.good, shipment.qty)
+                self.delivered[self.time] = self.delivered.get(self.time, 0) + shipment.qty
+            else:
+                self._unload(shipment)
+
+    def _unload(self, shipment):
+        #a consolidated vehicle reached the end of its shared route: drop off the parcels that end here and
+        #send the rest on, one vehicle per next stop
+        onward = {}
+        for good, qty, route in shipment.parcels:
+            if len(route) == shipment.leg + 1:
+                shipment.destination.recieve_good(good, qty)
+                self.delivered[self.time] = self.delivered.get(self.time, 0) + qty
+            else:
+                onward.setdefault(route[shipment.leg + 1], []).append((good, qty, route))
+        for parcels in onward.values():
+            self.graph.add_consolidated_transit(parcels, self.time, shipment.leg + 1)
+
+    def _lose_transit(self, shipment): #A huge aftershock of an earthquake blew up every van in transit, whoops
+        self.graph.remove_good_transit(shipment)
+        for good, qty, route in shipment.parcels or [(shipment.good, shipment.qty, shipment.route)]:
+            route[-1].add_required_good(good, qty) #the mission at the end of the route asks again
@@ -1,86 +1,18 @@
 from .base_agent import SARBaseAgent
-class WeatherAgent(SARBaseAgent):
-    def __init__(self, name="weather_specialist"):
-        super().__init__(
-            name=name,
-            role="Weather Specialist",
-            system_message="""You are a weather specialist for SAR operations. Your role is to:
+from .weather_service import WeatherService
+class WeatherAgent(WeatherService, SARBaseAgent):
+    SYSTEM_MESSAGE = """You are a weather specialist for SAR operations. Your role is to:
             1. Analyze weather conditions
             2. Predict weather impacts on operations
             3. Provide safety recommendations
             4. Monitor changing conditions"""
-        )
-        self.current_conditions = {}
-        self.forecasts = {}
-        
-    def process_request(self, message):
-        """Process weather-related requests"""
-        try:
-            # Example processing logic
-            if "get_conditions" in message:
-                return self.get_current_conditions(message["location"])
-            elif "get_forecast" in message:
-                return self.get_weather_forecast(message["location"], message["duration"])
-            elif "assess_risk" in message:
-                return self.assess_weather_risk(message["location"])
-            else:
-                return {"error": "Unknown request type"}
-        except Exception as e:
-            return {"error": str(e)}
-
-    def get_current_conditions(self, location):
-        """Get current weather conditions for location"""
-        # Implement weather API call here
-        return {
-            "location": location,
-            "temperature": 22,
-            "wind_speed": 15,
-            "precipitation": 0,
-            "visibility": 10
-        }
-
-    def get_weather_forecast(self, location, duration):
-        """Get weather forecast for specified duration"""
-        # Implement forecast API call here
-        return {
-            "location": location,
-            "duration": duration,
-            "forecast": [
-                {"time": "now+1h", "conditions": "clear"},
-                {"time": "now+2h", "conditions": "partly_cloudy"}
-            ]
-        }
-
-    def assess_weather_risk(self, location):
-        """Assess weather-related risks for SAR operations"""
-        conditions = self.get_current_conditions(location)
-        forecast = self.get_weather_forecast(location, "2h")
-        risks = []
-        if conditions["wind_speed"] > 30:
-            risks.append("high_wind")
-        if conditions["visibility"] < 5:
-            risks.append("low_visibility")
-        return {
-            "risk_level": len(risks),
-            "risks": risks,
-            "recommendations": self._generate_recommendations(risks)
-        }
 
-    def _generate_recommendations(self, risks):
-        """Generate safety recommendations based on risks"""
-        recommendations = []
-        for risk in risks:
-            if risk == "high_wind":
-                recommendations.append("Secure loose equipment")
-            elif risk == "low_visibility":
-                recommendations.append("Use additional lighting")
-        return recommendations
-
-    def update_status(self, status):
-        """Update the agent's status"""
-        self.status = status
-        return {"status": "updated", "new_status": status}
-
-    def get_status(self):
-        """Get the agent's current status"""
-        return getattr(self, "status", "unknown")
+    def __init__(self, name="weather_specialist", provider=None, knowledge_base=None, ttl=300.0):
+        SARBaseAgent.__init__(
+            self,
+            name=name,
+            role="Weather Specialist",
+            system_message=self.SYSTEM_MESSAGE,
+            knowledge_base=knowledge_base
+        )
+        WeatherService.__init__(self, name, provider, knowledge_base, ttl)
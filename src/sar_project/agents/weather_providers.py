@@ -0,0 +1,137 @@
+from concurrent.futures import Future
+import json
+import threading
+import time
+
+
+class WeatherProvider:
+    """Source of weather data for WeatherAgent, subclasses call the real service"""
+
+    def current(self, location):
+        """Current conditions dict for location"""
+        raise NotImplementedError
+
+    def forecast(self, location, duration):
+        """Forecast dict for location over duration (e.g. "2h")"""
+        raise NotImplementedError
+
+
+class StubWeatherProvider(WeatherProvider):
+    """Fixed conditions, the placeholder WeatherAgent always returned before providers existed"""
+
+    def current(self, location):
+        return {
+            "location": location,
+            "temperature": 22,
+            "wind_speed": 15,
+            "precipitation": 0,
+            "visibility": 10
+        }
+
+    def forecast(self, location, duration):
+        return {
+            "location": location,
+            "duration": duration,
+            "forecast": [
+                {"time": "now+1h", "conditions": "clear"},
+                {"time": "now+2h", "conditions": "partly_cloudy"}
+            ]
+        }
+
+
+class FileWeatherProvider(WeatherProvider):
+    """Offline provider reading a JSON fixture file.
+
+    The file maps a location (or "default" for any other location) to
+    {"current": {...}, "forecast": {duration: [...]}}. It is read once, at
+    construction.
+    """
+
+    def __init__(self, path):
+        with open(path) as f:
+            self.data = json.load(f)
+
+    def _entry(self, location):
+        entry = self.data.get(location, self.data.get("default"))
+        if entry is None:
+            raise KeyError("No weather data for " + str(location))
+        return entry
+
+    def current(self, location):
+        return dict(self._entry(location)["current"], location=location)
+
+    def forecast(self, location, duration):
+        forecast = self._entry(location).get("forecast", {})
+        return {"location": location, "duration": duration, "forecast": forecast.get(duration, [])}
+
+
+class CachedWeatherProvider(WeatherProvider):
+    """TTL cache in front of another provider.
+
+    Entries are keyed by (kind, location, duration) and live ttl seconds.
+    Concurrent misses on one key are coalesced: the first caller fetches
+    and the others wait on its result, so each key costs at most one
+    upstream call per TTL window. on_fetch(kind, location, duration, value)
+    runs after every upstream call, before waiting callers are released.
+    Cached dicts are shared between callers, treat them as read only.
+    """
+
+    def __init__(self, provider, ttl=300.0, on_fetch=None, max_entries=4096, clock=time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        self.on_fetch = on_fetch
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = {} # key -> (expiry, value)
+        self.inflight = {} # key -> Future of the fetch in progress
+        self.lock = threading.Lock()
+        self.fetches = 0 # upstream calls made
+
+    def current(self, location):
+        return self._get(("current", location, None), lambda: self.provider.current(location))
+
+    def forecast(self, location, duration):
+        return self._get(("forecast", location, duration), lambda: self.provider.forecast(location, duration))
+
+    def invalidate(self, location=None):
+        #drop cached entries for location, or everything
+        with self.lock:
+            for key in [key for key in self.entries if location is None or key[1] == location]:
+                del self.entries[key]
+
+    def _get(self, key, fetch):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                return entry[1]
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = Future()
+        if not leader:
+            return flight.result()
+        try:
+            value = fetch()
+            if self.on_fetch is not None:
+                self.on_fetch(key[0], key[1], key[2], value)
+        except BaseException as e:
+            with self.lock:
+                del self.inflight[key]
+            flight.set_exception(e)
+            raise
+        with self.lock:
+            self.fetches += 1
+            self.entries[key] = (self.clock() + self.ttl, value)
+            del self.inflight[key]
+            if len(self.entries) > self.max_entries:
+                self._evict()
+        flight.set_result(value)
+        return value
+
+    def _evict(self):
+        #expired entries first, then the oldest inserted
+        now = self.clock()
+        for key in [key for key, (expiry, _) in self.entries.items() if expiry <= now]:
+            del self.entries[key]
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
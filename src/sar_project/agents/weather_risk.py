@@ -0,0 +1,101 @@
+import math
+import operator
+import numpy as np
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+class RiskRule():
+    """One threshold test on a weather field, e.g. wind_speed > 30 is high_wind"""
+
+    def __init__(self, name, field, op, threshold, recommendation, weight=1):
+        if op not in OPERATORS:
+            raise ValueError("Unknown operator " + str(op))
+        self.name = name
+        self.field = field
+        self.op = op
+        self.threshold = threshold
+        self.recommendation = recommendation
+        self.weight = weight # added to a cell's risk level when the rule fires
+
+
+DEFAULT_RULES = (
+    RiskRule("high_wind", "wind_speed", ">", 30, "Secure loose equipment"),
+    RiskRule("low_visibility", "visibility", "<", 5, "Use additional lighting"),
+)
+
+
+class RiskGrid():
+    """Per-cell result of assess_grid.
+
+    levels holds the summed weight of the rules each cell triggers and codes
+    a bitmask with bit k set when rules[k] fired, both shaped like the input
+    fields. For a 2D grid, origin and cell_size place cell [i, j] at
+    origin + (i, j) * cell_size so coordinates can be looked up.
+    """
+
+    def __init__(self, rules, levels, codes, origin=None, cell_size=1.0):
+        self.rules = rules
+        self.levels = levels
+        self.codes = codes
+        self.origin = origin
+        self.cell_size = cell_size
+
+    def risks(self, code):
+        """Rule names encoded in a code"""
+        return [rule.name for k, rule in enumerate(self.rules) if int(code) >> k & 1]
+
+    def recommendations(self, code):
+        """Recommendations for a code, in rule order"""
+        return [rule.recommendation for k, rule in enumerate(self.rules) if int(code) >> k & 1]
+
+    def level_at(self, points):
+        """Risk level at each (x, y) in points, 0 outside the grid"""
+        if self.origin is None or self.levels.ndim != 2:
+            raise ValueError("level_at needs a 2D grid with an origin")
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cells = np.floor((points - np.asarray(self.origin, dtype=np.float64)) / self.cell_size).astype(np.int64)
+        rows, cols = cells[:, 0], cells[:, 1]
+        inside = (rows >= 0) & (rows < self.levels.shape[0]) & (cols >= 0) & (cols < self.levels.shape[1])
+        levels = np.zeros(len(points), dtype=self.levels.dtype)
+        levels[inside] = self.levels[rows[inside], cols[inside]]
+        return levels
+
+
+def assess_grid(fields, rules=DEFAULT_RULES, origin=None, cell_size=1.0):
+    """Evaluate rules over every cell at once.
+
+    fields maps a field name to an array (any shape, all the same) of that
+    field per cell. Each rule is one vectorised comparison, so the cost is a
+    handful of NumPy passes however many cells there are. Cells where a
+    field is NaN never trigger its rules. Returns a RiskGrid.
+    """
+    rules = tuple(rules)
+    if len(rules) > 63:
+        raise ValueError("at most 63 rules fit in a risk code")
+    missing = sorted({rule.field for rule in rules if rule.field not in fields})
+    if missing:
+        raise ValueError("no data for fields " + ", ".join(missing))
+    arrays = {name: np.asarray(fields[name], dtype=np.float64) for name in {rule.field for rule in rules}}
+    shape = next(iter(arrays.values())).shape if arrays else ()
+    levels = np.zeros(shape, dtype=np.float64 if any(isinstance(rule.weight, float) for rule in rules) else np.int64)
+    codes = np.zeros(shape, dtype=np.int64)
+    for k, rule in enumerate(rules):
+        fired = OPERATORS[rule.op](arrays[rule.field], rule.threshold) #NaN compares false
+        levels += fired * rule.weight
+        codes |= fired.astype(np.int64) << k
+    return RiskGrid(rules, levels, codes, origin, cell_size)
+
+
+def node_multipliers(graph, risk, per_level=0.5):
+    """{node: 1 + per_level * risk level} for every node of graph with coordinates inside a 2D RiskGrid"""
+    nodes = [node for node in graph.node_ids if node.get_coords() is not None]
+    if not nodes:
+        return {}
+    levels = risk.level_at([node.get_coords() for node in nodes])
+    return {node: 1 + per_level * level for node, level in zip(nodes, levels.tolist()) if level > 0 and not math.isnan(level)}
+
+
+def apply_risk_penalties(graph, risk, per_level=0.5):
+    """Scale edge weights of graph by the risk at their endpoints, replacing any earlier risk penalties"""
+    graph.set_edge_penalties(node_multipliers(graph, risk, per_level))
@@ -0,0 +1,75 @@
+from .headless import HeadlessAgent
+from .weather_providers import CachedWeatherProvider, StubWeatherProvider
+from .weather_risk import DEFAULT_RULES, apply_risk_penalties, assess_grid
+
+
+class WeatherService(HeadlessAgent):
+    """Weather lookups and risk assessment without the LLM, WeatherAgent adds the conversational agent on top"""
+
+    HANDLERS = {
+        "get_conditions": ("get_current_conditions", ("location",)),
+        "get_forecast": ("get_weather_forecast", ("location", "duration")),
+        "assess_risk": ("assess_weather_risk", ("location",)),
+    }
+
+    def __init__(self, name="weather_specialist", provider=None, knowledge_base=None, ttl=300.0):
+        HeadlessAgent.__init__(self, name, "Weather Specialist", knowledge_base)
+        self.current_conditions = {}
+        self.forecasts = {}
+        self.risk_rules = DEFAULT_RULES
+        # every lookup goes through one cache, fresh fetches are written through to the knowledge base
+        self.weather = CachedWeatherProvider(provider or StubWeatherProvider(), ttl, on_fetch=self._record_fetch)
+
+    @staticmethod
+    def _agent_class():
+        from .weather_agent import WeatherAgent
+        return WeatherAgent
+
+    def get_current_conditions(self, location):
+        """Get current weather conditions for location"""
+        return self.weather.current(location)
+
+    def get_weather_forecast(self, location, duration):
+        """Get weather forecast for specified duration"""
+        return self.weather.forecast(location, duration)
+
+    def _record_fetch(self, kind, location, duration, value):
+        """Keep the latest upstream results and write conditions through to the knowledge base"""
+        if kind == "current":
+            self.current_conditions[location] = value
+            if self.kb is not None:
+                self.kb.update_weather(location, value)
+        else:
+            self.forecasts[(location, duration)] = value
+
+    def assess_weather_risk(self, location):
+        """Assess weather-related risks for SAR operations"""
+        conditions = self.get_current_conditions(location)
+        risks = []
+        if conditions["wind_speed"] > 30:
+            risks.append("high_wind")
+        if conditions["visibility"] < 5:
+            risks.append("low_visibility")
+        return {
+            "risk_level": len(risks),
+            "risks": risks,
+            "recommendations": self._generate_recommendations(risks)
+        }
+
+    def assess_area_risk(self, fields, origin=None, cell_size=1.0):
+        """Assess every cell of an area at once from arrays of weather fields, returns a RiskGrid"""
+        return assess_grid(fields, self.risk_rules, origin, cell_size)
+
+    def apply_area_risk(self, graph, risk, per_level=0.5):
+        """Penalise LogisticsGraph edges running through risky cells of a 2D RiskGrid"""
+        apply_risk_penalties(graph, risk, per_level)
+
+    def _generate_recommendations(self, risks):
+        """Generate safety recommendations based on risks"""
+        recommendations = []
+        for risk in risks:
+            if risk == "high_wind":
+                recommendations.append("Secure loose equipment")
+            elif risk == "low_visibility":
+                recommendations.append("Use additional lighting")
+        return recommendations
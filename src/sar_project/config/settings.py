@@ -1,16 +1,28 @@
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
 
-# Load environment variables from .env file
-load_dotenv()
 
-# API keys
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+class Settings:
+    """Environment-backed configuration, read once per process by get_settings()"""
+
+    def __init__(self, environ):
+        # API keys
+        self.OPENAI_API_KEY = environ.get("OPENAI_API_KEY")
+        self.GOOGLE_API_KEY = environ.get("GOOGLE_API_KEY")
+        self.WEATHER_API_KEY = environ.get("WEATHER_API_KEY")
+
+        # Deployment settings
+        self.DEPLOYMENT_NAME = environ.get("DEPLOYMENT_NAME", "default_deployment")
+        self.LOG_LEVEL = environ.get("LOG_LEVEL", "INFO")
+
+
+@lru_cache(maxsize=None)
+def get_settings():
+    """Load the .env file and environment once and return the shared Settings"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return Settings(os.environ)
 
-# Deployment settings
-DEPLOYMENT_NAME = os.getenv("DEPLOYMENT_NAME", "default_deployment")
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 # Agent configuration
 DEFAULT_MODEL = "gpt-4"
@@ -20,3 +32,18 @@ DEFAULT_TIMEOUT = 600
 # File paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+
+
+ENV_SETTINGS = ("OPENAI_API_KEY", "GOOGLE_API_KEY", "WEATHER_API_KEY", "DEPLOYMENT_NAME", "LOG_LEVEL")
+
+__all__ = [
+    "Settings", "get_settings", "DEFAULT_MODEL", "DEFAULT_TEMPERATURE", "DEFAULT_TIMEOUT", "BASE_DIR", "DATA_DIR",
+    "OPENAI_API_KEY", "GOOGLE_API_KEY", "WEATHER_API_KEY", "DEPLOYMENT_NAME", "LOG_LEVEL",
+]
+
+
+def __getattr__(name):
+    # the old module level constants (settings.OPENAI_API_KEY, ...) still work, but only touch .env when first used
+    if name in ENV_SETTINGS:
+        return getattr(get_settings(), name)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
@@ -1,3 +1,6 @@
-from .knowledge_base import KnowledgeBase
+from .knowledge_base import KnowledgeBase, KnowledgeSnapshot
+from .mission_history import HistorySnapshot, MissionHistory
+from .spatial_index import SpatialIndex
+from .store import SQLiteStore
 
-__all__ = ["KnowledgeBase"]
\ No newline at end of file
+__all__ = ["KnowledgeBase", "KnowledgeSnapshot", "MissionHistory", "HistorySnapshot", "SpatialIndex", "SQLiteStore"]
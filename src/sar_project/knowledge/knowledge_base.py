@@ -1,33 +1,80 @@
+from contextlib import contextmanager, nullcontext
+import threading
+from types import MappingProxyType
+from .mission_history import MissionHistory
+from .spatial_index import SpatialIndex
+
+RECORDS = {"terrain": "terrain_data", "weather": "weather_data", "resource": "resource_status"}  # kind -> attribute
+
+
 class KnowledgeBase:
-    def __init__(self):
+    def __init__(self, mission_history=None, metric="euclidean", cell_size=1.0, store=None, thread_safe=False):
         """
         Initializes the knowledge base with empty datasets for terrain, weather,
         resources, and mission history.
+
+        Args:
+            mission_history (MissionHistory): Preconfigured history store (retention,
+                spill file), defaults to an unbounded one.
+            metric (str): How coordinates are compared, "euclidean" for (x, y) or
+                "haversine" for (lat, lon) degrees with distances in kilometres.
+            cell_size (float): Grid cell width of the terrain and weather spatial indexes.
+            store (SQLiteStore): Optional persistent backend. Updates are written through
+                to it, the dicts below become read-through caches filled on first
+                query (or all at once by the first snapshot()), and only the positions and the mission history tail kept in
+                memory are loaded up front.
+            thread_safe (bool): Serialise writers behind a lock so agents on a thread
+                pool can share the knowledge base. Readers never take it, see snapshot().
         """
         self.terrain_data = {}
         self.weather_data = {}
+        self.spatial = {
+            "terrain": SpatialIndex(cell_size, metric),
+            "weather": SpatialIndex(cell_size, metric),
+        }
         self.resource_status = {}
-        self.mission_history = []
+        self.mission_history = mission_history if mission_history is not None else MissionHistory()
+        self.lock = threading.RLock() if thread_safe else None
+        self.version = 0  # bumped by every write
+        self.shared = set()  # record kinds whose dict a snapshot holds, copied before the next write to them
+        self.current = None  # last published KnowledgeSnapshot
+        self.store = store
+        self.loaded = store is None  # whether the dicts hold every stored record, see snapshot()
+        if store is not None:
+            for kind in self.spatial:
+                for location, coords in store.positions(kind):
+                    self.spatial[kind].insert(location, coords)
+            history = self.mission_history
+            limit = None if history.max_segments is None else history.max_segments * history.segment_size
+            since = None
+            if history.retention is not None:
+                newest = store.newest_timestamp()
+                since = None if newest is None else newest - history.retention
+            history.replay(store.events(limit, since))
 
-    def update_terrain(self, location, data):
+    def update_terrain(self, location, data, coords=None):
         """
         Updates terrain data for a specific location.
 
         Args:
             location (str): Name or identifier of the location.
             data (dict): Terrain-related data (e.g., elevation, obstacles).
+            coords (tuple): Optional position of the location for spatial queries,
+                a location keeps its last position when updated without one.
         """
-        self.terrain_data[location] = data
+        self._write("terrain", location, data, coords)
 
-    def update_weather(self, location, conditions):
+    def update_weather(self, location, conditions, coords=None):
         """
         Updates weather data for a specific location.
 
         Args:
             location (str): Name or identifier of the location.
             conditions (dict): Weather conditions (e.g., temperature, wind speed).
+            coords (tuple): Optional position of the location for spatial queries,
+                a location keeps its last position when updated without one.
         """
-        self.weather_data[location] = conditions
+        self._write("weather", location, conditions, coords)
 
     def update_resource_status(self, resource_name, status):
         """
@@ -37,7 +84,7 @@ class KnowledgeBase:
             resource_name (str): Name of the resource (e.g., drone, vehicle).
             status (dict): Resource status (e.g., availability, location).
         """
-        self.resource_status[resource_name] = status
+        self._write("resource", resource_name, status)
 
     def log_mission_event(self, event):
         """
@@ -45,8 +92,16 @@ class KnowledgeBase:
 
         Args:
             event (dict): Event details (e.g., timestamp, action, outcome).
+
+        Raises:
+            TypeError: The timestamp can't be compared with earlier ones, see MissionHistory.append.
         """
-        self.mission_history.append(event)
+        with self._guard():
+            self.mission_history.append(event)
+            self.version += 1
+            if self.store is not None:
+                timestamp = event.get(self.mission_history.time_key)
+                self.store.append_event(event, timestamp if isinstance(timestamp, (int, float)) else None)
 
     def query_terrain(self, location):
         """
@@ -58,7 +113,7 @@ class KnowledgeBase:
         Returns:
             dict: Terrain-related data or an empty dictionary if not found.
         """
-        return self.terrain_data.get(location, {})
+        return self._lookup("terrain", location)
 
     def query_weather(self, location):
         """
@@ -70,7 +125,180 @@ class KnowledgeBase:
         Returns:
             dict: Weather-related data or an empty dictionary if not found.
         """
-        return self.weather_data.get(location, {})
+        return self._lookup("weather", location)
+
+    def _guard(self):
+        return self.lock if self.lock is not None else nullcontext()
+
+    def _records(self, kind):
+        if kind not in RECORDS:
+            raise ValueError("Unknown record kind " + str(kind))
+        return getattr(self, RECORDS[kind])
+
+    def _writable(self, kind):
+        #copy-on-write: a dict a snapshot holds is never mutated again, the first write after it gets a fresh copy
+        records = self._records(kind)
+        if kind in self.shared:
+            records = dict(records)
+            setattr(self, RECORDS[kind], records)
+            self.shared.discard(kind)
+        return records
+
+    def _write(self, kind, key, value, coords=None, persist=True):
+        with self._guard():
+            self._writable(kind)[key] = value
+            if coords is not None:
+                self.spatial[kind].insert(key, coords)
+            self.version += 1
+            if persist and self.store is not None:
+                self.store.put(kind, key, value, coords)
+
+    def _lookup(self, kind, key):
+        #read-through: the in-memory dict first, then the store, caching what it returns.
+        #Filling the cache is not a write, the version stays and no snapshot is invalidated: once one
+        #has been taken every record is loaded, so a miss never reaches a dict a snapshot holds
+        records = self._records(kind)
+        if key not in records and not self.loaded:
+            with self._guard():
+                records = self._records(kind)
+                if key not in records:
+                    value = self.store.get(kind, key)
+                    if value is None:
+                        return {}
+                    records[key] = value
+        return records.get(key, {})
+
+    def _load_all(self):
+        #the unread records a snapshot would otherwise miss, kept behind anything already cached
+        for kind in RECORDS:
+            records = self._writable(kind)
+            for key, value in self.store.records(kind):
+                records.setdefault(key, value)
+        self.loaded = True
+
+    def _spatial(self, kind):
+        if kind not in self.spatial:
+            raise ValueError("Unknown record kind " + str(kind))
+        return self.spatial[kind]
+
+    @contextmanager
+    def batch(self):
+        """
+        Holds the writer lock across a group of updates so they land in one
+        short critical section and no snapshot shows only some of them.
+        Buffered store writes are flushed at the end.
+
+        Yields:
+            KnowledgeBase: This knowledge base.
+        """
+        with self._guard():
+            yield self
+            if self.store is not None:
+                self.store.flush()
+
+    def snapshot(self):
+        """
+        Retrieves an immutable point-in-time view of the records and mission
+        history. Taking one never copies data and never waits on writers: if a
+        writer holds the lock the last published snapshot is returned instead.
+        With a store, the first snapshot loads every stored record so the view
+        holds records that were never queried too.
+
+        Returns:
+            KnowledgeSnapshot: The view.
+        """
+        current = self.current
+        if current is not None and current.version == self.version:
+            return current
+        lock = self.lock
+        if lock is not None and not lock.acquire(blocking=False):
+            if current is not None:
+                return current
+            lock.acquire()
+        try:
+            if not self.loaded:
+                self._load_all()
+            self.shared = set(RECORDS)
+            self.current = KnowledgeSnapshot(self.version, *(MappingProxyType(getattr(self, RECORDS[kind])) for kind in RECORDS),
+                                             self.mission_history.snapshot())
+            return self.current
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def nearest(self, kind, point, k=1):
+        """
+        Retrieves the coordinate-tagged records closest to a point.
+
+        Args:
+            kind (str): "terrain" or "weather".
+            point (tuple): Coordinates to search from.
+            k (int): Number of records wanted.
+
+        Returns:
+            list: Up to k (distance, location, data) tuples, nearest first.
+        """
+        with self._guard():
+            found = self._spatial(kind).nearest(point, k)
+        return [(d, location, self._lookup(kind, location)) for d, location in found]
+
+    def within_radius(self, kind, point, radius):
+        """
+        Retrieves the coordinate-tagged records within a distance of a point.
+
+        Args:
+            kind (str): "terrain" or "weather".
+            point (tuple): Coordinates to search from.
+            radius (float): Search radius (kilometres for haversine).
+
+        Returns:
+            list: (distance, location, data) tuples, nearest first.
+        """
+        with self._guard():
+            found = self._spatial(kind).within_radius(point, radius)
+        return [(d, location, self._lookup(kind, location)) for d, location in found]
+
+    def within_bbox(self, kind, lower, upper):
+        """
+        Retrieves the coordinate-tagged records inside a box.
+
+        Args:
+            kind (str): "terrain" or "weather".
+            lower (tuple): Lowest corner of the box.
+            upper (tuple): Highest corner of the box.
+
+        Returns:
+            dict: Data of every location in the box, keyed by location.
+        """
+        with self._guard():
+            found = self._spatial(kind).within_bbox(lower, upper)
+        return {location: self._lookup(kind, location) for location in found}
+
+    def along_route(self, kind, points, radius):
+        """
+        Retrieves the coordinate-tagged records in a corridor around a route,
+        the area within radius of any of its segments.
+
+        Args:
+            kind (str): "terrain" or "weather".
+            points (list): Route coordinates in order.
+            radius (float): Corridor half width (kilometres for haversine).
+
+        Returns:
+            dict: Data of every location in the corridor, keyed by location in the
+                order the route first passes them.
+        """
+        index = self._spatial(kind)
+        with self._guard():
+            if len(points) == 1:
+                hits = [location for _, location in index.within_radius(points[0], radius)]
+            else:
+                hits = [location for a, b in zip(points, points[1:]) for _, location in index.near_segment(a, b, radius)]
+        found = {}
+        for location in hits:
+            if location not in found:
+                found[location] = self._lookup(kind, location)
+        return found
 
     def query_resource_status(self, resource_name):
         """
@@ -82,13 +310,78 @@ class KnowledgeBase:
         Returns:
             dict: Resource status or an empty dictionary if not found.
         """
-        return self.resource_status.get(resource_name, {})
+        return self._lookup("resource", resource_name)
 
     def get_mission_history(self):
         """
-        Retrieves the complete mission history.
+        Retrieves the mission history still held in memory.
 
         Returns:
             list: A list of logged mission events.
         """
-        return self.mission_history
+        return list(self.mission_history)
+
+    def query_mission_events(self, t0=None, t1=None, location=None, event_type=None):
+        """
+        Retrieves mission events in a time range, optionally at one location or of one type.
+
+        Args:
+            t0: Earliest timestamp (inclusive), None for no lower bound.
+            t1: Latest timestamp (inclusive), None for no upper bound.
+            location (str): Name or identifier of the location.
+            event_type (str): Type of event.
+
+        Returns:
+            list: Matching events, oldest first.
+        """
+        return self.mission_history.events_between(t0, t1, location=location, event_type=event_type)
+
+    def flush(self):
+        """
+        Writes any buffered updates through to the persistent store, if there is one.
+        """
+        if self.store is not None:
+            self.store.flush()
+
+    def close(self):
+        """
+        Flushes and closes the persistent store, if there is one.
+        """
+        if self.store is not None:
+            self.store.close()
+
+
+class KnowledgeSnapshot:
+    def __init__(self, version, terrain_data, weather_data, resource_status, mission_history):
+        """
+        Immutable view of a KnowledgeBase at one version, from KnowledgeBase.snapshot().
+        The record values themselves are shared with the knowledge base, so treat
+        them as read only.
+
+        Args:
+            version (int): KnowledgeBase.version the view was taken at.
+            terrain_data (Mapping): Terrain data by location.
+            weather_data (Mapping): Weather data by location.
+            resource_status (Mapping): Resource status by resource name.
+            mission_history (HistorySnapshot): Mission events at that version.
+        """
+        self.version = version
+        self.terrain_data = terrain_data
+        self.weather_data = weather_data
+        self.resource_status = resource_status
+        self.mission_history = mission_history
+
+    def query_terrain(self, location):
+        return self.terrain_data.get(location, {})
+
+    def query_weather(self, location):
+        return self.weather_data.get(location, {})
+
+    def query_resource_status(self, resource_name):
+        return self.resource_status.get(resource_name, {})
+
+    def get_mission_history(self):
+        return list(self.mission_history)
+
+    def query_mission_events(self, t0=None, t1=None, location=None, event_type=None):
+        return self.mission_history.events_between(t0, t1, location=location, event_type=event_type)
@@ -0,0 +1,284 @@
+from bisect import bisect_left, bisect_right
+import json
+
+
+class _Segment:
+    """A fixed size run of events with its own timestamp, location and type indexes."""
+
+    __slots__ = ("events", "timestamps", "locations", "types", "by_location", "by_type", "start", "end", "ordered")
+
+    def __init__(self):
+        self.events = []
+        self.timestamps = []
+        self.locations = []
+        self.types = []
+        self.by_location = {}
+        self.by_type = {}
+        self.start = None
+        self.end = None
+        self.ordered = True
+
+    def add(self, event, timestamp, location, event_type):
+        position = len(self.events)
+        self.events.append(event)
+        self.timestamps.append(timestamp)
+        self.locations.append(location)
+        self.types.append(event_type)
+        if location is not None:
+            self.by_location.setdefault(location, []).append(position)
+        if event_type is not None:
+            self.by_type.setdefault(event_type, []).append(position)
+        if timestamp is None:
+            self.ordered = False
+        else:
+            if self.end is not None and timestamp < self.end:
+                self.ordered = False
+            if self.start is None or timestamp < self.start:
+                self.start = timestamp
+            if self.end is None or timestamp > self.end:
+                self.end = timestamp
+
+    def overlaps(self, t0, t1):
+        if t0 is None and t1 is None:
+            return True
+        if self.start is None:
+            return False
+        return (t0 is None or self.end >= t0) and (t1 is None or self.start <= t1)
+
+    def positions(self, t0, t1, location, event_type, limit):
+        #positions below limit of matching events in insertion order, using the smallest index that applies
+        candidates = None
+        for index, key in ((self.by_location, location), (self.by_type, event_type)):
+            if key is not None:
+                found = index.get(key, [])
+                if candidates is None or len(found) < len(candidates):
+                    candidates = found
+        timed = t0 is not None or t1 is not None
+        if timed and self.ordered:
+            lo = 0 if t0 is None else bisect_left(self.timestamps, t0, 0, limit)
+            hi = limit if t1 is None else bisect_right(self.timestamps, t1, 0, limit)
+        else:
+            lo, hi = 0, limit
+        if candidates is None:
+            candidates = range(lo, hi)
+        else:
+            candidates = candidates[bisect_left(candidates, lo):bisect_left(candidates, hi)]
+        timed = timed and not self.ordered
+        for position in candidates:
+            if (location is not None and self.locations[position] != location) or (event_type is not None and self.types[position] != event_type):
+                continue #only one of the two indexes was used
+            if timed:
+                timestamp = self.timestamps[position]
+                if timestamp is None or (t0 is not None and timestamp < t0) or (t1 is not None and timestamp > t1):
+                    continue
+            yield position
+
+
+class MissionHistory:
+    def __init__(self, segment_size=1024, max_segments=None, retention=None, spill_path=None,
+                 time_key="timestamp", location_key="location", type_key="type"):
+        """
+        Append-only mission event log kept in fixed size segments.
+
+        Each segment indexes its events by timestamp, location and event type,
+        and remembers its time span so range queries skip whole segments.
+        Once the log holds more than max_segments segments, or a sealed
+        segment is older than retention (in timestamp units) relative to the
+        newest event, the oldest segment is evicted: appended to spill_path
+        as JSON lines when given, dropped otherwise.
+
+        Args:
+            segment_size (int): Events per segment.
+            max_segments (int): Segments kept in memory, None for no limit.
+            retention: Age after which sealed segments are evicted, None to keep them.
+            spill_path (str): JSON lines file evicted events are appended to.
+            time_key (str): Event key holding the timestamp.
+            location_key (str): Event key holding the location.
+            type_key (str): Event key holding the event type.
+        """
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.retention = retention
+        self.spill_path = spill_path
+        self.time_key = time_key
+        self.location_key = location_key
+        self.type_key = type_key
+        self.segments = [_Segment()]
+        self.newest = None
+        self.evicted = 0
+
+    def append(self, event):
+        """
+        Logs an event, evicting old segments if the log is over its limits.
+
+        Args:
+            event (dict): Event details (e.g., timestamp, location, type, outcome).
+
+        Raises:
+            TypeError: The timestamp can't be compared with the ones already logged,
+                e.g. a string after numbers. The event is not logged.
+        """
+        self._add(event)
+        self._evict(spill=True)
+
+    def replay(self, events):
+        """
+        Loads events that are already persisted elsewhere, e.g. by a store on
+        restart. Old segments are evicted as append would, but dropped instead
+        of being spilled a second time.
+
+        Args:
+            events (iterable): Events, oldest first.
+        """
+        for event in events:
+            self._add(event)
+            self._evict(spill=False)
+
+    def _add(self, event):
+        timestamp = event.get(self.time_key)
+        newer = timestamp is not None and self.newest is None
+        if timestamp is not None and self.newest is not None:
+            try: #checked before anything changes, the segment indexes compare timestamps too
+                newer = timestamp > self.newest
+            except TypeError:
+                raise TypeError("Event timestamp " + repr(timestamp) + " can't be ordered against the earlier timestamp "
+                                + repr(self.newest)) from None
+        segment = self.segments[-1]
+        if len(segment.events) >= self.segment_size:
+            segment = _Segment()
+            self.segments.append(segment)
+        segment.add(event, timestamp, event.get(self.location_key), event.get(self.type_key))
+        if newer:
+            self.newest = timestamp
+
+    def _evict(self, spill):
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            expired = (self.retention is not None and oldest.end is not None and self.newest is not None
+                       and oldest.end < self.newest - self.retention)
+            if not expired and (self.max_segments is None or len(self.segments) <= self.max_segments):
+                return
+            del self.segments[0]
+            self.evicted += len(oldest.events)
+            if spill and self.spill_path is not None:
+                with open(self.spill_path, "a") as f:
+                    for event in oldest.events:
+                        f.write(json.dumps(event, default=str) + "\n")
+
+    def snapshot(self):
+        """
+        Point-in-time view of the in-memory events that later appends and
+        evictions don't change, taken without copying any events.
+
+        Returns:
+            HistorySnapshot: The view.
+        """
+        segments = tuple(self.segments)
+        return HistorySnapshot(segments, len(segments[-1].events))
+
+    def __len__(self):
+        return len(self.snapshot())
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def iter_events(self, t0=None, t1=None, location=None, event_type=None, include_spilled=False):
+        """
+        Iterates over events matching every given filter, oldest first.
+
+        Args:
+            t0: Earliest timestamp (inclusive), None for no lower bound.
+            t1: Latest timestamp (inclusive), None for no upper bound.
+            location: Only events at this location.
+            event_type: Only events of this type.
+            include_spilled (bool): Also scan events already spilled to disk.
+
+        Yields:
+            dict: Matching events. Events without a timestamp never match a time bound.
+        """
+        if include_spilled:
+            yield from self.iter_spilled(t0, t1, location, event_type)
+        yield from self.snapshot().iter_events(t0, t1, location, event_type)
+
+    def events_between(self, t0=None, t1=None, location=None, event_type=None, include_spilled=False):
+        """
+        Retrieves events in a time range, see iter_events.
+
+        Returns:
+            list: Matching events, oldest first.
+        """
+        return list(self.iter_events(t0, t1, location, event_type, include_spilled))
+
+    def iter_spilled(self, t0=None, t1=None, location=None, event_type=None):
+        """
+        Iterates over spilled events matching the filters with a linear scan of spill_path.
+
+        Yields:
+            dict: Matching events as read back from disk.
+        """
+        if self.spill_path is None:
+            return
+        try:
+            f = open(self.spill_path)
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                event = json.loads(line)
+                timestamp = event.get(self.time_key)
+                if (t0 is not None or t1 is not None) and timestamp is None:
+                    continue
+                if (t0 is not None and timestamp < t0) or (t1 is not None and timestamp > t1):
+                    continue
+                if location is not None and event.get(self.location_key) != location:
+                    continue
+                if event_type is not None and event.get(self.type_key) != event_type:
+                    continue
+                yield event
+
+
+class HistorySnapshot:
+    def __init__(self, segments, last_count):
+        """
+        Frozen view of a MissionHistory. Segments only ever grow at the end,
+        so the view is the segments it was taken with, cut off at the event
+        count the newest one had then.
+
+        Args:
+            segments (tuple): Segments in memory when the view was taken.
+            last_count (int): Events the newest segment held at that time.
+        """
+        self.segments = segments
+        self.last_count = last_count
+
+    def _limit(self, k):
+        return self.last_count if k == len(self.segments) - 1 else len(self.segments[k].events)
+
+    def __len__(self):
+        return sum(self._limit(k) for k in range(len(self.segments)))
+
+    def __iter__(self):
+        for k, segment in enumerate(self.segments):
+            yield from segment.events[:self._limit(k)]
+
+    def iter_events(self, t0=None, t1=None, location=None, event_type=None):
+        """
+        Iterates over events in the view matching every given filter, see MissionHistory.iter_events.
+
+        Yields:
+            dict: Matching events, oldest first.
+        """
+        for k, segment in enumerate(self.segments):
+            if not segment.overlaps(t0, t1):
+                continue
+            for position in segment.positions(t0, t1, location, event_type, self._limit(k)):
+                yield segment.events[position]
+
+    def events_between(self, t0=None, t1=None, location=None, event_type=None):
+        """
+        Retrieves events in the view in a time range, see iter_events.
+
+        Returns:
+            list: Matching events, oldest first.
+        """
+        return list(self.iter_events(t0, t1, location, event_type))
@@ -0,0 +1,232 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class SpatialIndex:
+    def __init__(self, cell_size=1.0, metric="euclidean"):
+        """
+        Uniform grid index of keyed points.
+
+        Points fall into square cells of cell_size coordinate units, so a
+        query only looks at the cells its search area covers (or at the
+        occupied cells, when there are fewer of those).
+
+        Args:
+            cell_size (float): Cell width in coordinate units (degrees for haversine).
+            metric (str): "euclidean" for planar (x, y), "haversine" for (lat, lon)
+                in degrees with distances in kilometres.
+        """
+        if metric not in ("euclidean", "haversine"):
+            raise ValueError("Unknown metric " + str(metric))
+        self.cell_size = cell_size
+        self.metric = metric
+        self.cells = {}  # (row, column) -> {key: point}
+        self.points = {}  # key -> point
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, point):
+        return (math.floor(point[0] / self.cell_size), math.floor(point[1] / self.cell_size))
+
+    def insert(self, key, point):
+        """
+        Adds a point under key, moving it if the key is already indexed.
+
+        Args:
+            key: Identifier of the point, e.g. a location name.
+            point (tuple): (x, y) or (lat, lon) coordinates.
+        """
+        self.remove(key)
+        point = (float(point[0]), float(point[1]))
+        self.points[key] = point
+        self.cells.setdefault(self._cell(point), {})[key] = point
+
+    def remove(self, key):
+        point = self.points.pop(key, None)
+        if point is not None:
+            cell = self._cell(point)
+            del self.cells[cell][key]
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def get(self, key):
+        return self.points.get(key)
+
+    def distance(self, a, b):
+        if self.metric == "euclidean":
+            return math.hypot(a[0] - b[0], a[1] - b[1])
+        return _haversine(a, b)
+
+    def _scan(self, lower, upper):
+        #(key, point) in the axis aligned box, visiting whichever is fewer: covered cells or occupied cells
+        low_row, low_col = self._cell(lower)
+        high_row, high_col = self._cell(upper)
+        if (high_row - low_row + 1) * (high_col - low_col + 1) > len(self.cells):
+            cells = [self.cells[cell] for cell in self.cells
+                     if low_row <= cell[0] <= high_row and low_col <= cell[1] <= high_col]
+        else:
+            cells = [self.cells[(row, col)] for row in range(low_row, high_row + 1)
+                     for col in range(low_col, high_col + 1) if (row, col) in self.cells]
+        for bucket in cells:
+            for key, point in bucket.items():
+                if lower[0] <= point[0] <= upper[0] and lower[1] <= point[1] <= upper[1]:
+                    yield key, point
+
+    def within_bbox(self, lower, upper):
+        """
+        Finds the points inside a box.
+
+        Args:
+            lower (tuple): Lowest (x, y) or (lat, lon) corner.
+            upper (tuple): Highest corner. For haversine a lower longitude above the
+                upper one means the box crosses the antimeridian.
+
+        Returns:
+            list: Keys of the points in the box, inclusive of its edges.
+        """
+        if self.metric == "haversine" and lower[1] > upper[1]:
+            boxes = [(lower, (upper[0], 180.0)), ((lower[0], -180.0), upper)]
+        else:
+            boxes = [(lower, upper)]
+        return [key for box in boxes for key, _ in self._scan(*box)]
+
+    def within_radius(self, point, radius):
+        """
+        Finds the points within radius of point.
+
+        Args:
+            point (tuple): Centre of the search.
+            radius (float): Search radius (kilometres for haversine).
+
+        Returns:
+            list: (distance, key) pairs, nearest first.
+        """
+        if self.metric == "euclidean":
+            boxes = [((point[0] - radius, point[1] - radius), (point[0] + radius, point[1] + radius))]
+        else:
+            angle = radius / EARTH_RADIUS_KM
+            low_lat, high_lat = point[0] - math.degrees(angle), point[0] + math.degrees(angle)
+            spread = 1.0 if low_lat <= -90 or high_lat >= 90 else math.sin(angle) / math.cos(math.radians(point[0]))
+            if angle >= math.pi / 2 or spread >= 1.0:
+                boxes = [((max(low_lat, -90.0), -180.0), (min(high_lat, 90.0), 180.0))] #every longitude
+            else:
+                delta = math.degrees(math.asin(spread))
+                west = (point[1] - delta + 180) % 360 - 180
+                east = (point[1] + delta + 180) % 360 - 180
+                if west > east:
+                    boxes = [((low_lat, west), (high_lat, 180.0)), ((low_lat, -180.0), (high_lat, east))]
+                else:
+                    boxes = [((low_lat, west), (high_lat, east))]
+        found = []
+        for lower, upper in boxes:
+            for key, other in self._scan(lower, upper):
+                d = self.distance(point, other)
+                if d <= radius:
+                    found.append((d, key))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def near_segment(self, a, b, radius):
+        """
+        Finds the points within radius of the segment from a to b (the great
+        circle arc between them for haversine).
+
+        Args:
+            a (tuple): Start of the segment.
+            b (tuple): End of the segment.
+            radius (float): Search radius (kilometres for haversine).
+
+        Returns:
+            list: (distance, key) pairs in the order the segment passes them.
+        """
+        found = []
+        if self.metric == "euclidean":
+            dx, dy = b[0] - a[0], b[1] - a[1]
+            length = dx * dx + dy * dy
+            lower = (min(a[0], b[0]) - radius, min(a[1], b[1]) - radius)
+            upper = (max(a[0], b[0]) + radius, max(a[1], b[1]) + radius)
+            for key, point in self._scan(lower, upper):
+                t = 0.0 if length == 0 else min(1.0, max(0.0, ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / length))
+                d = math.hypot(point[0] - a[0] - t * dx, point[1] - a[1] - t * dy)
+                if d <= radius:
+                    found.append((t, d, key))
+        else:
+            #probes at most radius apart cover the corridor within radius * sqrt(1.25), exact distances filter it down
+            length = _haversine(a, b)
+            steps = max(1, math.ceil(length / radius)) if radius > 0 else 1
+            seen = set()
+            for k in range(steps + 1):
+                for _, key in self.within_radius(_interpolate(a, b, k / steps), radius * 1.2):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    along, d = _arc_position(a, b, self.points[key], length)
+                    if d <= radius:
+                        found.append((along, d, key))
+        found.sort(key=lambda hit: hit[:2])
+        return [(d, key) for _, d, key in found]
+
+    def nearest(self, point, k=1):
+        """
+        Finds the k points closest to point by searching ever wider radii.
+
+        Args:
+            point (tuple): Centre of the search.
+            k (int): Number of points wanted.
+
+        Returns:
+            list: Up to k (distance, key) pairs, nearest first.
+        """
+        radius = self.cell_size * (KM_PER_DEGREE if self.metric == "haversine" else 1.0)
+        while True:
+            found = self.within_radius(point, radius)
+            if len(found) >= min(k, len(self.points)):
+                return found[:k]
+            radius *= 2
+
+
+def _haversine(a, b):
+    lat_a, lat_b = math.radians(a[0]), math.radians(b[0])
+    h = math.sin((lat_b - lat_a) / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin(math.radians(b[1] - a[1]) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _unit(point):
+    lat, lon = math.radians(point[0]), math.radians(point[1])
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _interpolate(a, b, t):
+    #point a fraction t of the way along the great circle arc from a to b, in degrees
+    u, v = _unit(a), _unit(b)
+    angle = math.acos(max(-1.0, min(1.0, sum(p * q for p, q in zip(u, v)))))
+    if angle < 1e-12:
+        return a
+    wa, wb = math.sin((1 - t) * angle) / math.sin(angle), math.sin(t * angle) / math.sin(angle)
+    x, y, z = (wa * p + wb * q for p, q in zip(u, v))
+    return (math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x)))
+
+
+def _bearing(a, b):
+    lat_a, lat_b = math.radians(a[0]), math.radians(b[0])
+    dlon = math.radians(b[1] - a[1])
+    return math.atan2(math.sin(dlon) * math.cos(lat_b), math.cos(lat_a) * math.sin(lat_b) - math.sin(lat_a) * math.cos(lat_b) * math.cos(dlon))
+
+
+def _arc_position(a, b, point, length):
+    #(distance along the arc a -> b of its closest point to point, distance to it), both in kilometres
+    to_point = _haversine(a, point)
+    if length == 0:
+        return 0.0, to_point
+    angle = to_point / EARTH_RADIUS_KM
+    offset = _bearing(a, point) - _bearing(a, b)
+    cross = math.asin(max(-1.0, min(1.0, math.sin(angle) * math.sin(offset))))
+    along = math.acos(max(-1.0, min(1.0, math.cos(angle) / math.cos(cross)))) * EARTH_RADIUS_KM
+    if math.cos(offset) < 0:
+        return 0.0, to_point
+    if along > length:
+        return length, _haversine(b, point)
+    return along, abs(cross) * EARTH_RADIUS_KM
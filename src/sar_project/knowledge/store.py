@@ -0,0 +1,174 @@
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    x REAL,
+    y REAL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    ts REAL
+);
+"""
+
+UPSERT = """
+INSERT INTO records (kind, key, value, x, y) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (kind, key) DO UPDATE SET
+    value = excluded.value,
+    x = COALESCE(excluded.x, records.x),
+    y = COALESCE(excluded.y, records.y)
+"""
+
+
+class SQLiteStore:
+    def __init__(self, path, batch_size=1000):
+        """
+        SQLite backend for KnowledgeBase records and mission events.
+
+        The database runs in WAL mode so a committed batch is one sequential
+        append to the log and a crash only loses the batch still buffered.
+        Writes are buffered in memory (repeated updates of one key collapse
+        into one row) and flushed in a single transaction every batch_size
+        writes, on flush() and on close().
+
+        Args:
+            path (str): Database file, created if missing.
+            batch_size (int): Buffered writes that trigger a flush.
+        """
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)  # KnowledgeBase serialises access
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if "ts" not in [row[1] for row in self.conn.execute("PRAGMA table_info(events)")]:
+            self.conn.execute("ALTER TABLE events ADD COLUMN ts REAL")  # databases from before event timestamps were kept
+        self.conn.execute("CREATE INDEX IF NOT EXISTS events_ts ON events (ts)")
+        self.pending = {}  # (kind, key) -> (value, coords)
+        self.pending_events = []
+
+    def put(self, kind, key, value, coords=None):
+        """
+        Buffers an upsert of one record.
+
+        Args:
+            kind (str): Record family, e.g. "terrain".
+            key (str): Record key within the family.
+            value (dict): JSON serialisable record.
+            coords (tuple): Optional position, None keeps the stored one.
+        """
+        if coords is None:
+            coords = self.pending.get((kind, key), (None, None))[1]
+        self.pending[(kind, key)] = (value, coords)
+        self._maybe_flush()
+
+    def append_event(self, event, timestamp=None):
+        """
+        Buffers a mission event for the append-only events table.
+
+        Args:
+            event (dict): JSON serialisable event.
+            timestamp (float): Numeric event time, indexed so events(since=...)
+                can start at the tail of the table.
+        """
+        self.pending_events.append((event, timestamp))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self.pending) + len(self.pending_events) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered record and event in one transaction."""
+        if not self.pending and not self.pending_events:
+            return
+        rows = []
+        for (kind, key), (value, coords) in self.pending.items():
+            x, y = coords if coords is not None else (None, None)
+            rows.append((kind, key, json.dumps(value, default=str), x, y))
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+            self.conn.executemany("INSERT INTO events (event, ts) VALUES (?, ?)",
+                                  ((json.dumps(event, default=str), timestamp) for event, timestamp in self.pending_events))
+        self.pending = {}
+        self.pending_events = []
+
+    def get(self, kind, key):
+        """
+        Retrieves one record, buffered writes included.
+
+        Returns:
+            dict: The record, or None if it was never stored.
+        """
+        if (kind, key) in self.pending:
+            return self.pending[(kind, key)][0]
+        row = self.conn.execute("SELECT value FROM records WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def records(self, kind):
+        """
+        Retrieves every record of a kind, buffered writes included.
+
+        Returns:
+            list: (key, record) pairs.
+        """
+        self.flush()
+        rows = self.conn.execute("SELECT key, value FROM records WHERE kind = ?", (kind,))
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def positions(self, kind):
+        """
+        Retrieves the stored position of every record of a kind that has one.
+
+        Returns:
+            list: (key, (x, y)) pairs.
+        """
+        self.flush()
+        rows = self.conn.execute("SELECT key, x, y FROM records WHERE kind = ? AND x IS NOT NULL", (kind,))
+        return [(key, (x, y)) for key, x, y in rows]
+
+    def newest_timestamp(self):
+        """
+        Retrieves the latest event timestamp.
+
+        Returns:
+            float: The largest timestamp given to append_event, None if there is none.
+        """
+        self.flush()
+        return self.conn.execute("SELECT MAX(ts) FROM events").fetchone()[0]
+
+    def events(self, limit=None, since=None):
+        """
+        Retrieves logged mission events, oldest first.
+
+        Args:
+            limit (int): Only the most recent limit events, None for all of them.
+            since (float): Only events logged from the first one with a timestamp
+                of at least since on, None for all of them.
+
+        Returns:
+            list: Events as dicts.
+        """
+        self.flush()
+        first = 0
+        if since is not None:
+            first = self.conn.execute("SELECT MIN(seq) FROM events WHERE ts >= ?", (since,)).fetchone()[0]
+            if first is None:
+                return []
+        if limit is None:
+            rows = self.conn.execute("SELECT event FROM events WHERE seq >= ? ORDER BY seq", (first,))
+        else:
+            rows = self.conn.execute("SELECT event FROM (SELECT seq, event FROM events WHERE seq >= ? ORDER BY seq DESC LIMIT ?) ORDER BY seq",
+                                     (first, limit))
+        return [json.loads(event) for event, in rows]
+
+    def close(self):
+        """Flushes buffered writes and closes the database."""
+        self.flush()
+        self.conn.close()
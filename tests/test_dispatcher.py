@@ -0,0 +1,134 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+import pytest
+from src.sar_project.agents.dispatcher import Dispatcher
+from src.sar_project.agents.logistics_graph import Mission
+from src.sar_project.agents.logistics_simulation import LogisticsSimulation
+from src.sar_project.agents.weather_service import WeatherService
+
+
+class TestHandlerTables:
+    def test_weather_process_request(self):
+        service = WeatherService()
+        assert service.process_request({"get_forecast": True, "location": "a", "duration": "2h"})["duration"] == "2h"
+        assert service.process_request({"get_conditions": True})["error"] == "'location'"
+        assert service.process_request({"unknown": True}) == {"error": "Unknown request type"}
+
+    def test_logistics_process_request(self):
+        simulation = LogisticsSimulation()
+        mission = Mission("m")
+        mission.add_required_good("Rope", 5)
+        simulation.graph.add_mission(mission)
+        assert simulation.process_request({"get_requests": True}) == [("m", {"Rope": 5})]
+        assert simulation.process_request({"get_deliveries": True}) == simulation.calculate_deliveries()
+
+    def test_request_type_follows_table_order(self):
+        service = WeatherService()
+        assert service.request_type({"assess_risk": True, "get_conditions": True}) == "get_conditions"
+        assert service.request_type({"location": "a"}) is None
+
+
+class TestDispatcher:
+    @pytest.fixture
+    def dispatcher(self):
+        dispatcher = Dispatcher(max_queue=16)
+        dispatcher.register_agent(WeatherService())
+        dispatcher.register_agent(LogisticsSimulation())
+        return dispatcher
+
+    def test_request_type_matches_agent(self, dispatcher):
+        message = {"assess_risk": True, "get_conditions": True, "location": "ridge"}
+        assert dispatcher.request_type(message) == WeatherService().request_type(message) == "get_conditions"
+        assert dispatcher.request_type({"location": "ridge"}) is None
+
+    def test_routes_to_agents(self, dispatcher):
+        async def main():
+            async with dispatcher:
+                conditions = await dispatcher.request({"get_conditions": True, "location": "ridge"})
+                risk = await dispatcher.request({"assess_risk": True, "location": "ridge"})
+                requests = await dispatcher.request({"get_requests": True})
+            return conditions, risk, requests
+        conditions, risk, requests = asyncio.run(main())
+        assert conditions["location"] == "ridge"
+        assert risk["risk_level"] == 0
+        assert requests == []
+        stats = dispatcher.stats()
+        assert stats["get_conditions"]["count"] == 1
+        assert stats["assess_risk"]["p99_ms"] >= 0
+        assert stats["get_forecast"]["p50_ms"] is None
+
+    def test_errors_and_unknown_types(self, dispatcher):
+        async def main():
+            async with dispatcher:
+                with pytest.raises(KeyError):
+                    await dispatcher.request({"get_conditions": True})
+                with pytest.raises(ValueError):
+                    await dispatcher.submit({"nothing": True})
+        asyncio.run(main())
+        assert dispatcher.stats()["get_conditions"]["errors"] == 1
+
+    def test_duplicate_registration(self, dispatcher):
+        with pytest.raises(ValueError):
+            dispatcher.register_agent(WeatherService(name="second"))
+        dispatcher.register_agent(WeatherService(name="second"), request_types=[])
+
+    def test_slow_lane_does_not_block_others(self):
+        release = threading.Event()
+        dispatcher = Dispatcher()
+        dispatcher.register("slow", lambda message: release.wait(5))
+        dispatcher.register("fast", lambda message: message["fast"])
+
+        async def main():
+            async with dispatcher:
+                slow = await dispatcher.submit({"slow": True})
+                fast = await dispatcher.request({"fast": 7})
+                done = slow.done()
+                release.set()
+                await slow
+            return fast, done
+        assert asyncio.run(main()) == (7, False)
+
+    def test_backpressure(self):
+        release = threading.Event()
+        dispatcher = Dispatcher(max_queue=2, max_batch=1)
+        dispatcher.register("work", lambda message: release.wait(5))
+
+        async def main():
+            async with dispatcher:
+                futures = [await dispatcher.submit({"work": True}) for _ in range(3)] # one running, two queued
+                blocked = asyncio.ensure_future(dispatcher.submit({"work": True}))
+                await asyncio.sleep(0.05)
+                was_blocked = not blocked.done()
+                release.set()
+                futures.append(await blocked)
+                await asyncio.gather(*futures)
+            return was_blocked
+        assert asyncio.run(main())
+        assert dispatcher.stats()["work"]["count"] == 4
+
+    def test_inline_handlers_and_throughput(self):
+        dispatcher = Dispatcher(max_queue=1024)
+        dispatcher.register_agent(WeatherService(), blocking=False)
+        count = 20000
+
+        async def main():
+            async with dispatcher:
+                start = time.perf_counter()
+                futures = [await dispatcher.submit({"assess_risk": True, "location": i % 10}) for i in range(count)]
+                await asyncio.gather(*futures)
+                return time.perf_counter() - start
+        elapsed = asyncio.run(main())
+        assert dispatcher.stats()["assess_risk"]["count"] == count
+        assert count / elapsed > 10000
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            dispatcher = Dispatcher(executor=pool)
+            dispatcher.register("size", len)
+
+            async def main():
+                async with dispatcher:
+                    return await asyncio.gather(*[dispatcher.request({"size": True, "x": i}) for i in range(5)])
+            assert asyncio.run(main()) == [2] * 5
@@ -0,0 +1,239 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import math
+import random
+import pytest
+from src.sar_project.knowledge.knowledge_base import KnowledgeBase
+from src.sar_project.knowledge.mission_history import MissionHistory
+from src.sar_project.knowledge.spatial_index import SpatialIndex
+from src.sar_project.knowledge.store import SQLiteStore
+
+class TestMissionHistory:
+    @pytest.fixture
+    def kb(self):
+        return KnowledgeBase(MissionHistory(segment_size=4))
+
+    def test_log_and_history(self, kb):
+        kb.log_mission_event({"timestamp": 1, "action": "launch"})
+        kb.log_mission_event({"action": "no timestamp"})
+        assert kb.get_mission_history() == [{"timestamp": 1, "action": "launch"}, {"action": "no timestamp"}]
+
+    def test_range_queries(self, kb):
+        events = [{"timestamp": t, "location": "hub" + str(t % 3), "type": "delivery" if t % 2 else "sighting"} for t in range(20)]
+        for event in events:
+            kb.log_mission_event(event)
+        kb.log_mission_event({"timestamp": 3, "location": "hub0", "type": "late"}) #out of order
+        events.append({"timestamp": 3, "location": "hub0", "type": "late"})
+        for t0, t1, location, event_type in [(2, 9, None, None), (5, 15, "hub1", None), (None, 6, "hub0", "sighting"),
+                                            (3, 3, None, None), (12, None, None, "delivery"), (50, 60, None, None)]:
+            expected = [e for e in events if (t0 is None or e["timestamp"] >= t0) and (t1 is None or e["timestamp"] <= t1)
+                        and location in (None, e["location"]) and event_type in (None, e["type"])]
+            assert kb.query_mission_events(t0, t1, location, event_type) == expected
+
+    def test_mixed_timestamp_types(self, kb):
+        kb.log_mission_event({"timestamp": 1, "type": "launch"})
+        with pytest.raises(TypeError):
+            kb.log_mission_event({"timestamp": "2024-01-01T00:00", "type": "sighting"})
+        kb.log_mission_event({"timestamp": 2.5, "type": "landing"})
+        assert [e["type"] for e in kb.query_mission_events(0, 3)] == ["launch", "landing"] #the rejected event left nothing behind
+
+    def test_retention_and_spill(self, tmp_path):
+        history = MissionHistory(segment_size=5, max_segments=2, spill_path=tmp_path / "history.jsonl")
+        for t in range(23):
+            history.append({"timestamp": t, "location": "hub", "type": "tick"})
+        assert len(history) == 8 and len(history.segments) == 2
+        assert [e["timestamp"] for e in history] == list(range(15, 23))
+        with open(tmp_path / "history.jsonl") as f:
+            assert [json.loads(line)["timestamp"] for line in f] == list(range(15))
+        assert [e["timestamp"] for e in history.events_between(12, 16, include_spilled=True)] == [12, 13, 14, 15, 16]
+
+    def test_time_retention(self):
+        history = MissionHistory(segment_size=2, retention=5)
+        for t in range(12):
+            history.append({"timestamp": t})
+        assert min(e["timestamp"] for e in history) >= 11 - 5 - 1
+        assert history.evicted + len(history) == 12
+
+
+class TestSpatialQueries:
+    @pytest.fixture
+    def kb(self):
+        kb = KnowledgeBase(cell_size=2.0)
+        rng = random.Random(5)
+        for i in range(200):
+            kb.update_terrain("site" + str(i), {"elevation": i}, (rng.uniform(-20, 20), rng.uniform(-20, 20)))
+        kb.update_terrain("unplaced", {"elevation": -1})
+        return kb
+
+    def test_matches_scan(self, kb):
+        points = kb.spatial["terrain"].points
+        rng = random.Random(8)
+        for _ in range(20):
+            centre = (rng.uniform(-25, 25), rng.uniform(-25, 25))
+            by_distance = sorted((math.dist(centre, p), name) for name, p in points.items())
+            assert [name for _, name, _ in kb.nearest("terrain", centre, 3)] == [name for _, name in by_distance[:3]]
+            assert {name for _, name, _ in kb.within_radius("terrain", centre, 6)} == {name for d, name in by_distance if d <= 6}
+            lower, upper = (centre[0] - 3, centre[1] - 5), (centre[0] + 4, centre[1] + 2)
+            assert set(kb.within_bbox("terrain", lower, upper)) == {name for name, p in points.items()
+                                                                    if lower[0] <= p[0] <= upper[0] and lower[1] <= p[1] <= upper[1]}
+
+    def test_updates_and_corridor(self, kb):
+        kb.update_terrain("site0", {"elevation": 99}, (100, 100))
+        kb.update_terrain("site0", {"elevation": 98})
+        assert kb.nearest("terrain", (101, 100)) == [(1.0, "site0", {"elevation": 98})]
+        kb.update_weather("storm", {"wind_speed": 40}, (50, 50))
+        kb.update_weather("calm", {"wind_speed": 2}, (60, 50))
+        assert list(kb.along_route("weather", [(49, 50), (55, 50), (61, 50)], 2)) == ["storm", "calm"]
+        assert kb.query_terrain("unplaced") == {"elevation": -1}
+        with pytest.raises(ValueError):
+            kb.nearest("resources", (0, 0))
+
+    def test_corridor_between_waypoints(self, kb):
+        kb.update_weather("midway", {"wind_speed": 30}, (5, 0))
+        kb.update_weather("far", {"wind_speed": 1}, (5, 1.5))
+        assert list(kb.along_route("weather", [(0, 0), (10, 0)], 1)) == ["midway"]
+        points = kb.spatial["terrain"].points
+        route = [(-18, -18), (15, -5), (0, 12), (-10, 4)]
+        def segment_distance(p, a, b):
+            dx, dy = b[0] - a[0], b[1] - a[1]
+            t = min(1, max(0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)))
+            return math.dist(p, (a[0] + t * dx, a[1] + t * dy))
+        expected = {name for name, p in points.items() if min(segment_distance(p, a, b) for a, b in zip(route, route[1:])) <= 1.5}
+        assert set(kb.along_route("terrain", route, 1.5)) == expected
+        assert len(expected) > 10
+
+    def test_haversine_corridor(self):
+        index = SpatialIndex(cell_size=0.5, metric="haversine")
+        index.insert("on_route", (0.05, 1.0)) #about 5.6 km north of the equator
+        index.insert("outside", (0.15, 1.0)) #about 16.7 km
+        index.insert("behind", (0.0, -0.05))
+        index.insert("start", (0.0, 0.2))
+        found = index.near_segment((0.0, 0.0), (0.0, 2.0), 10)
+        assert [key for _, key in found] == ["behind", "start", "on_route"]
+        assert found[2][0] == pytest.approx(5.56, abs=0.01)
+
+    def test_haversine(self):
+        index = SpatialIndex(cell_size=1.0, metric="haversine")
+        index.insert("east", (0.0, 179.9))
+        index.insert("west", (0.0, -179.9))
+        index.insert("pole", (89.9, 0.0))
+        nearby = index.within_radius((0.0, 179.95), 20)
+        assert [key for _, key in nearby] == ["east", "west"]
+        assert nearby[1][0] == pytest.approx(16.68, abs=0.01)
+        assert index.within_bbox((-1, 179), (1, -179)) == ["east", "west"]
+        assert index.nearest((89.0, 120.0))[0][1] == "pole"
+
+
+class TestPersistentStore:
+    def test_restart(self, tmp_path):
+        kb = KnowledgeBase(store=SQLiteStore(tmp_path / "kb.sqlite", batch_size=50))
+        for i in range(120):
+            kb.update_weather("station" + str(i % 10), {"wind_speed": i}, (i % 10, 0) if i < 10 else None)
+            kb.log_mission_event({"timestamp": i, "location": "station" + str(i % 10), "type": "reading"})
+        kb.update_terrain("ridge", {"elevation": 900}, (3.2, 0.5))
+        kb.update_resource_status("drone1", {"available": True})
+        kb.close()
+
+        store = SQLiteStore(tmp_path / "kb.sqlite")
+        restarted = KnowledgeBase(MissionHistory(segment_size=10, max_segments=3), store=store)
+        assert restarted.weather_data == {} #nothing loaded until it is asked for
+        assert restarted.query_weather("station4") == {"wind_speed": 114}
+        assert restarted.query_resource_status("drone1") == {"available": True}
+        assert restarted.query_terrain("missing") == {}
+        nearby = restarted.within_radius("weather", (4, 0), 1)
+        assert nearby[0][1:] == ("station4", {"wind_speed": 114})
+        assert {location for _, location, _ in nearby[1:]} == {"station3", "station5"}
+        assert restarted.nearest("terrain", (3, 0))[0][1:] == ("ridge", {"elevation": 900})
+        assert [e["timestamp"] for e in restarted.get_mission_history()] == list(range(90, 120))
+        restarted.close()
+
+    def test_restart_with_retention(self, tmp_path):
+        spill = tmp_path / "history.jsonl"
+        kb = KnowledgeBase(MissionHistory(segment_size=5, retention=20, spill_path=spill), store=SQLiteStore(tmp_path / "kb.sqlite"))
+        for t in range(100):
+            kb.log_mission_event({"timestamp": t, "type": "reading"})
+        kb.close()
+        with open(spill) as f:
+            spilled = f.read()
+        for _ in range(2):
+            store = SQLiteStore(tmp_path / "kb.sqlite")
+            assert [e["timestamp"] for e in store.events(since=99 - 20)] == list(range(79, 100)) #the tail retention keeps
+            restarted = KnowledgeBase(MissionHistory(segment_size=5, retention=20, spill_path=spill), store=store)
+            assert [e["timestamp"] for e in restarted.get_mission_history()] == list(range(79, 100))
+            restarted.close()
+            with open(spill) as f:
+                assert f.read() == spilled #already spilled events are not written again
+
+    def test_batched_writes(self, tmp_path):
+        store = SQLiteStore(tmp_path / "kb.sqlite", batch_size=1000)
+        kb = KnowledgeBase(store=store)
+        for i in range(500):
+            kb.update_weather("station", {"wind_speed": i})
+        assert store.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 0
+        assert store.get("weather", "station") == {"wind_speed": 499}
+        kb.flush()
+        assert store.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 1
+        kb.close()
+
+
+class TestSnapshots:
+    def test_point_in_time(self):
+        kb = KnowledgeBase(MissionHistory(segment_size=2))
+        kb.update_weather("ridge", {"wind_speed": 10})
+        kb.log_mission_event({"timestamp": 1, "type": "launch"})
+        before = kb.snapshot()
+        assert kb.snapshot() is before #nothing changed, same view
+        kb.update_weather("ridge", {"wind_speed": 50})
+        kb.update_weather("valley", {"wind_speed": 5})
+        for t in range(2, 6):
+            kb.log_mission_event({"timestamp": t, "type": "reading"})
+        assert before.query_weather("ridge") == {"wind_speed": 10}
+        assert before.query_weather("valley") == {}
+        assert before.get_mission_history() == [{"timestamp": 1, "type": "launch"}]
+        after = kb.snapshot()
+        assert after.query_weather("ridge") == {"wind_speed": 50}
+        assert [e["timestamp"] for e in after.query_mission_events(3, None, event_type="reading")] == [3, 4, 5]
+        with pytest.raises(TypeError):
+            after.weather_data["ridge"] = {}
+
+    def test_with_store(self, tmp_path):
+        kb = KnowledgeBase(store=SQLiteStore(tmp_path / "kb.sqlite"))
+        kb.update_terrain("ridge", {"elevation": 900})
+        kb.update_terrain("east", {"elevation": 40})
+        kb.close()
+        restarted = KnowledgeBase(store=SQLiteStore(tmp_path / "kb.sqlite"))
+        assert restarted.query_terrain("ridge") == {"elevation": 900}
+        assert restarted.version == 0 #filling the cache is not a write
+        snapshot = restarted.snapshot()
+        assert snapshot.query_terrain("east") == {"elevation": 40} #never queried, still in the view
+        assert restarted.query_terrain("east") == {"elevation": 40}
+        assert restarted.snapshot() is snapshot
+        restarted.update_terrain("east", {"elevation": 45})
+        assert snapshot.query_terrain("east") == {"elevation": 40}
+        assert restarted.snapshot().query_terrain("east") == {"elevation": 45}
+        restarted.close()
+
+    def test_threads(self):
+        kb = KnowledgeBase(thread_safe=True)
+
+        def writer(w):
+            for i in range(200):
+                with kb.batch(): #a reader sees both updates or neither
+                    kb.update_resource_status("drone" + str(w), {"step": i})
+                    kb.update_resource_status("truck" + str(w), {"step": i})
+                kb.log_mission_event({"timestamp": i, "location": "w" + str(w)})
+
+        def reader(_):
+            for _ in range(200):
+                snapshot = kb.snapshot()
+                for w in range(4):
+                    assert snapshot.query_resource_status("drone" + str(w)) == snapshot.query_resource_status("truck" + str(w))
+                assert len(snapshot.get_mission_history()) <= 800
+            return True
+
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(writer, w) for w in range(4)] + [pool.submit(reader, r) for r in range(4)]
+        for future in futures:
+            future.result() #re-raises a failed assertion from the thread
+        assert len(kb.get_mission_history()) == 800
+        assert kb.snapshot().query_resource_status("drone3") == {"step": 199}
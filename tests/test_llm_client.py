@@ -0,0 +1,190 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import pytest
+from src.sar_project.agents.llm_client import (BatchingClient, CachedModelClient, HTTPModelClient, ModelClient,
+                                               ResponseCache, llm_request, request_key)
+from src.sar_project.agents.weather_agent import WeatherAgent
+
+
+def stub_reply(body):
+    return {"choices": [{"message": {"role": "assistant", "content": "echo: " + body["messages"][-1]["content"]}}]}
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.calls.append(self.path)
+        if self.path == "/batch":
+            reply = {"responses": [stub_reply(request) for request in body["requests"]]}
+        else:
+            reply = stub_reply(body)
+        data = json.dumps(reply).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class EchoClient(ModelClient):
+    def __init__(self, supports_batch=False, delay=0.0):
+        self.supports_batch = supports_batch
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def complete_batch(self, requests):
+        with self.lock:
+            self.calls.append(len(requests))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return ["echo: " + request["messages"][-1]["content"] for request in requests]
+
+    def complete(self, request):
+        return self.complete_batch([request])[0]
+
+
+def request(text, temperature=0.7, seed=42):
+    return llm_request([{"role": "system", "content": "sys"}, {"role": "user", "content": text}],
+                       {"model": "gpt-4", "temperature": temperature, "seed": seed})
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubModelHandler)
+    server.calls = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestResponseCache:
+    def test_key_covers_model_prompt_and_sampling(self):
+        base = request_key(request("hi"))
+        assert request_key(request("hi")) == base
+        assert request_key(request("hello")) != base
+        assert request_key(request("hi", temperature=0.0)) != base
+        assert request_key(request("hi", seed=7)) != base
+        other_model = llm_request(request("hi")["messages"], {"model": "gpt-3.5", "temperature": 0.7, "seed": 42})
+        assert request_key(other_model) != base
+        with_context = llm_request([{"role": "user", "content": "hi", "context": {"x": 1}}], {"config_list": [{"model": "m"}]})
+        assert with_context["messages"] == [{"role": "user", "content": "hi"}]
+        assert with_context["model"] == "m"
+
+    def test_roundtrip_and_persistence(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, "reply")
+        cache.put("cd" * 32, {"name": "f", "arguments": "{}"})
+        assert cache.get("ab" * 32) == "reply"
+        reopened = ResponseCache(tmp_path)
+        assert len(reopened) == 2
+        assert reopened.get("cd" * 32) == {"name": "f", "arguments": "{}"}
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=200)
+        keys = [request_key(request(str(i))) for i in range(4)]
+        for key in keys[:3]:
+            cache.put(key, "x" * 40)
+        cache.get(keys[0])
+        cache.put(keys[3], "x" * 40)
+        assert cache.size <= 200
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "x" * 40
+        assert cache.get(keys[3]) == "x" * 40
+        assert len(ResponseCache(tmp_path)) == len(cache)
+
+    def test_cached_client_only_sends_misses(self, tmp_path):
+        upstream = EchoClient()
+        client = CachedModelClient(upstream, ResponseCache(tmp_path))
+        assert client.complete_batch([request("a"), request("b")]) == ["echo: a", "echo: b"]
+        assert client.complete_batch([request("a"), request("c")]) == ["echo: a", "echo: c"]
+        assert upstream.calls == [2, 1]
+
+    def test_agent_replay_runs_from_cache(self, server, tmp_path):
+        url = "http://127.0.0.1:" + str(server.server_address[1])
+        messages = [{"role": "user", "content": "wind at the ridge?"}]
+        agent = WeatherAgent()
+        agent.set_llm_client(HTTPModelClient(url), cache=ResponseCache(tmp_path))
+        assert agent.generate_reply(messages=messages) == "echo: wind at the ridge?"
+        assert server.calls == ["/chat/completions"]
+        replay = WeatherAgent()
+        replay.set_llm_client(HTTPModelClient(url), cache=ResponseCache(tmp_path))
+        assert replay.generate_reply(messages=messages) == "echo: wind at the ridge?"
+        assert len(server.calls) == 1
+
+    def test_without_client_autogen_reply_is_untouched(self):
+        agent = WeatherAgent()
+        assert agent.llm_client is None
+        assert agent.generate_client_reply(messages=[{"role": "user", "content": "hi"}]) == (False, None)
+
+
+class TestBatchingClient:
+    def test_groups_concurrent_requests(self):
+        upstream = EchoClient(supports_batch=True, delay=0.01)
+        client = BatchingClient(upstream, max_batch=8, max_wait=0.05, max_concurrency=2)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = [pool.submit(client.complete, request(str(i))) for i in range(16)]
+            replies = [future.result() for future in futures]
+        client.close()
+        assert replies == ["echo: " + str(i) for i in range(16)]
+        assert sum(upstream.calls) == 16
+        assert client.upstream_calls < 16
+        assert max(upstream.calls) <= 8
+
+    def test_merges_identical_requests(self):
+        upstream = EchoClient(supports_batch=True)
+        client = BatchingClient(upstream, max_wait=0.05)
+        futures = [client.submit(request("same")) for _ in range(10)]
+        assert {future.result() for future in futures} == {"echo: same"}
+        client.close()
+        assert upstream.calls == [1]
+
+    def test_concurrency_limit(self):
+        upstream = EchoClient(delay=0.02)
+        client = BatchingClient(upstream, max_wait=0.01, max_concurrency=3)
+        futures = [client.submit(request(str(i))) for i in range(12)]
+        assert [future.result() for future in futures] == ["echo: " + str(i) for i in range(12)]
+        client.close()
+        assert upstream.peak <= 3
+        assert len(upstream.calls) == 12
+
+    def test_errors_reach_every_caller(self):
+        class Failing(ModelClient):
+            def complete(self, request):
+                raise RuntimeError("upstream down")
+        client = BatchingClient(Failing(), max_wait=0.01)
+        futures = [client.submit(request("a")), client.submit(request("a"))]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+        client.close()
+
+    def test_closed_client_raises(self):
+        client = BatchingClient(EchoClient(), max_wait=0.01)
+        assert client.complete(request("a")) == "echo: a"
+        client.close()
+        with pytest.raises(RuntimeError):
+            client.complete(request("b"))
+        client.close() #closing twice is fine
+
+    def test_http_batch_endpoint(self, server):
+        upstream = HTTPModelClient("http://127.0.0.1:" + str(server.server_address[1]), batch_path="/batch")
+        client = BatchingClient(upstream, max_wait=0.05)
+        futures = [client.submit(request(str(i))) for i in range(5)]
+        assert [future.result() for future in futures] == ["echo: " + str(i) for i in range(5)]
+        client.close()
+        assert server.calls == ["/batch"]
@@ -154,4 +154,367 @@ class TestLogisticAgent:
         agent.make_delivery("Steel", 10, [supplier, hub1])
         agent.run_time_tick()
         assert graph.get_good_transit()[1] == ("Rope", hub2, mission, 10, [supplier, hub2, mission], 2)
-        assert graph.get_good_transit()[0] == ("Steel", supplier, hub1, 10, [supplier, hub1], 2)
\ No newline at end of file
+        assert graph.get_good_transit()[0] == ("Steel", supplier, hub1, 10, [supplier, hub1], 2)
+
+    def test_graph_pathing_heap_matches_dijkstra(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub1 = Hub("hub1")
+        hub2 = Hub("hub2")
+        mission = Mission("mission1")
+        supplier.update_connections(hub1, 3)
+        hub1.update_connections(supplier, 3)
+        supplier.update_connections(hub2, 2)
+        hub2.update_connections(supplier, 2)
+        hub1.update_connections(mission, 2)
+        mission.update_connections(hub1, 2)
+        hub2.update_connections(mission, 2)
+        mission.update_connections(hub2, 2)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub1)
+        graph.add_mission(mission)
+        graph.add_hub(hub2)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 1)
+        assert agent.calculate_deliveries(method="heap") == agent.calculate_deliveries()
+        assert agent.calculate_deliveries(method="heap") == {mission : {"Rope" : [supplier, hub2, mission]}}
+
+    def test_graph_pathing_heap_nearest_supplier(self, agent):
+        graph = agent.get_graph()
+        near = Supplier("near")
+        far = Supplier("far")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        near.update_connections(hub, 1)
+        far.update_connections(hub, 5)
+        hub.update_connections(mission, 2)
+        graph.add_supplier(near)
+        graph.add_supplier(far)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        near.add_provided_good("Rope")
+        far.add_provided_good("Rope")
+        mission.add_required_good("Rope", 1)
+        assert agent.calculate_deliveries(method="heap") == {mission : {"Rope" : [near, hub, mission]}}
+
+    def test_graph_pathing_heap_fail(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 2)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 1)
+        assert agent.calculate_deliveries(method="heap") == "Unable to find path for mission mission1"
+
+    def test_graph_adjacency(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(mission, 3)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        adjacency = graph.get_adjacency()
+        s, h, m = graph.get_node_id(supplier), graph.get_node_id(hub), graph.get_node_id(mission)
+        assert list(adjacency.neighbours(s)) == [(h, 2)]
+        hub.update_connections(mission, 5)
+        assert graph.get_adjacency() is adjacency #weight change patched in place
+        assert list(adjacency.neighbours(h)) == [(m, 5)]
+        hub.remove_connection(mission)
+        assert list(graph.get_adjacency().neighbours(h)) == []
+        mission.update_connections(hub, 1)
+        assert list(graph.get_adjacency().neighbours(m)) == [(h, 1)]
+        graph.remove_hub(hub)
+        assert graph.get_node_id(mission) == m #ids stay stable across removals
+        assert list(graph.get_adjacency().neighbours(m)) == []
+
+    def test_graph_path_tree_cache(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(mission, 3)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        dist, prev = graph.get_shortest_path_tree([supplier])
+        assert dist[graph.get_node_id(mission)] == 5
+        version = graph.version
+        supplier.add_provided_good("Steel")
+        assert graph.version > version
+        assert graph.get_shortest_path_tree([supplier])[0] is dist #goods changes keep the trees
+        hub.update_connections(mission, 1)
+        dist, prev = graph.get_shortest_path_tree([supplier])
+        assert dist[graph.get_node_id(mission)] == 3
+
+    def test_graph_time_step_heap(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 1)
+        hub.update_connections(mission, 1)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 15)
+        agent.routing_method = "heap"
+        agent.run_time_tick()
+        agent.run_time_tick()
+        assert mission.get_required_goods() == {}
+        assert [transit[0:4] for transit in graph.get_good_transit()] == [("Rope", hub, mission, 10), ("Rope", supplier, hub, 10)]
+
+    def test_event_driven_matches_ticks(self, agent):
+        event_agent = LogisticsAgent(event_driven=True)
+        for curr_agent in (agent, event_agent):
+            graph = curr_agent.get_graph()
+            supplier = Supplier("supply1")
+            hub = Hub("hub1")
+            mission = Mission("mission1")
+            supplier.update_connections(hub, 2)
+            hub.update_connections(mission, 3)
+            graph.add_supplier(supplier)
+            graph.add_hub(hub)
+            graph.add_mission(mission)
+            supplier.add_provided_good("Rope")
+            supplier.add_provided_good("Water")
+            mission.add_required_good("Rope", 5)
+            mission.add_required_good("Water", 5)
+            for _ in range(3):
+                curr_agent.run_time_tick()
+            assert [transit[0:3] for transit in graph.get_good_transit()] == [("Rope", hub, mission), ("Water", hub, mission)]
+            for _ in range(3):
+                curr_agent.run_time_tick()
+            assert graph.get_good_transit() == []
+            assert mission.get_curr_store() == {"Rope" : 10, "Water" : 10}
+
+    def test_event_driven_advance_to(self):
+        agent = LogisticsAgent(event_driven=True)
+        agent.aftershock_time = None
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        mission = Mission("mission1")
+        supplier.update_connections(mission, 500)
+        graph.add_supplier(supplier)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        agent.run_time_tick()
+        assert agent.advance_to(10000) == 10000
+        assert mission.get_curr_store() == {"Rope" : 10}
+        assert graph.get_good_transit() == []
+
+    def test_event_driven_aftershock(self):
+        agent = LogisticsAgent(event_driven=True)
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 8)
+        hub.update_connections(mission, 8)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        agent.run_time_tick()
+        agent.advance_to(10)
+        assert len(graph.get_good_transit()) == 1
+        agent.run_time_tick() #the van dies, the mission asks again and a new one leaves
+        assert graph.get_good_transit() == [("Rope", supplier, hub, 10, [supplier, hub, mission], 10)]
+
+    def test_event_driven_leg_weight_change(self, agent):
+        event_agent = LogisticsAgent(event_driven=True)
+        for curr_agent in (agent, event_agent):
+            curr_agent.aftershock_time = None
+            graph = curr_agent.get_graph()
+            supplier = Supplier("supply1")
+            hub = Hub("hub1")
+            mission = Mission("mission1")
+            supplier.update_connections(hub, 8)
+            hub.update_connections(mission, 1)
+            graph.add_supplier(supplier)
+            graph.add_hub(hub)
+            graph.add_mission(mission)
+            supplier.add_provided_good("Rope")
+            mission.add_required_good("Rope", 5)
+            curr_agent.run_time_tick()
+            shipment = graph.get_good_transit()[0]
+            supplier.update_connections(hub, 2) #the road clears while the van is on it
+            assert graph.goods_in_transit.on_leg(supplier, hub) == [shipment]
+            while shipment.destination is hub:
+                curr_agent.run_time_tick()
+            assert curr_agent.time == 3
+            supplier.update_connections(hub, 8) #legs already travelled are not rescheduled
+            while graph.get_good_transit():
+                curr_agent.run_time_tick()
+            assert curr_agent.time == 4
+            assert mission.get_curr_store() == {"Rope" : 10}
+
+    def test_event_driven_road_closed_under_shipment(self):
+        event_agent = LogisticsAgent(event_driven=True)
+        event_agent.aftershock_time = None
+        graph = event_agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(mission, 1)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        event_agent.run_time_tick()
+        shipment = graph.get_good_transit()[0]
+        supplier.remove_connection(hub) #the van is stranded on the closed road
+        assert event_agent.advance_to(10) == 10
+        assert graph.get_good_transit() == [shipment]
+
+    def test_transit_indexes(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission1 = Mission("mission1")
+        mission2 = Mission("mission2")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(mission1, 3)
+        hub.update_connections(mission2, 3)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission1)
+        graph.add_mission(mission2)
+        supplier.add_provided_good("Rope")
+        supplier.add_provided_good("Water")
+        rope = agent.make_delivery("Rope", 10, [supplier, hub, mission1])
+        water = agent.make_delivery("Water", 5, [supplier, hub, mission2])
+        assert graph.in_transit_to(mission1) == [rope]
+        assert graph.in_transit_of("Water") == [water]
+        assert graph.in_transit_to(hub) == []
+        assert graph.get_shipment(water.id) is water
+        assert rope.leg == 1 and rope.get_final_destination() == mission1
+        twin = agent.make_delivery("Rope", 10, [supplier, hub, mission1])
+        assert twin != rope and twin.as_tuple() == rope.as_tuple() #shipments are distinct vans even with the same load
+        assert len({rope, twin}) == 2
+        graph.remove_good_transit(twin)
+        graph.remove_good_transit(("Water", supplier, hub, 5, [supplier, hub, mission2], 0))
+        assert graph.in_transit_of("Water") == []
+        assert graph.get_good_transit() == [("Rope", supplier, hub, 10, [supplier, hub, mission1], 0)]
+
+    def test_graph_pathing_parallel(self, agent):
+        graph = agent.get_graph()
+        rope = Supplier("rope")
+        water = Supplier("water")
+        hub = Hub("hub1")
+        mission1 = Mission("mission1")
+        mission2 = Mission("mission2")
+        rope.update_connections(hub, 1)
+        water.update_connections(hub, 2)
+        hub.update_connections(mission1, 2)
+        hub.update_connections(mission2, 3)
+        for supplier in (rope, water):
+            graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission1)
+        graph.add_mission(mission2)
+        rope.add_provided_good("Rope")
+        water.add_provided_good("Water")
+        for mission in (mission1, mission2):
+            mission.add_required_good("Rope", 1)
+            mission.add_required_good("Water", 1)
+        try:
+            parallel = agent.calculate_deliveries(method="heap", workers=2)
+            router = agent.router
+            pool, block = router.pool, router.block
+            rope.update_connections(hub, 4) #same shape, the workers see the new weights in place
+            assert agent.calculate_deliveries(method="heap", workers=2)[mission2]["Rope"] == [rope, hub, mission2]
+            assert agent.router is router and router.pool is pool and router.block is block
+            shortcut = Hub("shortcut")
+            graph.add_hub(shortcut)
+            rope.update_connections(shortcut, 1)
+            shortcut.update_connections(mission2, 1) #new shape, a new block but still the same workers
+            assert agent.calculate_deliveries(method="heap", workers=2)[mission2]["Rope"] == [rope, shortcut, mission2]
+            assert router.pool is pool and router.block is not block
+            graph.remove_hub(shortcut)
+        finally:
+            agent.close_router()
+        rope.update_connections(hub, 1)
+        assert parallel == agent.calculate_deliveries(method="heap")
+        assert parallel[mission1] == {"Rope" : [rope, hub, mission1], "Water" : [water, hub, mission1]}
+
+    def test_parallel_router_after_load_snapshot(self, agent, tmp_path):
+        graph = agent.get_graph()
+        rope = Supplier("rope")
+        water = Supplier("water")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        for supplier, good in ((rope, "Rope"), (water, "Water")):
+            graph.add_supplier(supplier)
+            supplier.add_provided_good(good)
+            supplier.update_connections(hub, 1)
+            supplier.update_connections(mission, 5)
+            mission.add_required_good(good, 1)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        hub.update_connections(mission, 1)
+        agent.save_snapshot(tmp_path / "state.snap")
+        rope.update_connections(hub, 9)
+        try:
+            assert agent.calculate_deliveries(method="heap", workers=2)[mission]["Rope"] == [rope, mission]
+            restored = agent.load_snapshot(tmp_path / "state.snap") #a new graph, even where it reuses the old address and version
+            assert restored.graph_id != graph.graph_id
+            rope, water, hub, mission = restored.get_nodes()
+            assert agent.calculate_deliveries(method="heap", workers=2)[mission]["Rope"] == [rope, hub, mission]
+            assert agent.router.key == (restored.graph_id, restored.topology_version)
+        finally:
+            agent.close_router()
+        with pytest.raises(ValueError):
+            agent.calculate_deliveries(method="astar", workers=2) #only the heap method fans out
+
+    def test_goods_index(self, agent):
+        graph = agent.get_graph()
+        supplier1 = Supplier("supply1")
+        supplier2 = Supplier("supply2")
+        hub = Hub("hub1")
+        supplier1.add_provided_good("Rope")
+        graph.add_supplier(supplier1)
+        graph.add_supplier(supplier2)
+        graph.add_hub(hub)
+        supplier2.add_provided_good("Rope")
+        supplier2.add_provided_good("Water")
+        assert graph.suppliers_of("Rope") == [supplier1, supplier2]
+        assert graph.suppliers_of("Steel") == []
+        supplier2.remove_provided_good("Rope")
+        assert graph.suppliers_of("Rope") == [supplier1]
+        hub.recieve_good("Water", 3)
+        assert graph.hubs_with("Water") == [hub]
+        assert graph.sources_of("Water") == [supplier2, hub]
+        hub.ship_good("Water", 5)
+        assert graph.hubs_with("Water") == []
+        graph.remove_supplier(supplier1)
+        assert graph.suppliers_of("Rope") == []
+
+    def test_default_pathing_keeps_supplier_order(self, agent):
+        graph = agent.get_graph()
+        supplier1 = Supplier("supply1")
+        supplier2 = Supplier("supply2")
+        mission = Mission("mission1")
+        graph.add_supplier(supplier1)
+        graph.add_supplier(supplier2)
+        graph.add_mission(mission)
+        supplier1.update_connections(mission, 1)
+        supplier2.update_connections(mission, 5)
+        supplier2.add_provided_good("Rope")
+        supplier1.add_provided_good("Rope")
+        assert graph.suppliers_of("Rope") == [supplier1, supplier2] #graph order, not the order they took the good on
+        mission.add_required_good("Rope", 10)
+        assert agent.calculate_deliveries()[mission]["Rope"] == [supplier2, mission] #the last supplier in graph order wins, as it always has
@@ -0,0 +1,55 @@
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_batch import BatchSimulation, Scenario
+from src.sar_project.agents.logistics_routing import INF
+
+class TestBatchSimulation:
+    @pytest.fixture
+    def agent(self):
+        agent = LogisticsAgent()
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(mission, 3)
+        supplier.update_connections(mission, 20)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 15)
+        return agent
+
+    def test_base_scenario_matches_agent(self, agent):
+        graph = agent.get_graph()
+        mission = graph.get_missions()[0]
+        result = BatchSimulation(graph, [Scenario("base")]).run(8)
+        for _ in range(8):
+            agent.run_time_tick()
+        assert result.latency.tolist() == [[5]]
+        assert result.first_delivery.tolist() == [[5]]
+        assert result.delivered.tolist() == [[mission.get_curr_store()["Rope"]]]
+        assert result.unmet_demand[0].tolist() == [15, 15, 15, 15, 15, 5, 0, 0]
+
+    def test_disruptions(self, agent):
+        graph = agent.get_graph()
+        supplier, hub, mission = graph.get_nodes()
+        scenarios = [
+            Scenario("base"),
+            Scenario("road_closed", edge_weights={(hub, mission): INF}),
+            Scenario("hub_lost", removed_nodes=[hub]),
+            Scenario("spike", extra_requires={mission: {"Rope": 10, "Water": 5}}),
+        ]
+        result = BatchSimulation(graph, scenarios).run(30)
+        assert result.requests == [(mission, "Rope"), (mission, "Water")]
+        assert result.latency[:, 0].tolist() == [5, 20, 20, 5]
+        assert result.latency[3, 1] == -1 #nobody supplies water
+        assert result.total_unmet().tolist() == [0, 0, 0, 5]
+        assert result.mean_latency().tolist() == [5, 20, 20, 5]
+
+    def test_missing_edge_override(self, agent):
+        graph = agent.get_graph()
+        supplier, hub, mission = graph.get_nodes()
+        with pytest.raises(ValueError):
+            BatchSimulation(graph, [Scenario(edge_weights={(mission, supplier): 1})]).run(1)
@@ -0,0 +1,73 @@
+import random
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_ch import ContractionHierarchy
+from src.sar_project.agents.logistics_routing import dijkstra
+
+class TestContractionHierarchy:
+    @pytest.fixture
+    def agent(self):
+        rng = random.Random(3)
+        agent = LogisticsAgent()
+        graph = agent.get_graph()
+        hubs = [Hub("hub" + str(i)) for i in range(60)]
+        for hub in hubs:
+            graph.add_hub(hub)
+        for i, hub in enumerate(hubs): #a ring so everything connects, plus random roads
+            hub.update_connections(hubs[(i + 1) % len(hubs)], rng.randint(1, 9))
+            hubs[(i + 1) % len(hubs)].update_connections(hub, rng.randint(1, 9))
+        for _ in range(120):
+            hub, other = rng.sample(hubs, 2)
+            hub.update_connections(other, rng.randint(1, 9))
+        for i in range(3):
+            supplier = Supplier("supply" + str(i))
+            supplier.update_connections(hubs[i * 20], 1)
+            graph.add_supplier(supplier)
+            supplier.add_provided_good("Rope")
+        for i in range(5):
+            mission = Mission("mission" + str(i))
+            hubs[i * 11 + 5].update_connections(mission, 2)
+            graph.add_mission(mission)
+            mission.add_required_good("Rope", 1)
+        return agent
+
+    def test_queries_match_dijkstra(self, agent):
+        adjacency = agent.get_graph().get_adjacency()
+        ch = ContractionHierarchy.build(adjacency)
+        for source in range(0, len(adjacency), 7):
+            dist = dijkstra(adjacency, [source])[0]
+            for target in range(len(adjacency)):
+                found, path = ch.query([source], target)
+                assert found == dist[target]
+                if path is not None:
+                    assert path[0] == source and path[-1] == target
+                    assert sum(adjacency.weights[adjacency.find(i, j)] for i, j in zip(path, path[1:])) == found
+
+    def test_deliveries_and_fallback(self, agent):
+        def cost(path):
+            return sum(node.get_connections()[other] for node, other in zip(path, path[1:]))
+        heap = agent.calculate_deliveries(method="heap")
+        ch = agent.calculate_deliveries(method="ch")
+        assert {mission: cost(ch[mission]["Rope"]) for mission in ch} == {mission: cost(heap[mission]["Rope"]) for mission in heap}
+        assert agent.contraction_hierarchy.is_current(agent.get_graph())
+        hub = agent.get_graph().get_hubs()[5]
+        hub.update_connections(agent.get_graph().get_missions()[0], 0.5)
+        assert not agent.contraction_hierarchy.is_current(agent.get_graph())
+        assert agent.calculate_deliveries(method="ch") == agent.calculate_deliveries(method="heap")
+
+    def test_save_and_load(self, agent, tmp_path):
+        agent.build_contraction_hierarchy()
+        agent.save_contraction_hierarchy(tmp_path / "graph.ch")
+        before = agent.calculate_deliveries(method="ch")
+        assert agent.load_contraction_hierarchy(tmp_path / "graph.ch")
+        assert agent.calculate_deliveries(method="ch") == before
+        agent.get_graph().get_hubs()[0].update_connections(agent.get_graph().get_hubs()[30], 1)
+        assert not agent.load_contraction_hierarchy(tmp_path / "graph.ch")
+
+    def test_new_graph_is_not_current(self, agent, tmp_path):
+        agent.save_snapshot(tmp_path / "state.snap")
+        agent.get_graph().get_hubs()[0].update_connections(agent.get_graph().get_hubs()[30], 1)
+        agent.build_contraction_hierarchy()
+        restored = agent.load_snapshot(tmp_path / "state.snap")
+        assert not agent.contraction_hierarchy.is_current(restored) #even if it reused the old graph's address and version
+        assert agent.calculate_deliveries(method="ch") == agent.calculate_deliveries(method="heap")
@@ -0,0 +1,167 @@
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_consolidation import consolidate
+
+class TestConsolidate:
+    def test_packs_shared_first_edge(self):
+        supplier, hub, mission1, mission2 = Supplier("s"), Hub("h"), Mission("m1"), Mission("m2")
+        other = Hub("other")
+        dispatches = [("Rope", 10, [supplier, hub, mission1]), ("Water", 10, [supplier, hub, mission2]),
+                      ("Rope", 5, [supplier, hub, mission1]), ("Blanket", 10, [supplier, other, mission1])]
+        loads = consolidate(dispatches, 40)
+        assert [sorted((good, qty, path[-1].get_name()) for good, qty, path in load) for load in loads] == [
+            [("Rope", 15, "m1"), ("Water", 10, "m2")], [("Blanket", 10, "m1")]]
+
+    def test_splits_over_capacity(self):
+        supplier, mission = Supplier("s"), Mission("m")
+        loads = consolidate([("Rope", 25, [supplier, mission]), ("Water", 10, [supplier, mission])], 15)
+        assert [sum(qty for _, qty, _ in load) for load in loads] == [15, 15, 5]
+        assert sum(qty for load in loads for good, qty, _ in load if good == "Rope") == 25
+
+    def test_capacity_must_be_positive(self):
+        with pytest.raises(ValueError):
+            consolidate([], 0)
+
+
+def corridor_agent():
+    agent = LogisticsAgent()
+    graph = agent.get_graph()
+    supplier = Supplier("supply1")
+    hub = Hub("hub1")
+    mission1 = Mission("mission1")
+    mission2 = Mission("mission2")
+    supplier.update_connections(hub, 2)
+    hub.update_connections(mission1, 1)
+    hub.update_connections(mission2, 2)
+    graph.add_supplier(supplier)
+    graph.add_hub(hub)
+    graph.add_mission(mission1)
+    graph.add_mission(mission2)
+    for good in ("Rope", "Water", "Blanket"):
+        supplier.add_provided_good(good)
+        mission1.add_required_good(good, 5)
+    mission2.add_required_good("Rope", 5)
+    agent.aftershock_time = None
+    return agent
+
+
+class TestConsolidatedShipments:
+    @pytest.fixture
+    def agent(self):
+        return corridor_agent()
+
+    def test_one_vehicle_splits_at_hub(self, agent):
+        agent.vehicle_capacity = 40
+        agent.run_time_tick()
+        transit = agent.get_graph().get_good_transit()
+        assert len(transit) == 1
+        vehicle = transit[0]
+        assert vehicle.good is None and vehicle.qty == 40
+        assert [node.get_name() for node in vehicle.route] == ["supply1", "hub1"]
+        assert vehicle.goods() == {"Rope": 20, "Water": 10, "Blanket": 10}
+        assert agent.get_graph().in_transit_of("Water") == [vehicle]
+        mission1, mission2 = agent.get_graph().get_missions()
+        assert agent.get_graph().in_transit_to(mission1) == [vehicle] #goods on board for it, though the vehicle stops at the hub
+        assert agent.get_graph().in_transit_to(mission2) == [vehicle]
+        assert agent.get_graph().in_transit_to(vehicle.destination) == []
+        agent.advance_to(3)
+        transit = agent.get_graph().get_good_transit()
+        assert sorted(shipment.get_final_destination().get_name() for shipment in transit) == ["mission1", "mission2"]
+        agent.advance_to(6)
+        graph = agent.get_graph()
+        assert graph.get_good_transit() == []
+        mission1 = [m for m in graph.get_missions() if m.get_name() == "mission1"][0]
+        assert mission1.get_curr_store() == {"Rope": 10, "Water": 10, "Blanket": 10}
+        assert agent.delivered == {3: 30, 4: 10}
+        assert agent.throughput() == 40 / 6
+        assert agent.throughput(since=4) == 10 / 2
+        assert agent.process_request({"get_throughput": True}) == agent.throughput()
+
+    def test_remove_by_legacy_tuple(self, agent):
+        agent.vehicle_capacity = 40
+        agent.run_time_tick()
+        graph = agent.get_graph()
+        graph.remove_good_transit(graph.get_good_transit()[0].as_tuple())
+        assert graph.get_good_transit() == []
+        assert graph.in_transit_of("Rope") == []
+        assert graph.in_transit_to(graph.get_missions()[0]) == []
+
+    def test_fewer_transits_than_one_van_per_good(self, agent):
+        legacy = corridor_agent()
+        legacy.run_time_tick()
+        assert len(legacy.get_graph().get_good_transit()) == 4
+        agent.vehicle_capacity = 15
+        agent.run_time_tick()
+        assert [shipment.qty for shipment in agent.get_graph().get_good_transit()] == [15, 15, 10]
+
+    def test_event_driven_matches_scan(self, agent):
+        agent.vehicle_capacity = 40
+        agent.event_driven = True
+        agent.advance_to(6)
+        assert agent.delivered == {3: 30, 4: 10}
+
+    def test_aftershock_rerequests_every_parcel(self, agent):
+        agent.vehicle_capacity = 40
+        agent.aftershock_time = 1
+        agent.run_time_tick()
+        agent.run_time_tick()
+        transit = agent.get_graph().get_good_transit()
+        assert len(transit) == 1 #the lost load was asked for again and sent out in one new vehicle
+        assert transit[0].departure_time == 1
+        assert transit[0].goods() == {"Rope": 20, "Water": 10, "Blanket": 10}
+
+    def test_reroute_keeps_parcel_tails(self, agent):
+        agent.vehicle_capacity = 40
+        agent.run_time_tick()
+        graph = agent.get_graph()
+        supplier, hub = graph.get_suppliers()[0], graph.get_hubs()[0]
+        bypass = Hub("bypass")
+        graph.add_hub(bypass)
+        vehicle = graph.get_good_transit()[0]
+        vehicle.route = [supplier, bypass, hub]
+        vehicle.parcels = [(good, qty, [supplier, bypass] + path[1:]) for good, qty, path in vehicle.parcels]
+        assert agent.reroute(vehicle)
+        assert vehicle.route == [supplier, hub]
+        assert all(path[:2] == [supplier, hub] and len(path) == 3 for _, _, path in vehicle.parcels)
+
+    def test_reroutes_parcel_tails(self, agent):
+        agent.vehicle_capacity = 40
+        graph = agent.get_graph()
+        supplier, hub = graph.get_suppliers()[0], graph.get_hubs()[0]
+        mission1, mission2 = graph.get_missions()
+        detour = Hub("detour")
+        graph.add_hub(detour)
+        hub.update_connections(detour, 1)
+        detour.update_connections(mission2, 3)
+        agent.run_time_tick()
+        vehicle = graph.get_good_transit()[0]
+        assert vehicle.route == [supplier, hub]
+        detour.update_connections(mission2, 0) #a shortcut opens past the split point
+        assert graph.pop_suboptimal_shipments() == [vehicle]
+        assert agent.reroute(vehicle)
+        assert vehicle.route == [supplier, hub]
+        assert sorted([node.get_name() for node in path[1:]] for _, _, path in vehicle.parcels) == [
+            ["hub1", "detour", "mission2"], ["hub1", "mission1"], ["hub1", "mission1"], ["hub1", "mission1"]]
+        detour.update_connections(mission2, 9) #and washes out again
+        assert graph.pop_suboptimal_shipments() == [vehicle]
+        agent.reroute(vehicle)
+        assert [path for _, _, path in vehicle.parcels if path[-1] is mission2] == [[supplier, hub, mission2]]
+        graph.set_edge_penalties({mission2: 2}) #a batch change
+        assert graph.pop_suboptimal_shipments() == [vehicle]
+        agent.advance_to(8)
+        assert mission2.get_curr_store() == {"Rope": 10}
+
+    def test_snapshot_roundtrip(self, agent, tmp_path):
+        agent.vehicle_capacity = 40
+        agent.run_time_tick()
+        agent.save_snapshot(tmp_path / "fleet.snap")
+        restored = LogisticsAgent()
+        restored.load_snapshot(tmp_path / "fleet.snap")
+        restored.aftershock_time = None
+        vehicle = restored.get_graph().get_good_transit()[0]
+        assert vehicle.goods() == {"Rope": 20, "Water": 10, "Blanket": 10}
+        assert [[node.get_name() for node in path] for _, _, path in vehicle.parcels] == [
+            [node.get_name() for node in path] for _, _, path in agent.get_graph().get_good_transit()[0].parcels]
+        restored.vehicle_capacity = 40
+        restored.advance_to(6)
+        assert sum(restored.delivered.values()) == 40
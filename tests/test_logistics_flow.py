@@ -0,0 +1,79 @@
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_flow import MinCostFlow
+
+class TestMinCostFlow:
+    def test_solve(self):
+        flow = MinCostFlow(4)
+        cheap = flow.add_edge(0, 1, 5, 1)
+        flow.add_edge(0, 2, 10, 3)
+        flow.add_edge(1, 3, 10, 1)
+        flow.add_edge(2, 3, 10, 1)
+        assert flow.solve(0, 3, 8) == (8, 5 * 2 + 3 * 4)
+        assert flow.flow(cheap) == 5
+        assert sorted(flow.decompose(0, 3)) == [(3, [0, 2, 3]), (5, [0, 1, 3])]
+
+    def test_decompose_zero_cost_cycle(self):
+        flow = MinCostFlow(4)
+        flow.add_edge(0, 1, 4, 1)
+        flow.add_edge(1, 2, 4, 0)
+        flow.add_edge(2, 1, 4, 0)
+        flow.add_edge(2, 3, 4, 1)
+        flow.solve(0, 3)
+        assert flow.decompose(0, 3) == [(4, [0, 1, 2, 3])]
+
+
+class TestFlowAllocation:
+    @pytest.fixture
+    def agent(self):
+        return LogisticsAgent()
+
+    def test_scarce_hub_stock(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission1 = Mission("mission1")
+        mission2 = Mission("mission2")
+        supplier.update_connections(hub, 10)
+        hub.update_connections(mission1, 1)
+        hub.update_connections(mission2, 2)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission1)
+        graph.add_mission(mission2)
+        supplier.add_provided_good("Rope")
+        hub.recieve_good("Rope", 6)
+        mission1.add_required_good("Rope", 4)
+        mission2.add_required_good("Rope", 5)
+        plan = agent.plan_allocation()
+        by_source = {}
+        by_mission = {}
+        for good, qty, path in plan:
+            assert good == "Rope"
+            by_source[path[0]] = by_source.get(path[0], 0) + qty
+            by_mission[path[-1]] = by_mission.get(path[-1], 0) + qty
+        assert by_source == {hub : 6, supplier : 3} #all local stock first, never more than the hub holds
+        assert by_mission == {mission1 : 4, mission2 : 5}
+
+    def test_run_time_tick(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub = Hub("hub1")
+        mission = Mission("mission1")
+        supplier.update_connections(hub, 1)
+        hub.update_connections(mission, 1)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        hub.recieve_good("Rope", 3)
+        mission.add_required_good("Rope", 7)
+        agent.allocation = "min_cost_flow"
+        agent.run_time_tick()
+        assert hub.get_goods() == {"Rope" : 0}
+        assert sorted(transit[3] for transit in graph.get_good_transit()) == [3, 4]
+        assert mission.get_required_goods() == {"Rope" : 0}
+        for _ in range(3):
+            agent.run_time_tick()
+        assert mission.get_curr_store() == {"Rope" : 7}
+        assert graph.get_good_transit() == []
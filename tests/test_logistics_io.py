@@ -0,0 +1,180 @@
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, LogisticsGraph, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_io import Snapshot
+from src.sar_project.agents.logistics_routing import INF
+
+class TestSnapshot:
+    @pytest.fixture
+    def agent(self):
+        agent = LogisticsAgent()
+        agent.aftershock_time = None
+        graph = agent.get_graph()
+        supplier = Supplier("supply1", (0, 0))
+        hub = Hub("hub1")
+        mission = Mission("mission1", (4, 0))
+        spare = Hub("spare")
+        supplier.update_connections(hub, 2)
+        hub.update_connections(supplier, 2)
+        hub.update_connections(mission, 1.5)
+        mission.update_connections(hub, 2)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub)
+        graph.add_mission(mission)
+        graph.add_hub(spare)
+        graph.remove_hub(spare) #leaves a gap in the node ids
+        supplier.add_provided_good("Rope")
+        supplier.add_provided_good("Water")
+        hub.recieve_good("Water", 7)
+        mission.add_required_good("Rope", 35)
+        mission.add_required_good("Water", 2.5)
+        mission.recieve_good("Food", 1)
+        agent.run_time_tick()
+        agent.run_time_tick()
+        return agent
+
+    def state(self, agent):
+        graph = agent.get_graph()
+        names = lambda nodes: [node.get_name() for node in nodes]
+        return (agent.time, names(graph.get_nodes()),
+                [(node.get_name(), {other.get_name(): w for other, w in node.get_connections().items()}, node.get_coords(),
+                  getattr(node, "has", None), getattr(node, "requires", None)) for node in graph.get_nodes()],
+                [(s.id, s.good, s.source.get_name(), s.destination.get_name(), s.qty, names(s.route), s.departure_time, s.leg)
+                 for s in graph.get_good_transit()])
+
+    def test_round_trip(self, agent, tmp_path):
+        agent.save_snapshot(tmp_path / "state.snap")
+        restored = LogisticsAgent()
+        restored.aftershock_time = None
+        restored.load_snapshot(tmp_path / "state.snap")
+        assert self.state(restored) == self.state(agent)
+        assert type(restored.get_graph().get_hubs()[0].get_goods()["Water"]) is int
+        assert restored.get_graph().suppliers_of("Rope") == restored.get_graph().get_suppliers()
+        for _ in range(4):
+            agent.run_time_tick()
+            restored.run_time_tick()
+            assert self.state(restored) == self.state(agent)
+        assert restored.get_graph().get_good_transit()[-1].id == agent.get_graph().get_good_transit()[-1].id
+
+    def test_penalties_survive_restore(self, agent, tmp_path):
+        graph = agent.get_graph()
+        supplier, hub = graph.get_suppliers()[0], graph.get_hubs()[0]
+        graph.set_edge_penalties({hub: 3})
+        agent.save_snapshot(tmp_path / "state.snap")
+        restored = LogisticsAgent()
+        restored.load_snapshot(tmp_path / "state.snap")
+        restored_graph = restored.get_graph()
+        supplier, hub = restored_graph.get_suppliers()[0], restored_graph.get_hubs()[0]
+        assert supplier.get_connections()[hub] == 6
+        restored_graph.set_edge_penalties({hub: 2}) #scales from the unpenalised weight, not the restored one
+        assert supplier.get_connections()[hub] == 4
+        restored_graph.clear_edge_penalties()
+        assert supplier.get_connections()[hub] == 2 and restored_graph.base_weights == {}
+
+    def test_fork(self, agent, tmp_path):
+        agent.save_snapshot(tmp_path / "state.snap")
+        with Snapshot(tmp_path / "state.snap") as snapshot:
+            forks = [LogisticsAgent() for _ in range(3)]
+            for fork in forks:
+                fork.aftershock_time = None
+                fork.load_snapshot(snapshot)
+        forks[0].get_graph().get_missions()[0].add_required_good("Rope", 100)
+        forks[0].run_time_tick()
+        assert self.state(forks[1]) == self.state(forks[2]) == self.state(agent)
+        assert self.state(forks[0]) != self.state(forks[1])
+
+    def test_lazy_connections(self, agent, tmp_path):
+        agent.save_snapshot(tmp_path / "state.snap")
+        with Snapshot(tmp_path / "state.snap") as snapshot:
+            with snapshot.column("edge_targets") as targets:
+                assert targets.readonly and targets.format == "q" #a view over the file, not a copy
+                with pytest.raises(BufferError):
+                    snapshot.close()
+            graph = snapshot.restore()[0]
+        supplier, hub, mission = graph.get_nodes()
+        dist = graph.get_shortest_path_tree([supplier])[0]
+        assert dist[graph.get_node_id(mission)] == 3.5
+        assert mission._lazy_row is not None #only the legs in flight were read, routing never needs the dicts
+        hub.update_connections(mission, 4)
+        assert hub.get_connections() == {supplier: 2, mission: 4}
+        assert graph.get_shortest_path_tree([supplier])[0][graph.get_node_id(mission)] == 6
+        assert supplier.get_connections() == {hub: 2}
+
+    def test_bad_file(self, tmp_path):
+        (tmp_path / "junk").write_bytes(b"not a snapshot at all")
+        with pytest.raises(ValueError):
+            Snapshot(tmp_path / "junk")
+
+
+class TestBulkLoad:
+    @pytest.fixture
+    def files(self, tmp_path):
+        (tmp_path / "nodes.csv").write_text("kind,name,x,y\nsupplier,supply1,0,0\nhub,hub1,1,0\nhub,junction,,\nmission,mission1,,\n")
+        (tmp_path / "edges.csv").write_text("source,target,weight\nsupply1,hub1,3\nhub1,mission1,2.5\n"
+                                            "supply1,hub1,2\nsupply1,hub1,4\nhub1,junction,1\njunction,mission1,1\n")
+        return tmp_path / "nodes.csv", tmp_path / "edges.csv"
+
+    def test_from_csv(self, files):
+        graph = LogisticsGraph.from_edge_list(files[1], files[0], bidirectional=True, chunk_size=2)
+        supplier, hub, junction = graph.get_suppliers()[0], graph.get_hubs()[0], graph.get_hubs()[1]
+        mission = graph.get_missions()[0]
+        assert [node.get_name() for node in graph.get_nodes()] == ["supply1", "hub1", "junction", "mission1"]
+        assert supplier.get_coords() == (0.0, 0.0) and mission.get_coords() is None and junction.get_coords() is None
+        assert supplier.get_connections() == {hub: 4} #the last row for an edge wins
+        assert hub.get_connections() == {supplier: 4, mission: 2.5, junction: 1}
+        assert junction.get_connections() == {hub: 1, mission: 1}
+        assert mission.get_connections() == {hub: 2.5, junction: 1}
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        agent = LogisticsAgent()
+        agent.graph = graph
+        assert agent.calculate_deliveries(method="heap") == {mission: {"Rope": [supplier, hub, junction, mission]}}
+
+    def test_rows_notify_once(self):
+        graph = LogisticsGraph()
+        graph.load_nodes([("hub", "a"), ("hub", "b")])
+        a, b = graph.get_hubs()
+        graph.get_shortest_path_tree([a])
+        version = graph.topology_version
+        assert graph.load_edges(iter([("a", "b", 4), ("b", "a", 1), ("a", "b", 5)])) == 3
+        assert graph.topology_version == version + 1
+        assert a.get_connections() == {b: 5} and b.get_connections() == {a: 1}
+        assert graph.get_shortest_path_tree([a])[0][1] == 5
+
+    def test_reload_flags_shipments(self):
+        graph = LogisticsGraph()
+        graph.load_nodes([("hub", "a"), ("hub", "b"), ("hub", "c")])
+        graph.load_edges([("a", "b", 2), ("b", "c", 2), ("a", "c", 9)])
+        a, b, c = graph.get_hubs()
+        shipment = graph.add_good_transit("Rope", a, b, 1, [a, b, c], 0, 1)
+        graph.load_edges([("a", "c", 1), ("b", "c", "inf")]) #the road past b closes, a bypass opens
+        assert b.get_connections() == {c: INF}
+        assert graph.pop_suboptimal_shipments() == [shipment]
+        assert graph.next_arrival() == 2
+        graph.load_edges([("a", "b", 6)]) #the leg it is on gets slower
+        assert graph.next_arrival() == 6
+
+    def test_loaded_weight_replaces_penalty(self):
+        graph = LogisticsGraph()
+        graph.load_nodes([("hub", "a"), ("hub", "b")])
+        graph.load_edges([("a", "b", 4)])
+        a, b = graph.get_hubs()
+        graph.set_edge_penalties({b: 2})
+        graph.load_edges([("a", "b", 3)]) #the road is rebuilt, its new weight is the base
+        graph.set_edge_penalties({b: 2})
+        assert a.get_connections() == {b: 6}
+        graph.clear_edge_penalties()
+        assert a.get_connections() == {b: 3}
+
+    def test_bad_input(self, tmp_path):
+        (tmp_path / "edges.csv").write_text("from,to,weight\na,b,1\n")
+        with pytest.raises(ValueError):
+            LogisticsGraph.from_edge_list(tmp_path / "edges.csv")
+        with pytest.raises(ValueError):
+            LogisticsGraph().load_nodes([("depot", "a")])
+        graph = LogisticsGraph()
+        graph.load_nodes([("hub", "a", 1.0)]) #half a position is no position
+        assert graph.get_hubs()[0].get_coords() is None
+        with pytest.raises(ValueError):
+            graph.load_edges([("a", "typo", 1)])
+        graph.load_edges([("a", "b", 1)], create_missing=True)
+        assert [hub.get_name() for hub in graph.get_hubs()] == ["a", "b"]
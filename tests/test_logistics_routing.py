@@ -0,0 +1,205 @@
+import random
+import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, LogisticsGraph, Supplier, Mission, Hub
+from src.sar_project.agents.logistics_routing import CSRAdjacency, INF, bounded_dijkstra, dijkstra, geo_heuristic, path_to
+
+class TestRouting:
+    @pytest.fixture
+    def agent(self):
+        return LogisticsAgent()
+
+    def test_incoming_and_transpose(self):
+        adjacency = CSRAdjacency.from_rows([[(1, 2.0), (2, 5.0)], [(2, 1.0)], []])
+        assert sorted(adjacency.incoming(2)) == [(0, 5.0), (1, 1.0)]
+        adjacency.set_weight(0, 2, INF)
+        assert list(adjacency.incoming(2)) == [(1, 1.0)]
+        assert list(adjacency.transpose().neighbours(1)) == [(0, 2.0)]
+
+    def test_bounded_dijkstra(self):
+        adjacency = CSRAdjacency.from_rows([[(1, 2.0)], [(2, 3.0)], [(3, 4.0)], []])
+        assert bounded_dijkstra(adjacency, 0, 5) == {0: 0.0, 1: 2.0, 2: 5.0}
+        assert bounded_dijkstra(adjacency, 3, 7, reverse=True) == {3: 0.0, 2: 4.0, 1: 7.0}
+        adjacency.set_weight(2, 3, 1.0) #patches show through the reverse index
+        assert bounded_dijkstra(adjacency, 3, 7, reverse=True) == {3: 0.0, 2: 1.0, 1: 4.0, 0: 6.0}
+
+    def test_repaired_trees_match_fresh(self):
+        rng = random.Random(7)
+        graph = LogisticsGraph()
+        suppliers = [Supplier("supply" + str(i)) for i in range(3)]
+        hubs = [Hub("hub" + str(i)) for i in range(40)]
+        for supplier in suppliers:
+            graph.add_supplier(supplier)
+        for hub in hubs:
+            graph.add_hub(hub)
+        nodes = suppliers + hubs
+        for _ in range(160):
+            node, other = rng.sample(nodes, 2)
+            node.update_connections(other, rng.randint(1, 9))
+        source_sets = [[suppliers[0]], suppliers[1:], [hubs[0]]]
+        for sources in source_sets:
+            graph.get_shortest_path_tree(sources)
+        for _ in range(200):
+            node, other = rng.sample(nodes, 2)
+            if other in node.get_connections() and rng.random() < 0.3:
+                node.remove_connection(other)
+            else:
+                node.update_connections(other, rng.randint(1, 9))
+            for sources in source_sets:
+                dist, prev = graph.get_shortest_path_tree(sources)
+                fresh = dijkstra(graph.get_adjacency(), [graph.get_node_id(source) for source in sources])[0]
+                assert list(dist) == list(fresh)
+                for i in range(len(dist)):
+                    if prev[i] != -1:
+                        assert dist[i] == dist[prev[i]] + graph.get_node(prev[i]).get_connections()[graph.get_node(i)]
+
+    def test_slow_road_reroutes_shipment(self, agent):
+        graph = agent.get_graph()
+        supplier = Supplier("supply1")
+        hub1 = Hub("hub1")
+        hub2 = Hub("hub2")
+        mission = Mission("mission1")
+        supplier.update_connections(hub1, 2)
+        hub1.update_connections(hub2, 2)
+        hub2.update_connections(mission, 2)
+        hub1.update_connections(mission, 5)
+        graph.add_supplier(supplier)
+        graph.add_hub(hub1)
+        graph.add_hub(hub2)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        agent.routing_method = "heap"
+        agent.run_time_tick()
+        shipment = graph.get_good_transit()[0]
+        assert shipment.route == [supplier, hub1, hub2, mission]
+        assert graph.pop_stale_routes() == []
+        mission.add_required_good("Rope", 5)
+        hub2.update_connections(mission, 9) #road past hub2 washes out
+        assert graph.pop_suboptimal_shipments() == [shipment]
+        assert graph.pop_stale_routes() == [(mission, "Rope")]
+        hub2.update_connections(mission, 2)
+        hub1.update_connections(mission, 1) #and a shortcut opens
+        assert graph.pop_suboptimal_shipments() == [shipment]
+        hub1.update_connections(mission, 5)
+        hub2.update_connections(mission, 9)
+        agent.run_time_tick()
+        assert shipment.route == [supplier, hub1, mission]
+        assert graph.get_good_transit()[1].route == [supplier, hub1, mission]
+
+    def test_shortcut_flags_match_fresh_routes(self, agent):
+        rng = random.Random(3)
+        graph = agent.get_graph()
+        hubs = [Hub("hub" + str(i)) for i in range(30)]
+        for hub in hubs:
+            graph.add_hub(hub)
+        for _ in range(120):
+            node, other = rng.sample(hubs, 2)
+            node.update_connections(other, rng.randint(2, 9))
+        adjacency = graph.get_adjacency()
+        for _ in range(20):
+            start, end = rng.sample(range(30), 2)
+            prev = dijkstra(adjacency, [start])[1]
+            if prev[end] != -1:
+                path = [graph.get_node(i) for i in path_to(prev, end)]
+                graph.add_good_transit("Rope", path[0], path[1], 1, path, 0, 1)
+        for _ in range(10):
+            node, other = rng.sample(hubs, 2)
+            node.update_connections(other, 1) #shortcut
+            flagged = set(graph.pop_suboptimal_shipments())
+            adjacency = graph.get_adjacency()
+            for shipment in graph.get_good_transit():
+                best = dijkstra(adjacency, [graph.get_node_id(shipment.destination)])[0][graph.get_node_id(shipment.route[-1])]
+                assert (shipment in flagged) == (best < graph._remaining_cost(shipment))
+                if shipment in flagged:
+                    agent.reroute(shipment)
+
+    def test_penalties_refresh_once(self, agent):
+        graph = agent.get_graph()
+        hubs = self.grid_graph(graph, 6, coords=False)
+        corner = hubs[(0, 0)]
+        path = [hubs[(x, 0)] for x in range(6)]
+        shipment = graph.add_good_transit("Rope", path[0], path[1], 1, path, 0, 1)
+        graph.get_shortest_path_tree([corner])
+        version = graph.topology_version
+        graph.set_edge_penalties({hubs[(x, y)]: 4 for x in range(2, 4) for y in range(3)})
+        assert graph.topology_version == version + 1
+        dist = graph.get_shortest_path_tree([corner])[0]
+        assert list(dist) == list(dijkstra(graph.get_adjacency(), [graph.get_node_id(corner)])[0])
+        assert graph.pop_suboptimal_shipments() == [shipment] #its route crosses the penalised block
+        graph.clear_edge_penalties()
+        assert graph.topology_version == version + 2
+        assert graph.pop_suboptimal_shipments() == [] #back on the shortest route
+        assert list(graph.get_shortest_path_tree([corner])[0]) == list(dijkstra(graph.get_adjacency(), [graph.get_node_id(corner)])[0])
+
+    def test_path_tree_cache_is_bounded(self, agent):
+        graph = agent.get_graph()
+        hubs = self.grid_graph(graph, 4, coords=False)
+        graph.max_path_trees = 3
+        for hub in list(hubs.values())[:5]:
+            graph.get_shortest_path_tree([hub])
+        assert len(graph.path_trees) == 3
+        graph.get_shortest_path_tree([hubs[(0, 2)]]) #recently used trees stay
+        graph.get_shortest_path_tree([hubs[(1, 0)]])
+        assert (graph.get_node_id(hubs[(0, 2)]),) in graph.path_trees
+        graph.get_shortest_path_tree([hubs[(0, 0)]])
+        hubs[(0, 0)].update_connections(hubs[(0, 1)], 9)
+        assert len(graph.path_trees) == 3 #current trees are repaired
+        graph.topology_version += 1 #as if something made every tree stale
+        hubs[(0, 0)].update_connections(hubs[(0, 1)], 1)
+        assert len(graph.path_trees) == 0
+
+    def grid_graph(self, graph, size, coords=True):
+        hubs = {}
+        for x in range(size):
+            for y in range(size):
+                hubs[(x, y)] = Hub("hub" + str((x, y)), (x, y) if coords else None)
+                graph.add_hub(hubs[(x, y)])
+        for (x, y), hub in hubs.items():
+            for other in ((x+1, y), (x-1, y), (x, y+1), (x, y-1)):
+                if other in hubs:
+                    hub.update_connections(hubs[other], 1 + ((x * 7 + y * 3) % 3) / 2)
+        return hubs
+
+    def test_astar_matches_heap(self, agent):
+        graph = agent.get_graph()
+        hubs = self.grid_graph(graph, 30)
+        supplier = Supplier("supply1", (0, 0))
+        mission = Mission("mission1", (12, 3))
+        supplier.update_connections(hubs[(0, 0)], 1)
+        hubs[(12, 3)].update_connections(mission, 1)
+        graph.add_supplier(supplier)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 1)
+        astar_paths = agent.calculate_deliveries(method="astar")
+        heap_paths = agent.calculate_deliveries(method="heap")
+        def cost(path):
+            return sum(node.get_connections()[other] for node, other in zip(path, path[1:]))
+        assert cost(astar_paths[mission]["Rope"]) == cost(heap_paths[mission]["Rope"])
+        assert agent.settled_nodes < len(graph.get_nodes()) // 2
+
+    def test_astar_landmarks(self, agent):
+        graph = agent.get_graph()
+        hubs = self.grid_graph(graph, 30, coords=False)
+        supplier = Supplier("supply1")
+        mission = Mission("mission1")
+        supplier.update_connections(hubs[(5, 5)], 1)
+        hubs[(9, 20)].update_connections(mission, 1)
+        graph.add_supplier(supplier)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 1)
+        agent.calculate_deliveries(method="astar")
+        blind = agent.settled_nodes
+        graph.build_landmarks(8)
+        paths = agent.calculate_deliveries(method="astar")
+        assert agent.settled_nodes < blind // 3
+        assert paths == agent.calculate_deliveries(method="heap")
+        hubs[(0, 0)].update_connections(hubs[(0, 1)], 0.5)
+        assert graph.get_landmarks() is None #a cheaper edge could make stale landmarks overestimate
+
+    def test_haversine_heuristic(self):
+        coords = [(51.5074, -0.1278), (48.8566, 2.3522), None]
+        heuristic = geo_heuristic(coords, 1, metric="haversine")
+        assert 340 < heuristic(0) < 345 #London to Paris, km
+        assert heuristic(2) == 0.0
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import tracemalloc
+from src.sar_project.agents.logistics_simulation import LogisticsSimulation
+from src.sar_project.agents.weather_service import WeatherService
+from src.sar_project.knowledge.knowledge_base import KnowledgeBase
+
+class TestStartup:
+    def test_core_imports_without_llm_stack(self):
+        code = ("import sys\n"
+                "from src.sar_project.agents.logistics_simulation import LogisticsSimulation\n"
+                "from src.sar_project.agents.logistics_graph import LogisticsGraph, Supplier, Hub, Mission\n"
+                "simulation = LogisticsSimulation()\n"
+                "simulation.run_time_tick()\n"
+                "print(' '.join(m for m in ('autogen', 'google.generativeai', 'dotenv', 'openai') if m in sys.modules))\n")
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        assert out.strip() == ""
+
+    def test_agent_module_reexports_core(self):
+        from src.sar_project.agents import logisitics_agent, logistics_graph, logistics_simulation
+        assert logisitics_agent.LogisticsGraph is logistics_graph.LogisticsGraph
+        assert issubclass(logisitics_agent.LogisticsAgent, logistics_simulation.LogisticsSimulation)
+
+    def test_settings_loaded_once(self):
+        from src.sar_project.config import settings
+        assert settings.get_settings() is settings.get_settings()
+        assert settings.DEPLOYMENT_NAME == settings.get_settings().DEPLOYMENT_NAME
+        namespace = {}
+        exec("from src.sar_project.config.settings import *", namespace) #the lazy keys come along with a star import too
+        assert set(settings.ENV_SETTINGS) <= set(namespace)
+        assert namespace["LOG_LEVEL"] == settings.get_settings().LOG_LEVEL
+
+
+def allocated_per_instance(factory, count=50):
+    factory() # warm up imports and caches
+    tracemalloc.start()
+    instances = [factory() for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(instances)
+
+
+class TestHeadless:
+    def test_weather_service_imports_without_llm_stack(self):
+        code = ("import sys\n"
+                "from src.sar_project.agents.weather_service import WeatherService\n"
+                "service = WeatherService()\n"
+                "service.assess_weather_risk('base')\n"
+                "print(' '.join(m for m in ('autogen', 'google.generativeai', 'dotenv', 'openai') if m in sys.modules))\n")
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        assert out.strip() == ""
+
+    def test_headless_api(self):
+        simulation = LogisticsSimulation()
+        assert simulation.name == "logistics_specialist"
+        assert simulation.role == "Logistics Specialist"
+        assert simulation.mission_status == "standby"
+        assert simulation.process_request({"get_requests": True}) == []
+        service = WeatherService(name="wx")
+        assert service.name == "wx"
+        assert service.process_request({"assess_risk": True, "location": "base"})["risk_level"] == 0
+        assert service.update_status("active") == {"status": "updated", "new_status": "active"}
+
+    def test_attach_llm_keeps_state(self):
+        from src.sar_project.agents.logisitics_agent import LogisticsAgent
+        simulation = LogisticsSimulation(name="batch_7")
+        simulation.run_time_tick()
+        simulation.update_status("deployed")
+        graph = simulation.graph
+        agent = simulation.attach_llm()
+        assert agent is simulation
+        assert isinstance(agent, LogisticsAgent)
+        assert agent.name == "batch_7"
+        assert agent.graph is graph
+        assert agent.time == 1
+        assert agent.get_status() == "deployed"
+        assert agent.system_message == LogisticsAgent.SYSTEM_MESSAGE
+        assert agent.attach_llm() is agent
+
+    def test_attach_llm_keeps_weather_write_through(self):
+        from src.sar_project.agents.weather_agent import WeatherAgent
+        kb = KnowledgeBase()
+        service = WeatherService(knowledge_base=kb)
+        agent = service.attach_llm()
+        assert isinstance(agent, WeatherAgent)
+        agent.get_current_conditions("ridge")
+        assert agent.kb is kb
+        assert kb.weather_data["ridge"]["wind_speed"] == 15
+
+    def test_headless_is_a_fraction_of_the_agent(self):
+        from src.sar_project.agents.logisitics_agent import LogisticsAgent
+        from src.sar_project.agents.weather_agent import WeatherAgent
+        assert allocated_per_instance(LogisticsSimulation) < 0.6 * allocated_per_instance(LogisticsAgent)
+        assert allocated_per_instance(WeatherService) < 0.5 * allocated_per_instance(WeatherAgent)
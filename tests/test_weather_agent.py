@@ -1,5 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+import numpy as np
 import pytest
+from src.sar_project.agents.logisitics_agent import LogisticsAgent, Supplier, Mission, Hub
 from src.sar_project.agents.weather_agent import WeatherAgent
+from src.sar_project.agents.weather_providers import CachedWeatherProvider, FileWeatherProvider, StubWeatherProvider
+from src.sar_project.agents.weather_risk import RiskRule, assess_grid
+from src.sar_project.knowledge.knowledge_base import KnowledgeBase
 
 class TestWeatherAgent:
     @pytest.fixture
@@ -30,3 +38,131 @@ class TestWeatherAgent:
         response = agent.update_status("active")
         assert response["new_status"] == "active"
         assert agent.get_status() == "active"
+
+
+class CountingProvider(StubWeatherProvider):
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+
+    def current(self, location):
+        self.calls.append(("current", location))
+        time.sleep(self.delay)
+        return dict(super().current(location), wind_speed=40)
+
+    def forecast(self, location, duration):
+        self.calls.append(("forecast", location))
+        return super().forecast(location, duration)
+
+
+class TestWeatherProviders:
+    def test_assessments_share_one_fetch(self):
+        provider = CountingProvider(delay=0.05)
+        kb = KnowledgeBase()
+        agent = WeatherAgent(provider=provider, knowledge_base=kb)
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(agent.assess_weather_risk, ["ridge"] * 200))
+        assert all(result["risks"] == ["high_wind"] for result in results)
+        assert provider.calls == [("current", "ridge")] #coalesced, and no unused forecast fetch
+        assert kb.query_weather("ridge")["wind_speed"] == 40
+
+    def test_ttl(self):
+        now = [0.0]
+        provider = CountingProvider()
+        cache = CachedWeatherProvider(provider, ttl=60, clock=lambda: now[0])
+        cache.current("ridge")
+        cache.forecast("ridge", "2h")
+        now[0] = 59
+        cache.current("ridge")
+        assert len(provider.calls) == 2
+        now[0] = 61
+        cache.current("ridge")
+        cache.current("valley")
+        assert provider.calls[2:] == [("current", "ridge"), ("current", "valley")]
+
+    def test_failed_fetch_is_not_cached(self):
+        class Flaky(StubWeatherProvider):
+            failed = False
+            def current(self, location):
+                if not self.failed:
+                    self.failed = True
+                    raise ConnectionError("upstream down")
+                return super().current(location)
+        cache = CachedWeatherProvider(Flaky())
+        with pytest.raises(ConnectionError):
+            cache.current("ridge")
+        assert cache.current("ridge")["temperature"] == 22
+
+    def test_file_provider(self, tmp_path):
+        (tmp_path / "weather.json").write_text(json.dumps({
+            "ridge": {"current": {"wind_speed": 45, "visibility": 2}, "forecast": {"2h": [{"time": "now+1h", "conditions": "snow"}]}},
+            "default": {"current": {"wind_speed": 5, "visibility": 10}}}))
+        agent = WeatherAgent(provider=FileWeatherProvider(tmp_path / "weather.json"))
+        assert agent.assess_weather_risk("ridge")["risks"] == ["high_wind", "low_visibility"]
+        assert agent.assess_weather_risk("elsewhere")["risks"] == []
+        assert agent.get_weather_forecast("ridge", "2h")["forecast"][0]["conditions"] == "snow"
+        assert agent.get_weather_forecast("elsewhere", "2h")["forecast"] == []
+
+
+class TestAreaRisk:
+    @pytest.fixture
+    def agent(self):
+        return WeatherAgent()
+
+    def test_matches_scalar_rules(self, agent):
+        rng = np.random.default_rng(4)
+        wind = rng.uniform(0, 60, (50, 40))
+        visibility = rng.uniform(0, 12, (50, 40))
+        risk = agent.assess_area_risk({"wind_speed": wind, "visibility": visibility, "temperature": wind * 0})
+        for i, j in [(0, 0), (10, 3), (49, 39), (25, 20)]:
+            expected = []
+            if wind[i, j] > 30:
+                expected.append("high_wind")
+            if visibility[i, j] < 5:
+                expected.append("low_visibility")
+            assert risk.risks(risk.codes[i, j]) == expected
+            assert risk.levels[i, j] == len(expected)
+            assert risk.recommendations(risk.codes[i, j]) == agent._generate_recommendations(expected)
+
+    def test_custom_rules(self):
+        rules = [RiskRule("flood", "precipitation", ">=", 20, "Avoid low crossings", weight=2),
+                 RiskRule("freezing", "temperature", "<=", 0, "Issue cold weather kit")]
+        risk = assess_grid({"precipitation": [25, 5, np.nan], "temperature": [-3, 4, -1]}, rules)
+        assert risk.levels.tolist() == [3, 0, 1]
+        assert risk.recommendations(risk.codes[0]) == ["Avoid low crossings", "Issue cold weather kit"]
+        with pytest.raises(ValueError):
+            assess_grid({"precipitation": [1]}, rules)
+
+    def test_edge_penalties(self, agent):
+        logistics = LogisticsAgent()
+        graph = logistics.get_graph()
+        supplier = Supplier("supply1", (0.5, 0.5))
+        stormy = Hub("stormy", (1.5, 0.5))
+        calm = Hub("calm", (0.5, 1.5))
+        mission = Mission("mission1", (1.5, 1.5))
+        for a, b in [(supplier, stormy), (stormy, mission), (supplier, calm), (calm, mission)]:
+            a.update_connections(b, 2 if a is stormy or b is stormy else 3)
+        graph.add_supplier(supplier)
+        graph.add_hub(stormy)
+        graph.add_hub(calm)
+        graph.add_mission(mission)
+        supplier.add_provided_good("Rope")
+        mission.add_required_good("Rope", 5)
+        assert logistics.calculate_deliveries(method="heap")[mission]["Rope"] == [supplier, stormy, mission]
+        risk = agent.assess_area_risk({"wind_speed": [[0, 0], [45, 0]], "visibility": [[10, 10], [10, 10]]}, origin=(0, 0))
+        for _ in range(2): #applying twice must not compound
+            agent.apply_area_risk(graph, risk, per_level=1.0)
+            assert supplier.get_connections() == {stormy: 4, calm: 3}
+            assert stormy.get_connections() == {mission: 4}
+        assert logistics.calculate_deliveries(method="heap")[mission]["Rope"] == [supplier, calm, mission]
+        graph.clear_edge_penalties()
+        assert supplier.get_connections() == {stormy: 2, calm: 3}
+        assert graph.base_weights == {}
+
+    def test_million_cells(self, agent):
+        rng = np.random.default_rng(1)
+        fields = {"wind_speed": rng.uniform(0, 60, (1000, 1000)), "visibility": rng.uniform(0, 12, (1000, 1000))}
+        start = time.perf_counter()
+        risk = agent.assess_area_risk(fields)
+        assert time.perf_counter() - start < 1.0
+        assert risk.levels.shape == (1000, 1000)